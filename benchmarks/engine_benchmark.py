@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Compare the bs4 and fast extraction engines.
+
+Runs both engines over every awesome list README in a source directory (or a
+synthetic README when no sources are available), checks that they produce
+identical output and reports throughput in MB of README per second.
+"""
+import os
+import sys
+import time
+import argparse
+import logging
+from pathlib import Path
+
+# Add the repository root to the path to import our modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic import synthetic_readme
+from scripts.extract_data import parse_html_categories, IGNORED_CATEGORIES
+from scripts.fast_parser import extract_categories, UnsupportedMarkdown
+
+# Rough size of one synthetic resource line, used to size the synthetic README
+RESOURCE_BYTES = 100
+RESOURCES_PER_CATEGORY = 70
+
+
+def time_engine(parse, content, repeat):
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = parse(content)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best
+
+
+def fast_categories(content):
+    try:
+        return extract_categories(content, IGNORED_CATEGORIES)
+    except UnsupportedMarkdown:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the bs4 and fast extraction engines')
+    parser.add_argument('--source-dir', default='awesome-lists-sources', help='Directory containing awesome list repositories')
+    parser.add_argument('--synthetic-mb', type=float, default=1.0, help='Size of the synthetic README used when no sources exist')
+    parser.add_argument('--repeat', type=int, default=3, help='Number of timed runs per engine; the best run is reported')
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+
+    documents = []
+    base_dir = Path(args.source_dir)
+    if base_dir.is_dir():
+        for awesome_dir in sorted(d for d in base_dir.iterdir() if d.is_dir() and d.name.startswith('awesome-')):
+            readme_path = awesome_dir / 'README.md'
+            if readme_path.exists():
+                documents.append((awesome_dir.name, readme_path.read_text(encoding='utf-8')))
+    if not documents:
+        print(f"No sources found in {base_dir}; using a {args.synthetic_mb} MB synthetic README")
+        resources = max(1, int(args.synthetic_mb * 1_000_000 / RESOURCE_BYTES))
+        documents.append(('synthetic', synthetic_readme('headings', resources,
+                                                        categories=resources // RESOURCES_PER_CATEGORY)))
+
+    total_mb = total_bs4 = total_fast = 0.0
+    mismatches = []
+    print(f"{'list':<32} {'MB':>6} {'bs4 s':>8} {'fast s':>8} {'bs4 MB/s':>9} {'fast MB/s':>10} {'speedup':>8}  result")
+    for name, content in documents:
+        size_mb = len(content.encode('utf-8')) / 1_000_000
+        expected, bs4_time = time_engine(parse_html_categories, content, args.repeat)
+        actual, fast_time = time_engine(fast_categories, content, args.repeat)
+        if actual is None:
+            status = 'fallback'
+            fast_time += bs4_time
+        elif actual == expected:
+            status = 'identical'
+        else:
+            status = 'MISMATCH'
+            mismatches.append(name)
+        total_mb += size_mb
+        total_bs4 += bs4_time
+        total_fast += fast_time
+        print(f"{name:<32} {size_mb:>6.2f} {bs4_time:>8.3f} {fast_time:>8.3f} "
+              f"{size_mb / bs4_time:>9.2f} {size_mb / fast_time:>10.2f} {bs4_time / fast_time:>7.1f}x  {status}")
+
+    print(f"{'total':<32} {total_mb:>6.2f} {total_bs4:>8.3f} {total_fast:>8.3f} "
+          f"{total_mb / total_bs4:>9.2f} {total_mb / total_fast:>10.2f} {total_bs4 / total_fast:>7.1f}x")
+
+    if mismatches:
+        print(f"\nEngines disagree on: {', '.join(mismatches)}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""
+Benchmark the extraction pipeline stage by stage on a synthetic corpus.
+
+Generates READMEs of a configurable size and shape (see synthetic.py), then
+times parse_awesome_list, extract_resources_from_ul, parse_table,
+filter_invalid_resources (URL validation and duplicate detection), the
+streaming JSON and SQLite writes and the search index build. Each stage
+reports its best time over --repeat runs, throughput in resources per second
+and its peak RSS. The memory held by the whole corpus is measured once as
+plain dicts (json.load) and once as model objects (storage.iter_lists).
+Results are written as JSON, and --compare prints the change against an
+earlier results file. Everything runs offline.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import logging
+import platform
+import subprocess
+import tempfile
+import tracemalloc
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+
+import markdown  # type: ignore
+from bs4 import BeautifulSoup  # type: ignore
+
+# Add the repository root to the path to import our modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic import SHAPES, DEFAULT_INVALID_RATIO, DEFAULT_DUPLICATE_RATIO, write_corpus
+from scripts.extract_data import ENGINES, DEFAULT_ENGINE, parse_awesome_list, extract_resources_from_ul, parse_table
+from scripts.filter_valid_urls import filter_invalid_resources
+from scripts.urls import check_url
+from scripts.json_stream import JsonListWriter
+from scripts.storage import SqliteListWriter, iter_lists
+from scripts.build_search_index import build_search_index
+from scripts.instrumentation import reset_peak_rss, peak_rss_bytes
+
+RESULTS_VERSION = 1
+DEFAULT_RESULTS_DIR = 'benchmarks/results'
+
+
+def measure(stage, func, repeat, resources, input_bytes=None):
+    """Runs func repeat times and returns (stage result dict, value returned by the last run)."""
+    best = None
+    peak = 0
+    value = None
+    for _ in range(repeat):
+        per_run = reset_peak_rss()
+        start = time.perf_counter()
+        value = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+        peak = max(peak, peak_rss_bytes())
+    count = resources(value) if callable(resources) else resources
+    result = {
+        'stage': stage,
+        'seconds': round(best, 6),
+        'resources': count,
+        'resources_per_sec': round(count / best, 1) if best else None,
+        'peak_rss_bytes': peak,
+        'peak_rss_reset': per_run
+    }
+    if input_bytes is not None:
+        result['mb_per_sec'] = round(input_bytes / 1_000_000 / best, 3) if best else None
+    return result, value
+
+
+def count_resources(lists):
+    return sum(awesome_list.resource_count() for awesome_list in lists)
+
+
+def _retained_bytes(path, as_model):
+    """Bytes still allocated once the corpus at path is loaded, as model objects or as dicts."""
+    tracemalloc.start()
+    if as_model:
+        corpus = list(iter_lists(path))
+    else:
+        with open(path, 'r', encoding='utf-8') as f:
+            corpus = json.load(f)
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del corpus
+    return size
+
+
+def corpus_memory(path):
+    """
+    Measures the memory the whole corpus takes as dicts and as model objects.
+    Each load runs in a fresh process, so strings interned by the timed
+    stages are not shared with it.
+    """
+    sizes = {}
+    for key, as_model in (('dict_bytes', False), ('model_bytes', True)):
+        with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as executor:
+            sizes[key] = executor.submit(_retained_bytes, str(path), as_model).result()
+    sizes['reduction'] = round(1 - sizes['model_bytes'] / sizes['dict_bytes'], 3) if sizes['dict_bytes'] else None
+    return sizes
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmark(corpus_dir, readme_paths, engine, repeat):
+    """Times every stage on the READMEs in readme_paths and returns the stage results."""
+    stages = []
+    input_bytes = sum(path.stat().st_size for path in readme_paths)
+
+    result, parsed = measure(
+        'parse_awesome_list',
+        lambda: [parse_awesome_list(path, path.parent.name, engine) for path in readme_paths],
+        repeat, count_resources, input_bytes
+    )
+    # Tag recall: resources whose code spans came out as tags
+    result['tagged_resources'] = sum(bool(resource.tags) for awesome_list in parsed
+                                     for _, resource in awesome_list.iter_resources())
+    stages.append(result)
+
+    # The element-level stages get pre-parsed HTML so only the extraction is timed
+    uls = []
+    tables = []
+    for path in readme_paths:
+        soup = BeautifulSoup(markdown.markdown(path.read_text(encoding='utf-8')), 'html.parser')
+        tables.extend(soup.find_all('table'))
+        uls.extend(soup.find_all('ul'))
+    if uls:
+        result, _ = measure('extract_resources_from_ul',
+                            lambda: [extract_resources_from_ul(ul) for ul in uls],
+                            repeat, lambda value: sum(len(resources) for resources in value))
+        stages.append(result)
+    if tables:
+        result, _ = measure('parse_table',
+                            lambda: [parse_table(table) for table in tables],
+                            repeat, lambda value: sum(len(resources) for resources in value))
+        stages.append(result)
+
+    def filter_resources():
+        # Start from an empty URL cache so every run does the same work
+        check_url.cache_clear()
+        return filter_invalid_resources(parsed)
+
+    result, (filtered, filter_stats) = measure('filter_invalid_resources', filter_resources,
+                                               repeat, count_resources(parsed))
+    result['duplicate_resources'] = filter_stats['duplicate_resources']
+    stages.append(result)
+
+    output_path = Path(corpus_dir) / 'awesome-lists.json'
+
+    def write_json():
+        with open(output_path, 'w', encoding='utf-8') as f:
+            with JsonListWriter(f) as writer:
+                for awesome_list in filtered:
+                    writer.write(awesome_list.to_dict())
+
+    result, _ = measure('json_write', write_json, repeat, count_resources(filtered))
+    result['output_bytes'] = output_path.stat().st_size
+    stages.append(result)
+
+    sqlite_path = Path(corpus_dir) / 'awesome-lists.sqlite'
+
+    def write_sqlite():
+        with SqliteListWriter(sqlite_path) as writer:
+            for awesome_list in filtered:
+                writer.write(awesome_list)
+
+    result, _ = measure('sqlite_write', write_sqlite, repeat, count_resources(filtered))
+    result['output_bytes'] = sqlite_path.stat().st_size
+    stages.append(result)
+
+    result, _ = measure('build_search_index',
+                        lambda: build_search_index(output_path, Path(corpus_dir) / 'search-index'),
+                        repeat, lambda manifest: manifest['total_resources'])
+    stages.append(result)
+    return stages
+
+
+def print_results(results, baseline=None):
+    previous = {stage['stage']: stage for stage in baseline['stages']} if baseline else {}
+    corpus = results['corpus']
+    print(f"Corpus: {corpus['readmes']} READMEs, {corpus['bytes'] / 1_000_000:.2f} MB, {corpus['resources']} resources")
+    header = f"{'stage':<28} {'seconds':>9} {'resources/s':>12} {'peak RSS MB':>12}"
+    if previous:
+        header += f" {'vs baseline':>12}"
+    print(header)
+    for stage in results['stages']:
+        line = (f"{stage['stage']:<28} {stage['seconds']:>9.4f} {stage['resources_per_sec'] or 0:>12.0f} "
+                f"{stage['peak_rss_bytes'] / 1_000_000:>12.1f}")
+        before = previous.get(stage['stage'])
+        if before and before.get('resources_per_sec') and stage['resources_per_sec']:
+            # Throughput ratio, so runs on differently sized corpora still compare;
+            # above 1.0x means this run is faster than the baseline
+            line += f" {stage['resources_per_sec'] / before['resources_per_sec']:>11.2f}x"
+        print(line)
+    memory = results.get('memory')
+    if memory:
+        print(f"\nCorpus in memory: {memory['dict_bytes'] / 1_000_000:.1f} MB as dicts, "
+              f"{memory['model_bytes'] / 1_000_000:.1f} MB as model objects ({memory['reduction']:.0%} less)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the extraction pipeline on synthetic awesome lists')
+    parser.add_argument('--shapes', nargs='+', choices=SHAPES, default=list(SHAPES),
+                        help='README shapes to generate')
+    parser.add_argument('--lists', type=int, default=2, help='Number of READMEs per shape')
+    parser.add_argument('--resources', type=int, default=2000, help='Resources per README')
+    parser.add_argument('--categories', type=int, default=40, help='Headings (or tables) per README')
+    parser.add_argument('--invalid-ratio', type=float, default=DEFAULT_INVALID_RATIO,
+                        help='Share of resources with links the URL filter drops')
+    parser.add_argument('--duplicate-ratio', type=float, default=DEFAULT_DUPLICATE_RATIO,
+                        help='Share of resources repeating a URL of another list')
+    parser.add_argument('--seed', type=int, default=0, help='Seed for the synthetic corpus')
+    parser.add_argument('--engine', choices=ENGINES, default=DEFAULT_ENGINE, help='Markdown extraction engine')
+    parser.add_argument('--repeat', type=int, default=3, help='Timed runs per stage; the best run is reported')
+    parser.add_argument('--corpus-dir', default=None, help='Keep the generated corpus in this directory')
+    parser.add_argument('--output', default=None,
+                        help=f'Results file (default: {DEFAULT_RESULTS_DIR}/pipeline-<timestamp>.json)')
+    parser.add_argument('--compare', default=None, help='Earlier results file to compare against')
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+
+    with tempfile.TemporaryDirectory(prefix='iquantum-bench-') as tmp_dir:
+        corpus_dir = Path(args.corpus_dir or tmp_dir)
+        readme_paths = write_corpus(corpus_dir, args.shapes, args.lists, args.resources, args.categories,
+                                    args.seed, args.invalid_ratio, args.duplicate_ratio)
+        stages = run_benchmark(corpus_dir, readme_paths, args.engine, args.repeat)
+        memory = corpus_memory(corpus_dir / 'awesome-lists.json')
+        corpus = {
+            'readmes': len(readme_paths),
+            'bytes': sum(path.stat().st_size for path in readme_paths),
+            'resources': stages[0]['resources']
+        }
+
+    now = datetime.now(timezone.utc)
+    results = {
+        'version': RESULTS_VERSION,
+        'timestamp': now.isoformat(),
+        'git_commit': _git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'config': {
+            'shapes': args.shapes,
+            'lists': args.lists,
+            'resources': args.resources,
+            'categories': args.categories,
+            'invalid_ratio': args.invalid_ratio,
+            'duplicate_ratio': args.duplicate_ratio,
+            'seed': args.seed,
+            'engine': args.engine,
+            'repeat': args.repeat
+        },
+        'corpus': corpus,
+        'stages': stages,
+        'memory': memory
+    }
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        if baseline.get('config') != results['config']:
+            print(f"Warning: {args.compare} was run with a different configuration")
+    print_results(results, baseline)
+
+    output = args.output or os.path.join(DEFAULT_RESULTS_DIR, f"pipeline-{now.strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults saved to {output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
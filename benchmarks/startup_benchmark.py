@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Guard the startup time of the scripts.
+
+Imports the module of every `python -m scripts` command in a fresh
+interpreter with `python -X importtime` and reports the best cumulative
+import time over --repeat runs, with the slowest modules it pulled in. The
+run fails (exit status 1) when a command's import
+
+- takes longer than --budget-ms,
+- loads one of HEAVY_MODULES, which only the code that needs them imports,
+- or has a side effect: a handler on the root logger or a file written to
+  the working directory (each import runs in an empty temporary directory).
+
+Times depend on the machine; compare runs on the same one.
+"""
+import os
+import sys
+import json
+import argparse
+import tempfile
+import subprocess
+
+# Add the repository root to the path to import our modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.__main__ import COMMANDS
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ('bs4', 'markdown', 'aiohttp', 'asyncio')
+DEFAULT_BUDGET_MS = 250
+DEFAULT_REPEAT = 5
+TOP_IMPORTS = 3
+
+# Exits with the number of root logger handlers the import installed
+_PROBE = "import logging, sys, {module}; sys.exit(len(logging.getLogger().handlers))"
+
+
+def parse_importtime(stderr):
+    """{module: cumulative microseconds} from the output of python -X importtime."""
+    times = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        # import time: <self us> | <cumulative us> | <indented module name>
+        _, cumulative_us, name = line[len('import time:'):].split('|')
+        times[name.strip()] = int(cumulative_us)
+    return times
+
+
+def time_import(module, repeat):
+    """Imports module repeat times in fresh interpreters; returns the result of the fastest run."""
+    env = dict(os.environ, PYTHONPATH=REPO_ROOT)
+    best = None
+    for _ in range(repeat):
+        with tempfile.TemporaryDirectory(prefix='iquantum-startup-') as cwd:
+            process = subprocess.run([sys.executable, '-X', 'importtime', '-c', _PROBE.format(module=module)],
+                                     cwd=cwd, env=env, capture_output=True, text=True)
+            written = sorted(os.listdir(cwd))
+        times = parse_importtime(process.stderr)
+        if module not in times:
+            raise RuntimeError(f"Could not import {module}:\n{process.stderr[-2000:]}")
+        run = {
+            'module': module,
+            'ms': times[module] / 1000,
+            'root_handlers': process.returncode,
+            'written': written,
+            'heavy': sorted(name for name in HEAVY_MODULES if name in times),
+            'top': sorted(((name, us / 1000) for name, us in times.items()
+                           if name != module and not name.startswith('scripts')),
+                          key=lambda item: -item[1])[:TOP_IMPORTS]
+        }
+        if best is None or run['ms'] < best['ms']:
+            best = run
+    return best
+
+
+def check(result, budget_ms):
+    """The reasons result breaks the guard."""
+    problems = []
+    if result['ms'] > budget_ms:
+        problems.append(f"import takes {result['ms']:.0f} ms, over the {budget_ms} ms budget")
+    if result['heavy']:
+        problems.append(f"imports {', '.join(result['heavy'])}")
+    if result['root_handlers']:
+        problems.append(f"adds {result['root_handlers']} root logger handler(s)")
+    if result['written']:
+        problems.append(f"writes {', '.join(result['written'])}")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check the import time and side effects of every command')
+    parser.add_argument('--commands', nargs='+', choices=COMMANDS, default=list(COMMANDS),
+                        help='Commands to check')
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT,
+                        help='Imports per command; the fastest is reported')
+    parser.add_argument('--budget-ms', type=float, default=DEFAULT_BUDGET_MS,
+                        help='Longest acceptable import time of a command in milliseconds')
+    parser.add_argument('--output', default=None, help='Also write the results to this JSON file')
+    args = parser.parse_args()
+
+    modules = [('python -m scripts', 'scripts.__main__')] + [(command, COMMANDS[command][0])
+                                                            for command in args.commands]
+    results = []
+    failed = False
+    print(f"{'command':<18} {'module':<30} {'import ms':>9}  slowest imports")
+    for command, module in modules:
+        result = time_import(module, args.repeat)
+        result['command'] = command
+        result['problems'] = check(result, args.budget_ms)
+        results.append(result)
+        top = ', '.join(f"{name} {ms:.0f}" for name, ms in result['top'])
+        print(f"{command:<18} {module:<30} {result['ms']:>9.1f}  {top}")
+        for problem in result['problems']:
+            failed = True
+            print(f"  FAIL: {problem}")
+
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'budget_ms': args.budget_ms, 'python': sys.version.split()[0], 'results': results}, f, indent=2)
+    print('\nStartup check failed' if failed else '\nStartup check passed')
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
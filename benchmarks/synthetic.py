@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Synthetic awesome list READMEs for the benchmarks.
+
+Generates READMEs in the three shapes extract_data.py handles: resources
+under h2/h3 headings, resources in HTML tables, and a single headerless
+bullet list. Output is deterministic for a given seed, so runs on different
+days measure the same input.
+"""
+import random
+from pathlib import Path
+
+SHAPES = ('headings', 'tables', 'headerless')
+
+DESCRIPTIONS = [
+    'A fast library for building things.',
+    'Command line tool for `json` and `yaml` files.',
+    'Self-hosted service with a web UI. `MIT` `Docker`',
+    'Client for the snake_case API ([docs](https://docs.example.org/api)).',
+    'Framework with **batteries included**.',
+    'Tiny & dependency free utility.',
+    'Bindings for the *native* toolkit. `C++`',
+]
+# Share of resources whose link filter_invalid_resources should drop
+DEFAULT_INVALID_RATIO = 0.02
+# Share of resources linking, in a differently spelled form, to a resource of the previous list
+DEFAULT_DUPLICATE_RATIO = 0.05
+INVALID_URLS = ['#contents', 'mailto:maintainer@example.org', '/relative/path', 'ftp://files.example.org/pkg']
+TABLE_ROWS = 50
+
+
+def _resource(rng, list_index, index, invalid_ratio, duplicate_ratio):
+    name = f"project-{list_index}-{index}"
+    if rng.random() < invalid_ratio:
+        url = rng.choice(INVALID_URLS)
+    elif list_index and rng.random() < duplicate_ratio:
+        url = f"https://GitHub.com/user{index % 97}/project-{list_index - 1}-{index}/?utm_source=awesome"
+    else:
+        url = f"https://github.com/user{index % 97}/{name}"
+    return name, url, rng.choice(DESCRIPTIONS)
+
+
+def _bullets(rng, list_index, start, count, invalid_ratio, duplicate_ratio):
+    lines = []
+    for index in range(start, start + count):
+        name, url, description = _resource(rng, list_index, index, invalid_ratio, duplicate_ratio)
+        lines.append(f"- [{name}]({url}) - {description}")
+    return lines
+
+
+def synthetic_readme(shape='headings', resources=1000, categories=20, seed=0,
+                     list_index=0, invalid_ratio=DEFAULT_INVALID_RATIO, duplicate_ratio=DEFAULT_DUPLICATE_RATIO):
+    """
+    Returns the markdown of a README holding about `resources` resources.
+    `categories` sets how many headings (or tables) they are spread over.
+    """
+    if shape not in SHAPES:
+        raise ValueError(f"Unknown README shape: {shape}")
+    rng = random.Random(f"{seed}-{shape}-{list_index}")
+    categories = max(1, min(categories, resources or 1))
+    per_category = [resources // categories + (1 if i < resources % categories else 0) for i in range(categories)]
+
+    lines = [f"# Awesome Synthetic {shape.title()} {list_index}", '',
+             '> A curated list of generated resources.', '']
+
+    if shape == 'headings':
+        lines += ['## Contents', '']
+        lines += [f"- [Category {i}](#category-{i})" for i in range(categories)]
+        start = 0
+        for i, count in enumerate(per_category):
+            # Every fourth category is a subsection
+            level = '###' if i % 4 == 3 else '##'
+            lines += ['', f"{level} Category {i}", '', f"*Resources for category {i}.*", '']
+            lines += _bullets(rng, list_index, start, count, invalid_ratio, duplicate_ratio)
+            start += count
+        lines += ['', '## License', '', '- [CC0](https://creativecommons.org/publicdomain/zero/1.0/)']
+
+    elif shape == 'tables':
+        start = 0
+        for count in per_category:
+            for offset in range(0, count, TABLE_ROWS):
+                rows = ['<table>', '<tr><th>Name</th><th>Description</th></tr>']
+                for index in range(start + offset, start + min(offset + TABLE_ROWS, count)):
+                    name, url, description = _resource(rng, list_index, index, invalid_ratio,
+                                                       duplicate_ratio)
+                    rows.append(f'<tr><td><a href="{url}">{name}</a></td><td>{description}</td></tr>')
+                rows.append('</table>')
+                lines += rows + ['']
+            start += count
+
+    else:
+        lines += _bullets(rng, list_index, 0, resources, invalid_ratio, duplicate_ratio)
+
+    return '\n'.join(lines) + '\n'
+
+
+def write_corpus(directory, shapes=SHAPES, lists=1, resources=1000, categories=20, seed=0,
+                 invalid_ratio=DEFAULT_INVALID_RATIO, duplicate_ratio=DEFAULT_DUPLICATE_RATIO):
+    """
+    Writes awesome-<shape>-<n>/README.md directories under `directory`, laid
+    out like awesome-lists-sources, and returns their README paths. Lists are
+    numbered across shapes, so only the duplicate_ratio share of URLs repeats.
+    """
+    paths = []
+    for shape_index, shape in enumerate(shapes):
+        for list_index in range(shape_index * lists, (shape_index + 1) * lists):
+            readme_dir = Path(directory) / f"awesome-{shape}-{list_index}"
+            readme_dir.mkdir(parents=True, exist_ok=True)
+            readme_path = readme_dir / 'README.md'
+            readme_path.write_text(
+                synthetic_readme(shape, resources, categories, seed, list_index, invalid_ratio, duplicate_ratio),
+                encoding='utf-8'
+            )
+            paths.append(readme_path)
+    return paths
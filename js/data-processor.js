@@ -5,10 +5,25 @@ class DataProcessor {
         this.processedData = [];
         this.categories = new Set();
         this.listNames = new Set();
+        this.indexPath = 'data/search-index/';
+        this.manifest = null;
     }
 
     async init() {
         try {
+            // Prefer the prebuilt search index: the manifest is enough to
+            // render the filters, and each list's shard is fetched only once
+            // the list is shown, and its Fuse index once it is searched.
+            this.manifest = await this.fetchManifest();
+            if (this.manifest) {
+                return {
+                    resources: [],
+                    shards: this.manifest.lists,
+                    categories: this.manifest.categories,
+                    listNames: this.manifest.lists.map(list => list.name).sort()
+                };
+            }
+
             this.awesomeLists = await this.fetchData();
             this.processData();
             return {
@@ -66,7 +81,70 @@ class DataProcessor {
         return `${name.toLowerCase().replace(/[^a-z0-9]+/g, '-')}-${Math.abs(hash)}`;
     }
 
+    async fetchManifest() {
+        try {
+            const response = await fetch(`${this.indexPath}manifest.json`);
+            if (!response.ok) {
+                return null;
+            }
+            return await response.json();
+        } catch (error) {
+            console.warn('Search index not available, loading full data:', error);
+            return null;
+        }
+    }
+
+    async fetchShard(shard) {
+        const response = await fetch(`${this.indexPath}${shard.file}`);
+        if (!response.ok) {
+            throw new Error(`Failed to fetch ${shard.file}: ${response.statusText}`);
+        }
+        // { list, resources }
+        return await response.json();
+    }
+
+    async fetchIndex(shard) {
+        const response = await fetch(`${this.indexPath}${shard.index}`);
+        if (!response.ok) {
+            throw new Error(`Failed to fetch ${shard.index}: ${response.statusText}`);
+        }
+        // A serialized Fuse index over the shard's resources
+        return await response.json();
+    }
+
+    async fetchArtifactData() {
+        // Artifacts listed in metadata.json are named after their content hash,
+        // so the browser can keep them cached until the name changes.
+        try {
+            const response = await fetch('data/metadata.json', { cache: 'no-cache' });
+            if (!response.ok) {
+                return null;
+            }
+            const metadata = await response.json();
+            const artifact = metadata.artifacts && metadata.artifacts['awesome-lists'];
+            if (!artifact) {
+                return null;
+            }
+            if (artifact.gzip && typeof DecompressionStream !== 'undefined') {
+                const compressed = await fetch(`data/${artifact.gzip.path}`);
+                if (compressed.ok) {
+                    const stream = compressed.body.pipeThrough(new DecompressionStream('gzip'));
+                    return await new Response(stream).json();
+                }
+            }
+            const minified = await fetch(`data/${artifact.json.path}`);
+            return minified.ok ? await minified.json() : null;
+        } catch (error) {
+            console.warn('Data artifacts not available, loading full data:', error);
+            return null;
+        }
+    }
+
     async fetchData() {
+        const artifactData = await this.fetchArtifactData();
+        if (artifactData) {
+            return artifactData;
+        }
         try {
             const response = await fetch('data/awesome-lists.json');
             if (!response.ok) {
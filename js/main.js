@@ -19,7 +19,6 @@ document.addEventListener('DOMContentLoaded', async () => {
     const pageInfoSpan = document.getElementById('page-info');
     
     // State
-    let resources = [];
     let filteredResources = [];
     let categories = [];
     let listNames = [];
@@ -27,36 +26,66 @@ document.addEventListener('DOMContentLoaded', async () => {
     let currentPage = 1;
     let pageSize = 25; // Default page size
     let totalPages = 1;
-    let fuseInstance = null; // Fuse.js instance for fuzzy search
+    let lists = [];           // Manifest entry of each list, with the offset of its first resource
+    let browsing = false;     // Whether filteredResources is the unfiltered corpus, filled in page by page
+    let sorted = false;       // Whether the user picked a sort order since the last reset
+    let viewVersion = 0;      // Bumped by every view change, so a slower earlier one cannot overwrite it
+    const listRecords = new Map(); // List name -> promise of its resources
+    const listSearches = new Map(); // List name -> promise of its Fuse instance
+    
+    // Fuse.js options; the key order must match SEARCH_KEYS in scripts/build_search_index.py
+    const fuseOptions = {
+        // Search in these fields
+        keys: [
+            { name: 'name', weight: 2 },      // Higher weight for name
+            { name: 'description', weight: 1 },
+            { name: 'tags', weight: 1.5 },    // Higher weight for tags
+            { name: 'category', weight: 1 },
+            { name: 'list', weight: 1 }
+        ],
+        // Fuzzy search settings
+        includeScore: true,
+        threshold: 0.4,        // Lower threshold = more strict matching
+        distance: 100,         // How far to search for matching characters
+        minMatchCharLength: 2, // Minimum characters that must match
+        shouldSort: false,     // We'll handle sorting separately
+        useExtendedSearch: true,
+        ignoreLocation: true   // Search the entire string, not just from the beginning
+    };
     
     // Initialize
     try {
         const data = await dataProcessor.init();
-        resources = data.resources;
-        filteredResources = [...resources];
         categories = data.categories;
         listNames = data.listNames;
         
+        if (data.shards) {
+            // Only the manifest is loaded; shards are fetched as lists are shown
+            let offset = 0;
+            lists = data.shards.map(shard => {
+                const entry = { ...shard, offset };
+                offset += shard.count;
+                return entry;
+            });
+        } else {
+            // Without a search index, the full data is one list of everything
+            lists = [{ name: null, count: data.resources.length, categories, offset: 0 }];
+            listRecords.set(null, Promise.resolve(data.resources));
+        }
+        
         // Set initial page size from dropdown
         pageSize = parseInt(pageSizeSelect.value);
         
-        // Initialize Fuse.js for fuzzy search
-        initializeFuseSearch();
-        
         // Populate filter dropdowns
         populateFilterDropdowns();
         
-        // Initial pagination setup
-        updatePagination();
-        
-        // Initial render
-        renderResources();
-        
         // Set up event listeners
         setupEventListeners();
         
         // Load and display last update time
         loadLastUpdateTime();
+        
+        await updateView();
     } catch (error) {
         console.error('Error initializing app:', error);
         resourcesContainer.innerHTML = `
@@ -126,8 +155,7 @@ document.addEventListener('DOMContentLoaded', async () => {
     function changePageSize() {
         pageSize = parseInt(pageSizeSelect.value);
         currentPage = 1; // Reset to first page when changing page size
-        updatePagination();
-        renderResources();
+        showPage();
     }
     
     /**
@@ -136,7 +164,7 @@ document.addEventListener('DOMContentLoaded', async () => {
     function goToPreviousPage() {
         if (currentPage > 1) {
             currentPage--;
-            renderResources();
+            showPage();
         }
     }
     
@@ -146,7 +174,7 @@ document.addEventListener('DOMContentLoaded', async () => {
     function goToNextPage() {
         if (currentPage < totalPages) {
             currentPage++;
-            renderResources();
+            showPage();
         }
     }
     
@@ -165,52 +193,114 @@ document.addEventListener('DOMContentLoaded', async () => {
     }
     
     /**
-     * Initialize Fuse.js for fuzzy search
+     * Fetch the resources of a list, once
+     * @param {Object} list - Manifest entry of the list
+     * @returns {Promise<Array>} - The resources of the list
+     */
+    function loadRecords(list) {
+        if (!listRecords.has(list.name)) {
+            const records = dataProcessor.fetchShard(list).then(data => data.resources);
+            // Let a later view retry a list that failed to load
+            records.catch(() => listRecords.delete(list.name));
+            listRecords.set(list.name, records);
+        }
+        return listRecords.get(list.name);
+    }
+    
+    /**
+     * Fetch the resources and the prebuilt Fuse index of a list, once
+     * @param {Object} list - Manifest entry of the list
+     * @returns {Promise<Object>} - A Fuse instance over the resources of the list
+     */
+    function loadSearch(list) {
+        if (!listSearches.has(list.name)) {
+            const index = list.index ? dataProcessor.fetchIndex(list) : Promise.resolve(null);
+            const search = Promise.all([loadRecords(list), index])
+                .then(([records, fuseIndex]) => createFuse(records, fuseIndex));
+            search.catch(() => listSearches.delete(list.name));
+            listSearches.set(list.name, search);
+        }
+        return listSearches.get(list.name);
+    }
+    
+    /**
+     * Create a Fuse.js instance for the resources of one list
+     * @param {Array} records - The resources of the list
+     * @param {Object|null} index - Serialized Fuse index built by the pipeline
+     * @returns {Object} - The Fuse instance
      */
-    function initializeFuseSearch() {
-        // Configure Fuse.js options
-        const fuseOptions = {
-            // Search in these fields
-            keys: [
-                { name: 'name', weight: 2 },      // Higher weight for name
-                { name: 'description', weight: 1 },
-                { name: 'tags', weight: 1.5 },    // Higher weight for tags
-                { name: 'category', weight: 1 },
-                { name: 'list', weight: 1 }
-            ],
-            // Fuzzy search settings
-            includeScore: true,
-            threshold: 0.4,        // Lower threshold = more strict matching
-            distance: 100,         // How far to search for matching characters
-            minMatchCharLength: 2, // Minimum characters that must match
-            shouldSort: false,     // We'll handle sorting separately
-            useExtendedSearch: true,
-            ignoreLocation: true   // Search the entire string, not just from the beginning
-        };
-        
-        // Create Fuse instance with resources and options
-        fuseInstance = new Fuse(resources, fuseOptions);
+    function createFuse(records, index) {
+        // Only reuse the prebuilt index if it was built for the same keys
+        let fuseIndex;
+        if (index && index.keys.map(key => key.id).join() === fuseOptions.keys.map(key => key.name).join()) {
+            fuseIndex = Fuse.parseIndex(index);
+        }
+        return new Fuse(records, fuseOptions, fuseIndex);
+    }
+    
+    /**
+     * Load something for several lists in parallel, in list order,
+     * skipping the lists that fail to load
+     * @param {Array} selected - Manifest entries of the lists
+     * @param {Function} loader - loadRecords or loadSearch
+     * @returns {Promise<Array>} - What the loader returned for each list that loaded
+     */
+    async function loadLists(selected, loader) {
+        const outcomes = await Promise.allSettled(selected.map(loader));
+        outcomes.forEach((outcome, position) => {
+            if (outcome.status === 'rejected') {
+                console.error(`Error loading ${selected[position].name}:`, outcome.reason);
+            }
+        });
+        const loaded = outcomes.filter(outcome => outcome.status === 'fulfilled').map(outcome => outcome.value);
+        if (loaded.length === 0 && selected.length > 0) {
+            throw new Error('No search index shards could be loaded');
+        }
+        return loaded;
     }
     
     /**
      * Filter resources based on search input and dropdown selections
      */
     function filterResources() {
+        // Reset to first page when filtering
+        currentPage = 1;
+        updateView();
+    }
+    
+    /**
+     * Recompute the filtered resources from the current search, filters and
+     * sort order, fetching only the lists they need, and render them
+     */
+    async function updateView() {
+        const version = ++viewVersion;
         const searchTerm = searchInput.value.trim();
         const selectedCategory = categoryFilter.value;
         const selectedList = listFilter.value;
         
-        // Start with all resources
-        let results = [...resources];
+        // Only the lists that can hold a matching resource are fetched
+        const selected = lists.filter(list =>
+            (selectedList === 'all' || list.name === null || list.name === selectedList) &&
+            (selectedCategory === 'all' || list.categories.includes(selectedCategory)));
         
-        // Apply fuzzy search if there's a search term
+        let results;
         if (searchTerm) {
-            // Use Fuse.js for fuzzy search
-            const searchResults = fuseInstance.search(searchTerm);
-            results = searchResults.map(result => result.item);
+            // Use Fuse.js for fuzzy search; a list's index is fetched the first time it is searched
+            const searches = await loadLists(selected, loadSearch);
+            results = searches.flatMap(fuse => fuse.search(searchTerm).map(result => result.item));
+        } else if (selectedList === 'all' && selectedCategory === 'all' && !sorted) {
+            // Unfiltered: the resources of every list in order, fetched as their pages are shown
+            browsing = true;
+            filteredResources = new Array(lists.reduce((total, list) => total + list.count, 0));
+            await showPage();
+            return;
+        } else {
+            results = (await loadLists(selected, loadRecords)).flat();
         }
+        if (version !== viewVersion) return;
         
         // Apply category and list filters
+        browsing = false;
         filteredResources = results.filter(resource => {
             // Category filter
             const matchesCategory = selectedCategory === 'all' || resource.category === selectedCategory;
@@ -220,10 +310,30 @@ document.addEventListener('DOMContentLoaded', async () => {
             
             return matchesCategory && matchesList;
         });
-        
-        // Reset to first page when filtering
-        currentPage = 1;
-        updatePagination();
+        if (sorted) {
+            sortFilteredResources();
+        }
+        renderResources();
+    }
+    
+    /**
+     * Render the current page, first fetching the lists it shows while browsing
+     */
+    async function showPage() {
+        if (browsing) {
+            const version = viewVersion;
+            const start = (currentPage - 1) * pageSize;
+            const end = start + pageSize;
+            const shown = lists.filter(list => list.offset < end && list.offset + list.count > start);
+            const loaded = await loadLists(shown, list => loadRecords(list).then(
+                resources => ({ list, resources })));
+            if (version !== viewVersion) return;
+            loaded.forEach(({ list, resources }) => {
+                resources.forEach((resource, position) => {
+                    filteredResources[list.offset + position] = resource;
+                });
+            });
+        }
         renderResources();
     }
     
@@ -235,17 +345,16 @@ document.addEventListener('DOMContentLoaded', async () => {
         categoryFilter.value = 'all';
         listFilter.value = 'all';
         sortBySelect.value = 'name';
+        sorted = false;
         
-        filteredResources = [...resources];
         currentPage = 1; // Reset to first page
-        updatePagination();
-        renderResources();
+        updateView();
     }
     
     /**
-     * Sort resources based on the selected sort option
+     * Sort the filtered resources by the selected sort option
      */
-    function sortResources() {
+    function sortFilteredResources() {
         const sortBy = sortBySelect.value;
         
         filteredResources.sort((a, b) => {
@@ -260,11 +369,18 @@ document.addEventListener('DOMContentLoaded', async () => {
                     return 0;
             }
         });
+    }
+    
+    /**
+     * Sort resources based on the selected sort option
+     */
+    function sortResources() {
+        // Sorting the whole corpus needs every list, so it stops the page by page loading
+        sorted = true;
         
         // Reset to first page when sorting
         currentPage = 1;
-        updatePagination();
-        renderResources();
+        updateView();
     }
     
     /**
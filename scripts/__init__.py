@@ -0,0 +1,8 @@
+"""
+Scripts that build the awesome lists data.
+
+Run them as subcommands of one entry point, `python -m scripts <command>`
+(see scripts/__main__.py), or one by one as `python scripts/<name>.py`.
+Importing a module has no side effects: logging is configured by the main()
+that runs, and parsers and network clients are imported when first used.
+"""
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Single entry point for the scripts: python -m scripts <command> [options].
+
+Each command runs the main() of one script with the remaining options, so
+`python -m scripts extract --help` shows the options of extract_data.py.
+Only the module of the chosen command is imported.
+"""
+import sys
+import argparse
+import importlib
+
+# Command: (module, description)
+COMMANDS = {
+    'update': ('scripts.main', 'Sync the sources and run the whole pipeline; --watch keeps it running'),
+    'merge': ('scripts.merge_shards', 'Merge the partial results of update --shard K/N runs'),
+    'discover': ('scripts.discover', 'Find awesome lists linked from the known ones and write the source registry'),
+    'sync': ('scripts.update_awesome_lists', 'Sync the sources, extract the data and update the metadata'),
+    'extract': ('scripts.extract_data', 'Extract the awesome lists from the synced READMEs'),
+    'filter': ('scripts.filter_valid_urls', 'Drop resources with invalid or dead URLs from a corpus'),
+    'index': ('scripts.build_search_index', 'Build the search index for the frontend'),
+    'publish': ('scripts.publish_artifacts', 'Publish minified, compressed and content-addressed artifacts'),
+    'changes': ('scripts.compute_changes', 'Compute the changes between two extractions'),
+    'query': ('scripts.query', 'Search the corpus, or serve searches over HTTP'),
+}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m scripts',
+        description='Build and query the awesome lists data',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog='commands:\n' + '\n'.join(f"  {name:<10}{description}"
+                                         for name, (_, description) in COMMANDS.items()))
+    parser.add_argument('command', choices=COMMANDS, metavar='command', help='One of the commands below')
+    parser.add_argument('options', nargs=argparse.REMAINDER, help='Options of the command (see <command> --help)')
+    args = parser.parse_args(argv)
+
+    module = importlib.import_module(COMMANDS[args.command][0])
+    # The scripts parse sys.argv; argv[0] becomes the program name in their usage
+    sys.argv = [f"{parser.prog} {args.command}", *args.options]
+    return module.main()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Crash-safe file replacement.
+
+Outputs are written to a temporary file next to their destination, flushed
+to disk and renamed over it, so a reader, or the next run after a crash,
+sees either the previous or the new complete file and never a truncated one:
+
+- atomic_write(path) opens the temporary file and moves it into place when
+  the with block succeeds, or removes it when the block raises;
+- replace_file(tmp_path, path) does the final flush and rename for writers
+  that manage their temporary file themselves;
+- snapshot(path, snapshot_path) keeps the current version of a file as a hard
+  link. Since files are only ever replaced by rename and never rewritten in
+  place, the link keeps the old content without copying it;
+- Rollback snapshots the files a run is about to replace and puts them back
+  if the run fails.
+"""
+import os
+import shutil
+import logging
+from contextlib import contextmanager
+
+TMP_SUFFIX = '.tmp'
+ROLLBACK_SUFFIX = '.rollback'
+
+
+def fsync_dir(path):
+    """Flushes a directory entry change (a rename) to disk. A no-op where directories cannot be opened."""
+    try:
+        fd = os.open(path or '.', os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def replace_file(tmp_path, path, durable=True):
+    """
+    Moves the complete file tmp_path over path. With durable, the file's data
+    is flushed to disk before the rename and the rename itself after it, so a
+    crash cannot leave path empty.
+    """
+    if durable:
+        fd = os.open(tmp_path, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+    os.replace(tmp_path, path)
+    if durable:
+        fsync_dir(os.path.dirname(os.fspath(path)))
+
+
+@contextmanager
+def atomic_write(path, mode='w', encoding='utf-8', durable=True):
+    """Opens a temporary file that replaces path when the with block completes without error."""
+    path = os.fspath(path)
+    tmp_path = path + TMP_SUFFIX
+    f = open(tmp_path, mode, encoding=None if 'b' in mode else encoding)
+    try:
+        with f:
+            yield f
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    replace_file(tmp_path, path, durable)
+
+
+def snapshot(path, snapshot_path):
+    """
+    Makes snapshot_path a copy of the current version of path: a hard link
+    when the file system supports it, a copy otherwise. An existing
+    snapshot_path is replaced.
+    """
+    snapshot_path = os.fspath(snapshot_path)
+    tmp_path = snapshot_path + TMP_SUFFIX
+    if os.path.lexists(tmp_path):
+        os.remove(tmp_path)
+    try:
+        os.link(path, tmp_path)
+    except OSError:
+        shutil.copyfile(path, tmp_path)
+    replace_file(tmp_path, snapshot_path)
+
+
+class Rollback:
+    """
+    Remembers the files a run replaces or creates so a failed run can be
+    undone: save(path) before replacing a file, created(path) after creating
+    a new one. restore() puts the saved versions back and removes the created
+    files, discard() drops the snapshots once the run succeeded.
+    """
+
+    def __init__(self):
+        # (path, snapshot path, or None for a file that did not exist before)
+        self._entries = []
+        self._paths = set()
+
+    def save(self, path):
+        path = os.fspath(path)
+        if path in self._paths:
+            return
+        self._paths.add(path)
+        if os.path.exists(path):
+            snapshot_path = path + ROLLBACK_SUFFIX
+            snapshot(path, snapshot_path)
+            self._entries.append((path, snapshot_path))
+        else:
+            self._entries.append((path, None))
+
+    def created(self, path):
+        path = os.fspath(path)
+        if path not in self._paths:
+            self._paths.add(path)
+            self._entries.append((path, None))
+
+    def restore(self):
+        for path, snapshot_path in reversed(self._entries):
+            try:
+                if snapshot_path is not None and os.path.exists(path) and os.path.samefile(snapshot_path, path):
+                    # Never replaced; renaming a hard link over itself does nothing
+                    os.remove(snapshot_path)
+                elif snapshot_path is not None:
+                    replace_file(snapshot_path, path)
+                elif os.path.exists(path):
+                    os.remove(path)
+            except OSError as e:
+                logging.error("Could not roll back %s: %s", path, e)
+        self._entries = []
+        self._paths = set()
+
+    def discard(self):
+        for _, snapshot_path in self._entries:
+            if snapshot_path is not None and os.path.exists(snapshot_path):
+                os.remove(snapshot_path)
+        self._entries = []
+        self._paths = set()
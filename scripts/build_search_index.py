@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+Build the prebuilt search index served to the frontend.
+
+Reads awesome-lists.json one list at a time and writes a search-index
+directory next to it:
+- manifest.json: list names, categories and resource counts, plus the shard
+  and index files of each list. This is all the page needs to render its
+  filters and to know which list holds which page of resources.
+- lists/<slug>.<hash>.json: the flattened resource records of one awesome
+  list. The page fetches it when the list is shown.
+- index/<slug>.<hash>.json: a serialized Fuse.js index over those records,
+  loadable with Fuse.parseIndex. The page fetches it only when the list is
+  searched, so browsing never downloads an index.
+
+The hash is taken from each file's content, so they can be cached
+permanently and only the manifest has to be revalidated.
+
+Records are flattened and given IDs exactly as js/data-processor.js does, so
+the page no longer has to hash every resource or index the whole corpus on
+load.
+"""
+import os
+import re
+import sys
+import json
+import hashlib
+import math
+import argparse
+import logging
+from pathlib import Path
+
+# Add the repository root to the path to import our modules when run as a script
+if not __package__:
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.storage import iter_lists
+from scripts.atomic import atomic_write
+from scripts.log_setup import configure_logging, add_logging_arguments
+
+INDEX_VERSION = 2
+INDEX_DIR_NAME = 'search-index'
+SHARD_HASH_LENGTH = 12
+
+# Must match the keys passed to Fuse in js/main.js, in the same order
+SEARCH_KEYS = [
+    {'name': 'name', 'weight': 2},
+    {'name': 'description', 'weight': 1},
+    {'name': 'tags', 'weight': 1.5},
+    {'name': 'category', 'weight': 1},
+    {'name': 'list', 'weight': 1}
+]
+
+# Fuse.js counts the tokens of a field by splitting on spaces only
+FUSE_TOKEN_RE = re.compile(r'[^ ]+')
+SLUG_RE = re.compile(r'[^a-z0-9]+')
+
+
+def js_sort_key(value):
+    """Sort key matching JavaScript's default string sort (UTF-16 code units)."""
+    return value.encode('utf-16-be')
+
+
+def generate_id(name, url):
+    """Port of DataProcessor.generateId: a 32-bit string hash over UTF-16 code units."""
+    data = (name + url).encode('utf-16-le')
+    hash_value = 0
+    for i in range(0, len(data), 2):
+        code_unit = data[i] | (data[i + 1] << 8)
+        hash_value = ((hash_value << 5) - hash_value + code_unit) & 0xFFFFFFFF
+    if hash_value >= 0x80000000:
+        hash_value = 0x100000000 - hash_value
+    return f"{SLUG_RE.sub('-', name.lower())}-{hash_value}"
+
+
+def flatten_list(awesome_list):
+    """
+    Flattens one awesome list into resource records, skipping the same
+    incomplete entries DataProcessor.processData skips.
+    """
+    records = []
+    categories = []
+    for category in awesome_list.categories:
+        if not category.name:
+            logging.warning("Category missing required fields in %s", awesome_list.name)
+            continue
+        categories.append(category.name)
+        for resource in category.resources:
+            if not resource.name or not resource.url:
+                continue
+            records.append({
+                'id': generate_id(resource.name, resource.url),
+                'name': resource.name,
+                'description': resource.description or '',
+                'url': resource.url,
+                'category': category.name,
+                'list': awesome_list.name,
+                'tags': list(resource.tags)
+            })
+    return records, categories
+
+
+def _field_norm(value, cache):
+    """Fuse.js field-length norm: 1 / sqrt(token count), rounded to three decimals."""
+    tokens = len(FUSE_TOKEN_RE.findall(value))
+    if tokens not in cache:
+        # Math.round rounds halves up, unlike Python's round()
+        norm = math.floor(1 / math.sqrt(tokens) * 1000 + 0.5) / 1000
+        cache[tokens] = int(norm) if norm.is_integer() else norm
+    return cache[tokens]
+
+
+def build_fuse_index(records, keys=SEARCH_KEYS):
+    """
+    Returns the same structure as Fuse.createIndex(keys, records).toJSON()
+    in Fuse.js 6.x.
+    """
+    index_keys = [
+        {'path': key['name'].split('.'), 'id': key['name'], 'weight': key['weight'], 'src': key['name']}
+        for key in keys
+    ]
+    norms = {}
+    index_records = []
+    for doc_index, record in enumerate(records):
+        fields = {}
+        for key_index, key in enumerate(keys):
+            value = record.get(key['name'])
+            if isinstance(value, list):
+                # Fuse walks arrays with a stack, so entries come out in reverse
+                fields[str(key_index)] = [
+                    {'v': item, 'i': item_index, 'n': _field_norm(item, norms)}
+                    for item_index, item in reversed(list(enumerate(value)))
+                    if isinstance(item, str) and item.strip()
+                ]
+            elif isinstance(value, str) and value.strip():
+                fields[str(key_index)] = {'v': value, 'n': _field_norm(value, norms)}
+        index_records.append({'i': doc_index, '$': fields})
+    return {'keys': index_keys, 'records': index_records}
+
+
+def _shard_slug(list_name, used):
+    slug = SLUG_RE.sub('-', list_name.lower()).strip('-') or 'list'
+    name = slug
+    suffix = 2
+    while name in used:
+        name = f"{slug}-{suffix}"
+        suffix += 1
+    used.add(name)
+    return name
+
+
+def _write_content_addressed(directory, slug, data):
+    """
+    Writes data to directory/<slug>.<hash>.json unless it is there already,
+    and returns the file name and whether it was written.
+    """
+    content = json.dumps(data, separators=(',', ':')).encode('utf-8')
+    digest = hashlib.sha256(content).hexdigest()[:SHARD_HASH_LENGTH]
+    file_name = f"{slug}.{digest}.json"
+    path = directory / file_name
+    if path.exists():
+        return file_name, False
+    with atomic_write(path, 'wb') as f:
+        f.write(content)
+    return file_name, True
+
+
+class SearchIndexWriter:
+    """
+    Builds the search index one awesome list at a time: write() stores the
+    list's shard and Fuse index, close() writes the manifest and prune()
+    removes the files it no longer references. created lists the shards and
+    indexes that were not there before, which a failed run removes again.
+    """
+
+    def __init__(self, index_dir):
+        self.index_dir = Path(index_dir)
+        self.shard_dir = self.index_dir / 'lists'
+        self.fuse_dir = self.index_dir / 'index'
+        self.manifest_path = self.index_dir / 'manifest.json'
+        self.shard_dir.mkdir(parents=True, exist_ok=True)
+        self.fuse_dir.mkdir(parents=True, exist_ok=True)
+        self.lists = []
+        self.categories = set()
+        self.total = 0
+        self._used_slugs = set()
+        self._files = {self.shard_dir: set(), self.fuse_dir: set()}
+        self.created = []
+
+    def write(self, awesome_list):
+        if not awesome_list.name:
+            logging.warning("List data missing required fields")
+            return
+        records, categories = flatten_list(awesome_list)
+        slug = _shard_slug(awesome_list.name, self._used_slugs)
+        shard_file, shard_written = _write_content_addressed(self.shard_dir, slug,
+                                                            {'list': awesome_list.name, 'resources': records})
+        fuse_file, fuse_written = _write_content_addressed(self.fuse_dir, slug, build_fuse_index(records))
+        self._files[self.shard_dir].add(shard_file)
+        self._files[self.fuse_dir].add(fuse_file)
+        if shard_written:
+            self.created.append(self.shard_dir / shard_file)
+        if fuse_written:
+            self.created.append(self.fuse_dir / fuse_file)
+
+        self.lists.append({
+            'name': awesome_list.name,
+            'file': f"lists/{shard_file}",
+            'index': f"index/{fuse_file}",
+            'count': len(records),
+            'categories': sorted(set(categories), key=js_sort_key)
+        })
+        self.categories.update(categories)
+        self.total += len(records)
+
+    def close(self):
+        """Writes the manifest and returns it."""
+        manifest = {
+            'version': INDEX_VERSION,
+            'keys': SEARCH_KEYS,
+            'total_resources': self.total,
+            'categories': sorted(self.categories, key=js_sort_key),
+            'lists': self.lists
+        }
+        with atomic_write(self.manifest_path) as f:
+            json.dump(manifest, f, indent=2)
+        logging.info(f"Wrote search index for {len(self.lists)} lists ({self.total} resources) to {self.index_dir}")
+        return manifest
+
+    def prune(self):
+        """
+        Removes the shards and indexes the new manifest does not reference.
+        Called only once the manifest is in place, and in the pipeline once
+        the whole run succeeded, so the manifest a reader holds, or a rolled
+        back one, never points at a removed file.
+        """
+        for directory, referenced in self._files.items():
+            for stale in directory.glob('*.json'):
+                if stale.name not in referenced:
+                    stale.unlink()
+
+
+def build_search_index(input_path, index_dir):
+    """
+    Writes the manifest and per-list shards for input_path into index_dir and
+    returns the manifest. Shards no longer referenced by the manifest are removed.
+    """
+    writer = SearchIndexWriter(index_dir)
+    for awesome_list in iter_lists(input_path):
+        writer.write(awesome_list)
+    manifest = writer.close()
+    writer.prune()
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build the prebuilt search index for the frontend')
+    parser.add_argument('--input', default='data/awesome-lists.json', help='Extracted awesome lists (.json or .sqlite)')
+    parser.add_argument('--output-dir', default=None,
+                        help=f'Directory for the index (default: {INDEX_DIR_NAME}/ next to the input file)')
+    add_logging_arguments(parser)
+    args = parser.parse_args()
+    configure_logging('search_index', args.log_level, console=True)
+
+    output_dir = args.output_dir or os.path.join(os.path.dirname(args.input) or '.', INDEX_DIR_NAME)
+    try:
+        build_search_index(args.input, output_dir)
+    except Exception as e:
+        logging.error("Error building search index: %s", e, exc_info=True)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
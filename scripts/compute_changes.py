@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Compute the changes between two extractions of awesome-lists.json.
+
+Resources are keyed by list, category and URL. A resource whose key only
+exists in the new output is added, one whose key only exists in the old
+output is removed, and one whose name, description or tags changed is
+modified. The result is written to changes-<date>.json next to the data so
+consumers holding the previous version can apply it instead of downloading
+the whole corpus again.
+"""
+import os
+import re
+import sys
+import json
+import argparse
+import logging
+from collections import defaultdict
+from datetime import datetime, timezone
+from pathlib import Path
+
+# Add the repository root to the path to import our modules when run as a script
+if not __package__:
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.storage import iter_lists
+from scripts.atomic import atomic_write
+from scripts.log_setup import configure_logging, add_logging_arguments
+
+CHANGES_VERSION = 1
+# Number of changes files kept next to the data
+CHANGES_RETENTION = 30
+CHANGES_FILE_RE = re.compile(r'^changes-(\d{4}-\d{2}-\d{2})(?:-(\d+))?\.json$')
+
+
+def iter_resources(path):
+    """Yields (list name, category name, resource) for every resource in a stored corpus."""
+    for awesome_list in iter_lists(path):
+        for category, resource in awesome_list.iter_resources():
+            yield awesome_list.name, category.name, resource
+
+
+def _changed_fields(old, new):
+    fields = [key for key in ('name', 'description', 'tags') if getattr(old, key) != getattr(new, key)]
+    old_extra = old.extra or {}
+    new_extra = new.extra or {}
+    fields.extend(key for key in old_extra.keys() | new_extra.keys() if old_extra.get(key) != new_extra.get(key))
+    return sorted(fields)
+
+
+class ResourceDiff:
+    """
+    Diffs a new extraction, fed one awesome list at a time with add(), against
+    an old awesome-lists.json file. Only the old file is indexed in memory. A
+    URL listed twice in the same category is matched occurrence by occurrence.
+    """
+
+    def __init__(self, old_path):
+        self.old_resources = defaultdict(list)
+        self.old_lists = set()
+        for list_name, category_name, resource in iter_resources(old_path):
+            self.old_lists.add(list_name)
+            self.old_resources[(list_name, category_name, resource.url)].append(resource)
+        for occurrences in self.old_resources.values():
+            occurrences.reverse()
+        self.new_lists = set()
+        self.added = []
+        self.modified = []
+
+    def add(self, awesome_list):
+        list_name = awesome_list.name
+        self.new_lists.add(list_name)
+        for category, resource in awesome_list.iter_resources():
+            self._add_resource(list_name, category.name, resource)
+
+    def _add_resource(self, list_name, category_name, resource):
+        key = (list_name, category_name, resource.url)
+        occurrences = self.old_resources.get(key)
+        if not occurrences:
+            self.added.append({'list': list_name, 'category': category_name, 'resource': resource.to_dict()})
+            return
+        old = occurrences.pop()
+        fields = _changed_fields(old, resource)
+        if fields:
+            self.modified.append({
+                'list': list_name,
+                'category': category_name,
+                'url': resource.url,
+                'fields': fields,
+                'resource': resource.to_dict()
+            })
+
+    def result(self):
+        """Returns the added, removed and modified resources once every new list was added."""
+        removed = [
+            {'list': list_name, 'category': category_name, 'url': url}
+            for (list_name, category_name, url), occurrences in self.old_resources.items()
+            for _ in occurrences
+        ]
+        return {
+            'lists_added': sorted(self.new_lists - self.old_lists),
+            'lists_removed': sorted(self.old_lists - self.new_lists),
+            'added': self.added,
+            'removed': removed,
+            'modified': self.modified
+        }
+
+
+def diff_extractions(old_path, new_path):
+    """Returns the added, removed and modified resources between two stored corpora, in either format."""
+    diff = ResourceDiff(old_path)
+    for awesome_list in iter_lists(new_path):
+        diff.add(awesome_list)
+    return diff.result()
+
+
+def summarize(changes):
+    return {
+        'added': len(changes['added']),
+        'removed': len(changes['removed']),
+        'modified': len(changes['modified']),
+        'lists_added': len(changes['lists_added']),
+        'lists_removed': len(changes['lists_removed'])
+    }
+
+
+def _changes_path(output_dir, date):
+    path = output_dir / f"changes-{date}.json"
+    suffix = 2
+    while path.exists():
+        path = output_dir / f"changes-{date}-{suffix}.json"
+        suffix += 1
+    return path
+
+
+def prune_changes(output_dir, keep=CHANGES_RETENTION):
+    """Removes all but the newest keep changes files."""
+    found = []
+    for path in Path(output_dir).iterdir():
+        match = CHANGES_FILE_RE.match(path.name)
+        if match:
+            found.append(((match.group(1), int(match.group(2) or 1)), path))
+    found.sort()
+    for _, path in found[:max(len(found) - keep, 0)]:
+        path.unlink()
+        logging.info(f"Removed old changes file {path.name}")
+
+
+def save_changes(changes, output_dir, base=None, target=None):
+    """
+    Writes changes-<date>.json into output_dir if anything changed. base and
+    target identify the two versions (the SHA-256 of the published data) so
+    a consumer can check that a delta applies to the version it holds.
+    Returns the summary for metadata.json, with the file name under "path"
+    when one was written.
+    """
+    output_dir = Path(output_dir)
+    summary = summarize(changes)
+    date = datetime.now(timezone.utc).strftime('%Y-%m-%d')
+    summary.update({'date': date, 'from': base, 'to': target, 'path': None})
+
+    if not any(summary[key] for key in ('added', 'removed', 'modified', 'lists_added', 'lists_removed')):
+        logging.info("No resources changed since the previous extraction")
+        return summary
+
+    path = _changes_path(output_dir, date)
+    with atomic_write(path) as f:
+        json.dump({
+            'version': CHANGES_VERSION,
+            'date': date,
+            'from': base,
+            'to': target,
+            **changes
+        }, f, indent=2)
+    summary['path'] = path.name
+    logging.info(f"Wrote {path.name}: {summary['added']} added, {summary['removed']} removed, "
+                 f"{summary['modified']} modified")
+
+    prune_changes(output_dir)
+    return summary
+
+
+def write_changes(old_path, new_path, output_dir, base=None, target=None):
+    """Diffs two extractions and saves the changes with save_changes."""
+    return save_changes(diff_extractions(old_path, new_path), output_dir, base, target)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compute the changes between two awesome lists extractions')
+    parser.add_argument('--old', required=True, help='Previous awesome-lists.json')
+    parser.add_argument('--new', default='data/awesome-lists.json', help='Current awesome-lists.json')
+    parser.add_argument('--output-dir', default='data', help='Directory for the changes file')
+    add_logging_arguments(parser)
+    args = parser.parse_args()
+    configure_logging('changes', args.log_level, console=True)
+
+    try:
+        summary = write_changes(args.old, args.new, args.output_dir)
+        print(json.dumps(summary, indent=2))
+    except Exception as e:
+        logging.error("Error computing changes: %s", e, exc_info=True)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
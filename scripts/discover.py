@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""
+Discover awesome lists by following the links of known ones.
+
+Starting from seed repositories (AWESOME_REPOS, or the seeds recorded in
+the current source registry), the crawler parses each list's README with
+parse_awesome_list and follows resources that link to another GitHub
+repository named awesome-*, breadth first, up to --max-depth links away from
+a seed and --max-lists lists in total. Every level is fetched concurrently. Lists at the last
+depth are only checked to exist, not fetched, since their links would lead
+deeper.
+
+Before a README is fetched, the remote HEAD is asked for with one
+`git ls-remote` round trip. A list whose HEAD matches the visit cache
+(.discovery-cache.json next to the data) reuses the links found last time
+without any download. A list already synced into the source directory at
+that commit is parsed from there, through the extraction cache. Everything
+else is fetched README-only into a temporary directory.
+
+The result is the source registry, sources.json next to the data, which the
+sync step reads instead of AWESOME_REPOS. A discovered list whose directory
+name is already taken by another owner's list is skipped, since both would
+be synced to the same directory.
+"""
+import os
+import re
+import sys
+import json
+import time
+import logging
+import argparse
+import tempfile
+from pathlib import Path
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+# Add the repository root to the path to import our modules when run as a script
+if not __package__:
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.update_awesome_lists import (
+    clone_or_update_repo,
+    remote_head,
+    local_head,
+    AWESOME_REPOS,
+    DEFAULT_JOBS,
+    FETCH_MODES,
+    SOURCES_FILE_NAME,
+    SOURCES_VERSION
+)
+from scripts.extract_data import (
+    parse_awesome_list,
+    load_awesome_list,
+    list_name_of,
+    ENGINES,
+    DEFAULT_ENGINE,
+    LIST_DIR_PREFIX
+)
+from scripts.shards import repo_key
+from scripts.atomic import atomic_write
+from scripts.log_setup import configure_logging, add_logging_arguments
+
+DISCOVERY_CACHE_VERSION = 1
+DISCOVERY_CACHE_NAME = '.discovery-cache.json'
+# Visits not repeated for this long are dropped from the cache file
+CACHE_RETENTION = 90 * 86400
+
+DEFAULT_MAX_DEPTH = 1
+DEFAULT_MAX_LISTS = 200
+DEFAULT_FETCH_MODE = 'readme'
+DEFAULT_TIMEOUT = 60.0
+
+# The root of a GitHub repository, optionally with .git, a trailing slash, a query or a fragment
+GITHUB_REPO_RE = re.compile(r'https?://(?:www\.)?github\.com/([\w.-]+)/([\w.-]+?)(?:\.git)?/?(?:[?#].*)?',
+                            re.IGNORECASE)
+
+
+def list_repo_url(url):
+    """The canonical URL of the awesome list repository url points at, or None if it does not point at one."""
+    match = GITHUB_REPO_RE.fullmatch(url) if isinstance(url, str) else None
+    if match is None or not match.group(2).startswith(LIST_DIR_PREFIX):
+        return None
+    return f"https://github.com/{match.group(1)}/{match.group(2)}"
+
+
+def _visit_key(url):
+    # GitHub owner and repository names are case-insensitive
+    return url.lower().rstrip('/')
+
+
+class DiscoveryCache:
+    """Remote HEAD and outgoing list links by repository URL, loaded from and saved to a JSON file."""
+
+    def __init__(self, path):
+        self.path = path
+        self.entries = {}
+        if not path or not os.path.exists(path):
+            return
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == DISCOVERY_CACHE_VERSION:
+                self.entries = data.get('entries', {})
+        except (OSError, ValueError) as e:
+            logging.warning("Ignoring unreadable discovery cache %s: %s", path, e)
+
+    def get(self, url, head):
+        """Returns the cached visit of url if it was made at commit head, else None."""
+        entry = self.entries.get(_visit_key(url))
+        if entry is None or entry['head'] != head:
+            return None
+        return entry
+
+    def put(self, url, head, links, resources, now=None):
+        self.entries[_visit_key(url)] = {
+            'head': head,
+            'links': links,
+            'resources': resources,
+            'visited': time.time() if now is None else now
+        }
+
+    def touch(self, url, now=None):
+        self.entries[_visit_key(url)]['visited'] = time.time() if now is None else now
+
+    def save(self, now=None):
+        """Writes the cache, dropping entries not visited for CACHE_RETENTION."""
+        if not self.path:
+            return
+        now = time.time() if now is None else now
+        entries = {key: entry for key, entry in self.entries.items() if entry['visited'] > now - CACHE_RETENTION}
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        with atomic_write(self.path) as f:
+            json.dump({'version': DISCOVERY_CACHE_VERSION, 'entries': entries}, f, separators=(',', ':'))
+
+
+class Crawler:
+    """
+    Breadth-first discovery from seed repositories. run() returns the
+    registry entries in discovery order; counters are kept in stats.
+    """
+
+    def __init__(self, cache, max_depth=DEFAULT_MAX_DEPTH, max_lists=DEFAULT_MAX_LISTS, jobs=DEFAULT_JOBS,
+                 timeout=DEFAULT_TIMEOUT, fetch_mode=DEFAULT_FETCH_MODE, engine=DEFAULT_ENGINE,
+                 source_dir=None, cache_dir=None):
+        self.cache = cache
+        self.max_depth = max_depth
+        self.max_lists = max_lists
+        self.jobs = max(1, jobs)
+        self.timeout = timeout
+        self.fetch_mode = fetch_mode
+        self.engine = engine
+        self.source_dir = Path(source_dir) if source_dir else None
+        self.cache_dir = cache_dir
+        self.stats = Counter()
+
+    def run(self, seeds):
+        registry = []
+        visited = set()
+        # Directory name -> repository synced to it
+        directories = {}
+        frontier = [(list_repo_url(url) or url, None) for url in seeds]
+        depth = 0
+        with ThreadPoolExecutor(max_workers=self.jobs) as executor:
+            while frontier:
+                level = []
+                for url, found_in in frontier:
+                    key = _visit_key(url)
+                    if key in visited:
+                        continue
+                    visited.add(key)
+                    directory = repo_key(url)
+                    if directory in directories:
+                        logging.info(f"Skipping {url}: {directories[directory]} is already synced to {directory}")
+                        self.stats['name_clashes'] += 1
+                        continue
+                    if len(registry) + len(level) >= self.max_lists:
+                        self.stats['over_limit'] += 1
+                        continue
+                    directories[directory] = url
+                    level.append({'url': url, 'depth': depth, 'found_in': found_in})
+
+                follow = depth < self.max_depth
+                frontier = []
+                visits = executor.map(lambda entry: self._visit(entry['url'], follow), level)
+                for entry, (head, links, resources, outcome) in zip(level, visits):
+                    self.stats[outcome] += 1
+                    if head is None:
+                        # Unreachable or not a repository; a seed is kept so a transient failure does not drop it
+                        if entry['depth'] > 0:
+                            continue
+                    if resources is not None:
+                        entry['resources'] = resources
+                    registry.append(entry)
+                    frontier.extend((link, entry['url']) for link in links or ())
+                logging.info(f"Depth {depth}: {len(level)} lists checked, {len(frontier)} links to follow")
+                if not follow:
+                    break
+                depth += 1
+        self.stats['lists'] = len(registry)
+        return registry
+
+    def _visit(self, url, follow):
+        """
+        Returns (remote HEAD, list links or None, resource count or None, outcome)
+        for one repository. Runs on a worker thread; run() counts the outcomes.
+        """
+        head = remote_head(url, timeout=self.timeout)
+        if head is None:
+            return None, None, None, 'unreachable'
+        if not follow:
+            return head, None, None, 'checked'
+        cached = self.cache.get(url, head)
+        if cached is not None:
+            self.cache.touch(url)
+            return head, cached['links'], cached['resources'], 'cached'
+        try:
+            awesome_list, outcome = self._parse(url, head)
+        except Exception as e:
+            logging.error("Could not read the README of %s: %s", url, e)
+            return head, None, None, 'failed'
+        links = list(dict.fromkeys(
+            link for _, resource in awesome_list.iter_resources()
+            if (link := list_repo_url(resource.url)) is not None
+        ))
+        resources = awesome_list.resource_count()
+        self.cache.put(url, head, links, resources)
+        return head, links, resources, outcome
+
+    def _parse(self, url, head):
+        """Parses the README of url at commit head; returns the list and where it was read from."""
+        directory = repo_key(url)
+        list_name = list_name_of(directory)
+        if self.source_dir is not None:
+            synced = self.source_dir / directory
+            if (synced / 'README.md').exists() and local_head(synced) == head:
+                return load_awesome_list(synced / 'README.md', list_name, self.cache_dir, self.engine)[0], 'synced'
+        with tempfile.TemporaryDirectory(prefix='iquantum-discover-') as tmp_dir:
+            if not clone_or_update_repo(url, tmp_dir, timeout=self.timeout, fetch_mode=self.fetch_mode):
+                raise RuntimeError('fetch failed')
+            readme_path = Path(tmp_dir) / directory / 'README.md'
+            if not readme_path.exists():
+                raise RuntimeError('no README.md')
+            return parse_awesome_list(readme_path, list_name, self.engine), 'fetched'
+
+
+def load_seeds(output_dir):
+    """The seeds of the current source registry, or AWESOME_REPOS without one."""
+    try:
+        with open(os.path.join(output_dir, SOURCES_FILE_NAME), 'r', encoding='utf-8') as f:
+            return json.load(f)['seeds']
+    except FileNotFoundError:
+        return AWESOME_REPOS
+    except (OSError, ValueError, KeyError) as e:
+        logging.error("Error reading the seeds of the source registry, starting from the built-in list: %s", e)
+        return AWESOME_REPOS
+
+
+def save_sources(registry, output_dir, seeds, max_depth):
+    """Writes the source registry the sync step reads. Returns its path."""
+    sources_path = os.path.join(output_dir, SOURCES_FILE_NAME)
+    os.makedirs(output_dir, exist_ok=True)
+    with atomic_write(sources_path) as f:
+        json.dump({
+            'version': SOURCES_VERSION,
+            'seeds': seeds,
+            'max_depth': max_depth,
+            'repos': registry
+        }, f, indent=2)
+    return sources_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Discover awesome lists linked from the known ones')
+    parser.add_argument('--output-dir', default='data', help='Directory for the source registry and cache')
+    parser.add_argument('--seeds', nargs='+', default=None,
+                        help='Repositories to start from (default: the seeds of the current source registry, '
+                             'or the built-in list)')
+    parser.add_argument('--max-depth', type=int, default=DEFAULT_MAX_DEPTH,
+                        help='Follow links up to this many lists away from a seed')
+    parser.add_argument('--max-lists', type=int, default=DEFAULT_MAX_LISTS,
+                        help='Stop adding lists to the registry at this many, seeds included')
+    parser.add_argument('--jobs', type=int, default=DEFAULT_JOBS, help='Number of repositories fetched concurrently')
+    parser.add_argument('--timeout', type=float, default=DEFAULT_TIMEOUT, help='Per-repository timeout in seconds')
+    parser.add_argument('--fetch-mode', choices=FETCH_MODES, default=DEFAULT_FETCH_MODE,
+                        help='How to fetch the README of a list that is not synced')
+    parser.add_argument('--engine', choices=ENGINES, default=DEFAULT_ENGINE, help='Markdown extraction engine')
+    parser.add_argument('--source-dir', default='awesome-lists-sources',
+                        help='Synced repositories, parsed in place when they are at the remote HEAD')
+    parser.add_argument('--cache', default=None,
+                        help=f'Visit cache (default: {DISCOVERY_CACHE_NAME} next to the data)')
+    parser.add_argument('--dry-run', action='store_true', help='Print the registry instead of writing it')
+    add_logging_arguments(parser)
+    args = parser.parse_args()
+
+    configure_logging('discover', args.log_level, console=True)
+    seeds = args.seeds or load_seeds(args.output_dir)
+    cache = DiscoveryCache(args.cache or os.path.join(args.output_dir, DISCOVERY_CACHE_NAME))
+    crawler = Crawler(cache, max_depth=args.max_depth, max_lists=args.max_lists, jobs=args.jobs,
+                      timeout=args.timeout, fetch_mode=args.fetch_mode, engine=args.engine,
+                      source_dir=args.source_dir,
+                      cache_dir=os.path.join(args.output_dir, '.extract-cache'))
+
+    start_time = time.time()
+    try:
+        registry = crawler.run(seeds)
+    finally:
+        cache.save()
+    stats = crawler.stats
+    print(f"\nFound {stats['lists']} lists from {len(seeds)} seeds in {time.time() - start_time:.2f} seconds")
+    print(f"Fetched {stats['fetched']}, parsed {stats['synced']} synced and reused {stats['cached']} "
+          f"cached READMEs; {stats['unreachable']} unreachable, {stats['failed']} unreadable")
+    if stats['name_clashes']:
+        print(f"Skipped {stats['name_clashes']} lists named like a list of another owner")
+    if stats['over_limit']:
+        print(f"Left out {stats['over_limit']} lists over --max-lists {args.max_lists}")
+    if args.dry_run:
+        print(json.dumps(registry, indent=2))
+        return 0
+    sources_path = save_sources(registry, args.output_dir, seeds, args.max_depth)
+    print(f"Source registry saved to {sources_path}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,48 +1,119 @@
 #!/usr/bin/env python3
 import os
-import re
 import json
+import hashlib
 import logging
 import argparse
+import sys
+import time
 from pathlib import Path
-from urllib.parse import urlparse
-import markdown   # type: ignore
-from bs4 import BeautifulSoup  # type: ignore # Requires: pip install beautifulsoup4
-
-# Ensure logs directory exists
-os.makedirs('logs', exist_ok=True)
-
-# Configure logging to record debug info to a log file.
-logging.basicConfig(
-    filename='logs/extraction.log',
-    level=logging.DEBUG,
-    format='%(asctime)s %(levelname)s: %(message)s'
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+# Add the repository root to the path to import our modules when run as a script
+if not __package__:
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.fast_parser import extract_categories, resource_tags, UnsupportedMarkdown
+from scripts.model import AwesomeList, Category, Resource
+from scripts.storage import open_list_writer
+from scripts.atomic import atomic_write
+from scripts.urls import UrlFilter, is_valid_url
+from scripts.instrumentation import add_instrumentation_arguments, open_run_report
+from scripts.log_setup import (
+    configure_logging,
+    add_logging_arguments,
+    worker_logging_config,
+    init_worker_logging
 )
 
 # Common headings to ignore as categories.
 IGNORED_CATEGORIES = set(['contents', 'contributing', 'license'])
 
-def extract_resources_from_ul(ul):
-    """Extracts resource objects from a <ul> element."""
+# Bump whenever a change to the parser alters its output, so cached results
+# produced by an older parser are not reused.
+PARSER_VERSION = 2
+
+# Extraction engines: 'bs4' renders markdown to HTML and walks it with
+# BeautifulSoup; 'fast' works on the markdown block tree directly and falls
+# back to 'bs4' for documents it cannot parse identically.
+ENGINES = ('bs4', 'fast')
+DEFAULT_ENGINE = 'bs4'
+
+DEFAULT_CACHE_DIR = 'data/.extract-cache'
+
+# Only source directories named like this are extracted
+LIST_DIR_PREFIX = 'awesome-'
+
+class _ItemText:
+    """
+    The text of an element gathered in one walk over its tree: the stripped
+    text nodes (what get_text(separator=' ', strip=True) joins), the first
+    link and its text (what find('a') and get_text() return), and the text of
+    each <code> element outside that link, which markdown renders from
+    backtick code spans.
+    """
+
+    __slots__ = ('nodes', 'link', 'link_nodes', 'code')
+
+    def __init__(self, element):
+        self.nodes = []
+        self.link = None
+        self.link_nodes = []
+        self.code = []
+        self._walk(element, element.interesting_string_types, False, None)
+
+    def _walk(self, element, types, in_link, code):
+        for child in element.contents:
+            # Text nodes (NavigableString) are the only str children
+            if isinstance(child, str):
+                if type(child) not in types:
+                    continue
+                if in_link:
+                    self.link_nodes.append(child)
+                elif code is not None:
+                    code.append(child)
+                stripped = child.strip()
+                if stripped:
+                    self.nodes.append(stripped)
+            elif child.name == 'a' and self.link is None:
+                self.link = child
+                self._walk(child, types, True, None)
+            elif child.name == 'code' and not in_link and code is None:
+                code = []
+                self._walk(child, types, in_link, code)
+                self.code.append(''.join(code).strip())
+                code = None
+            else:
+                self._walk(child, types, in_link, code)
+
+    @property
+    def name(self):
+        return ''.join(self.link_nodes).strip()
+
+    @property
+    def url(self):
+        return self.link.get('href', '').strip()
+
+def extract_resources_from_ul(ul, counts=None):
+    """
+    Extracts resource objects from a <ul> element. Items without a link are
+    counted in counts['items_without_link'].
+    """
     resources = []
     # Only process direct <li> children to avoid nested list issues.
     for li in ul.find_all('li', recursive=False):
-        a_tag = li.find('a')
-        if a_tag:
-            name = a_tag.get_text().strip()
-            url = a_tag.get('href', '').strip()
-            # Extract the full text of the list item and remove the link text.
-            full_text = li.get_text(separator=' ', strip=True)
-            description = full_text.replace(name, '', 1).strip(' -')
-            tags = re.findall(r'`(.*?)`', description)
-            resources.append({
-                'name': name,
-                'url': url,
-                'description': description,
-                'tags': tags
-            })
+        text = _ItemText(li)
+        if text.link is not None:
+            name = text.name
+            # The full text of the list item without the link text.
+            description = ' '.join(text.nodes).replace(name, '', 1).strip(' -')
+            resources.append(Resource(name, text.url, description, resource_tags(text.code, description)))
         else:
-            logging.warning("List item without a link: %s", li)
+            if counts is not None:
+                counts['items_without_link'] += 1
+            # Lazy: the element is only serialized when debug logging is on
+            logging.debug("List item without a link: %s", li)
     return resources
 
 def parse_table(table):
@@ -54,25 +125,23 @@ def parse_table(table):
         if not cells:
             continue
         # Heuristic: look for the first cell containing a link.
-        name, url, description = None, None, ''
+        name, url = None, None
+        texts = []
+        code = []
         for cell in cells:
-            a_tag = cell.find('a')
-            if a_tag and not name:
-                name = a_tag.get_text().strip()
-                url = a_tag.get('href', '').strip()
+            text = _ItemText(cell)
+            if text.link is not None and not name:
+                name = text.name
+                url = text.url
             else:
-                description += ' ' + cell.get_text(separator=' ', strip=True)
+                texts.append(' '.join(text.nodes))
+                code.extend(text.code)
         if name:
-            tags = re.findall(r'`(.*?)`', description)
-            resources.append({
-                'name': name,
-                'url': url,
-                'description': description.strip(' -'),
-                'tags': tags
-            })
+            description = ' '.join(texts).strip(' -')
+            resources.append(Resource(name, url, description, resource_tags(code, description)))
     return resources
 
-def parse_awesome_list(readme_path, list_name):
+def parse_awesome_list(readme_path, list_name, engine=DEFAULT_ENGINE):
     """
     Parses a README.md file from an awesome list repository and extracts structured data.
     Supports headers with bullet lists, tables, and a fallback to list items.
@@ -85,6 +154,30 @@ def parse_awesome_list(readme_path, list_name):
         logging.error("Error reading %s: %s", readme_path, e)
         raise
 
+    categories = None
+    counts = Counter()
+    if engine == 'fast':
+        try:
+            categories = extract_categories(content, IGNORED_CATEGORIES, counts)
+        except UnsupportedMarkdown as e:
+            logging.info("Falling back to bs4 engine for %s: %s", list_name, e)
+            counts = Counter()
+    if categories is None:
+        categories = parse_html_categories(content, counts)
+    if counts['items_without_link']:
+        logging.info("Skipped %d list items without a link in %s", counts['items_without_link'], list_name)
+
+    return AwesomeList(list_name, categories)
+
+def parse_html_categories(content, counts=None):
+    """
+    Extracts categories by rendering markdown to HTML and walking it with
+    BeautifulSoup. Skipped items are counted in counts as by extract_resources_from_ul.
+    """
+    # Imported here so that commands which never parse a README do not load them
+    import markdown  # type: ignore
+    from bs4 import BeautifulSoup  # type: ignore # Requires: pip install beautifulsoup4
+
     # Convert markdown to HTML.
     html = markdown.markdown(content)
     soup = BeautifulSoup(html, 'html.parser')
@@ -103,12 +196,9 @@ def parse_awesome_list(readme_path, list_name):
             # Continue until the next header is encountered.
             while sibling and sibling.name not in ['h1', 'h2', 'h3']:
                 if sibling.name == 'ul':
-                    category_resources.extend(extract_resources_from_ul(sibling))
+                    category_resources.extend(extract_resources_from_ul(sibling, counts))
                 sibling = sibling.find_next_sibling()
-            categories.append({
-                'name': cat_name,
-                'resources': category_resources
-            })
+            categories.append(Category(cat_name, category_resources))
     else:
         # No headers found; check for table structures.
         tables = soup.find_all('table')
@@ -116,124 +206,240 @@ def parse_awesome_list(readme_path, list_name):
             for table in tables:
                 resources = parse_table(table)
                 if resources:
-                    categories.append({
-                        'name': 'Resources',
-                        'resources': resources
-                    })
+                    categories.append(Category('Resources', resources))
         else:
             # Fallback: extract all list items in the document.
             lis = soup.find_all('li')
             # Wrap them in a dummy <ul> to reuse our extraction logic.
             dummy_ul = BeautifulSoup('<ul>' + ''.join(str(li) for li in lis) + '</ul>', 'html.parser').find('ul')
-            resources = extract_resources_from_ul(dummy_ul)
+            resources = extract_resources_from_ul(dummy_ul, counts)
             if resources:
-                categories.append({
-                    'name': 'Resources',
-                    'resources': resources
-                })
-
-    return {
-        'name': list_name,
-        'categories': categories
+                categories.append(Category('Resources', resources))
+
+    return categories
+
+def readme_digest(readme_path):
+    """Returns the SHA-256 hex digest of a README file's bytes."""
+    with open(readme_path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+def _cache_path(cache_dir, list_name):
+    return Path(cache_dir) / (list_name.lower().replace(' ', '-') + '.json')
+
+def load_cached_list(cache_dir, list_name, digest, engine=DEFAULT_ENGINE):
+    """
+    Returns the cached parse result for a list if it was produced from a README
+    with the same digest by the current parser version and engine, otherwise None.
+    """
+    path = _cache_path(cache_dir, list_name)
+    if not path.exists():
+        return None
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            entry = json.load(f)
+    except Exception as e:
+        logging.warning("Ignoring unreadable cache entry %s: %s", path, e)
+        return None
+    if (entry.get('parser_version') != PARSER_VERSION or entry.get('sha256') != digest
+            or entry.get('engine', DEFAULT_ENGINE) != engine or entry.get('data') is None):
+        return None
+    return AwesomeList.from_dict(entry['data'])
+
+def store_cached_list(cache_dir, list_name, digest, parsed_data, engine=DEFAULT_ENGINE):
+    """Stores a parse result in the extraction cache."""
+    os.makedirs(cache_dir, exist_ok=True)
+    entry = {
+        'parser_version': PARSER_VERSION,
+        'engine': engine,
+        'sha256': digest,
+        'data': parsed_data.to_dict()
     }
+    # Not flushed to disk: a lost entry only costs a parse
+    with atomic_write(_cache_path(cache_dir, list_name), durable=False) as f:
+        json.dump(entry, f)
 
-def is_valid_url(url):
+def load_awesome_list(readme_path, list_name, cache_dir=None, engine=DEFAULT_ENGINE):
     """
-    Check if a URL is valid.
-    A valid URL must have both a scheme (http, https) and a netloc (domain).
+    Parses a README, reusing the cached result when the README is unchanged.
+    Returns the parsed data and whether it came from the cache.
     """
+    if cache_dir is None:
+        return parse_awesome_list(readme_path, list_name, engine), False
+
+    digest = readme_digest(readme_path)
+    cached = load_cached_list(cache_dir, list_name, digest, engine)
+    if cached is not None:
+        logging.info("Using cached extraction for %s", list_name)
+        return cached, True
+
+    parsed_data = parse_awesome_list(readme_path, list_name, engine)
     try:
-        if not url or not isinstance(url, str):
-            return False
-        
-        # Parse the URL
-        result = urlparse(url)
-        
-        # Check if URL has scheme (http, https) and netloc (domain)
-        return all([result.scheme in ('http', 'https'), result.netloc])
+        store_cached_list(cache_dir, list_name, digest, parsed_data, engine)
     except Exception as e:
-        logging.error(f"Error validating URL '{url}': {e}")
-        return False
+        logging.warning("Could not cache extraction for %s: %s", list_name, e)
+    return parsed_data, False
+
+def _extract_job(job):
+    """
+    Worker entry point for parallel extraction. Errors are returned rather than
+    raised so that every list is reported the same way as in a serial run.
+    Also returns the wall and CPU time spent on the list in the worker.
+    """
+    readme_path, list_name, cache_dir, engine = job
+    start_wall = time.perf_counter()
+    start_cpu = time.process_time()
+    try:
+        parsed_data, cached = load_awesome_list(readme_path, list_name, cache_dir, engine)
+        error = None
+    except Exception as e:
+        parsed_data, cached, error = None, False, str(e)
+    metrics = {
+        'wall_s': round(time.perf_counter() - start_wall, 6),
+        'cpu_s': round(time.process_time() - start_cpu, 6),
+        'readme_bytes': os.path.getsize(readme_path) if os.path.exists(readme_path) else 0
+    }
+    return parsed_data, cached, error, metrics
+
+def extract_lists(jobs, workers=1):
+    """
+    Runs _extract_job over (readme_path, list_name, cache_dir, engine) tuples, spreading
+    the work across a process pool when workers > 1. Results are yielded in
+    the same order as jobs regardless of which worker finishes first.
+    """
+    if workers <= 1 or len(jobs) <= 1:
+        yield from map(_extract_job, jobs)
+        return
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker_logging,
+                             initargs=(worker_logging_config(),)) as executor:
+        yield from executor.map(_extract_job, jobs)
+
+def list_name_of(directory_name):
+    """The name of the awesome list synced to a source directory: awesome-python is Awesome Python."""
+    return directory_name.replace('-', ' ').title()
+
+def find_list_jobs(source_dir, cache_dir=None, engine=DEFAULT_ENGINE):
+    """Returns one extraction job per awesome-* directory with a README, in a stable order."""
+    base_dir = Path(source_dir)
+    # Look for directories that start with "awesome-", in a stable order
+    awesome_dirs = sorted(d for d in base_dir.iterdir() if d.is_dir() and d.name.startswith(LIST_DIR_PREFIX))
+    jobs = []
+    for awesome_dir in awesome_dirs:
+        readme_path = awesome_dir / 'README.md'
+        if readme_path.exists():
+            jobs.append((readme_path, list_name_of(awesome_dir.name), cache_dir, engine))
+    return jobs
+
+def iter_extracted_lists(jobs, workers=1, filter_urls=False, url_stats=False, stats=None, report=None):
+    """
+    Yields each parsed list as soon as it is available, in job order, filtering
+    out resources with invalid URLs when requested. Counters for URL
+    statistics and cache hits are accumulated in stats, and one record per
+    list is written to report when given.
+    """
+    for _, awesome_list in iter_extracted_jobs(jobs, workers, filter_urls, url_stats, stats, report):
+        yield awesome_list
+
+def iter_extracted_jobs(jobs, workers=1, filter_urls=False, url_stats=False, stats=None, report=None):
+    """Like iter_extracted_lists, but yields (job, list) pairs, skipping jobs that failed or left nothing."""
+    if stats is None:
+        stats = {}
+    for key in ('total_resources', 'valid_urls', 'invalid_urls', 'cache_hits'):
+        stats.setdefault(key, 0)
+    url_filter = UrlFilter(stats) if filter_urls else None
+
+    for job, (parsed_data, cached, error, metrics) in zip(jobs, extract_lists(jobs, workers)):
+        list_name = job[1]
+        logging.info("Processing %s", list_name)
+        if report is not None and error is not None:
+            report.record('list', stage='parse', list=list_name, status='failed', error=error, **metrics)
+        if error is not None:
+            logging.error("Error processing %s: %s", list_name, error)
+            continue
+        filter_start = time.perf_counter()
+        try:
+            stats['cache_hits'] += cached
+            output = None
+            
+            # Filter out resources with invalid URLs if requested
+            if filter_urls:
+                output = url_filter.filter_list(parsed_data)
+            else:
+                output = parsed_data
+                
+                # Count valid/invalid URLs if stats requested
+                if url_stats:
+                    for _, resource in parsed_data.iter_resources():
+                        stats['total_resources'] += 1
+                        if is_valid_url(resource.url):
+                            stats['valid_urls'] += 1
+                        else:
+                            stats['invalid_urls'] += 1
+            
+            list_resources = parsed_data.resource_count()
+            logging.info("Found %d resources in %d categories", list_resources, len(parsed_data.categories))
+        except Exception as e:
+            logging.error("Error processing %s: %s", list_name, e)
+            continue
+
+        if report is not None:
+            kept = output.resource_count() if output is not None else 0
+            report.record('list', stage='parse', list=list_name, status='ok', cached=bool(cached),
+                          categories=len(parsed_data.categories), resources=list_resources,
+                          resources_kept=kept, filter_s=round(time.perf_counter() - filter_start, 6),
+                          **metrics)
+
+        if output is not None:
+            yield job, output
 
 def main():
     parser = argparse.ArgumentParser(description='Extract data from awesome lists')
-    parser.add_argument('--output', default='data/awesome-lists.json', help='Output JSON file path')
+    parser.add_argument('--output', default='data/awesome-lists.json',
+                        help='Output file path; a .sqlite suffix writes an SQLite database')
     parser.add_argument('--source-dir', default='awesome-lists-sources', help='Directory containing awesome list repositories')
     parser.add_argument('--filter-urls', action='store_true', help='Filter out resources with invalid URLs')
     parser.add_argument('--url-stats', action='store_true', help='Show statistics about valid/invalid URLs')
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR, help='Directory for cached parse results')
+    parser.add_argument('--no-cache', action='store_true', help='Re-parse every README and ignore the cache')
+    parser.add_argument('--workers', type=int, default=1, help='Number of processes used to parse READMEs')
+    parser.add_argument('--engine', choices=ENGINES, default=DEFAULT_ENGINE, help='Markdown extraction engine')
+    parser.add_argument('--compact', action='store_true', help='Write JSON without indentation')
+    add_instrumentation_arguments(parser)
+    add_logging_arguments(parser)
     args = parser.parse_args()
 
-    # Ensure logs directory exists
-    os.makedirs('logs', exist_ok=True)
-    
-    base_dir = Path(args.source_dir)
-    # Look for directories that start with "awesome-"
-    awesome_dirs = [d for d in base_dir.iterdir() if d.is_dir() and d.name.startswith('awesome-')]
-    all_lists = []
+    configure_logging('extraction', args.log_level)
+    report = open_run_report(args, 'extract_data')
     
-    # For URL stats
-    total_resources = 0
-    valid_urls = 0
-    invalid_urls = 0
+    cache_dir = None if args.no_cache else args.cache_dir
+    jobs = find_list_jobs(args.source_dir, cache_dir, args.engine)
+    stats = {}
 
-    for awesome_dir in awesome_dirs:
-        readme_path = awesome_dir / 'README.md'
-        if readme_path.exists():
-            list_name = awesome_dir.name.replace('-', ' ').title()
-            logging.info("Processing %s", list_name)
-            try:
-                parsed_data = parse_awesome_list(readme_path, list_name)
-                
-                # Filter out resources with invalid URLs if requested
-                if args.filter_urls:
-                    filtered_categories = []
-                    for category in parsed_data['categories']:
-                        valid_resources = []
-                        for resource in category['resources']:
-                            total_resources += 1
-                            url = resource.get('url', '')
-                            
-                            if is_valid_url(url):
-                                valid_resources.append(resource)
-                                valid_urls += 1
-                            else:
-                                invalid_urls += 1
-                                logging.info(f"Filtering out resource '{resource['name']}' with invalid URL: '{url}'")
-                        
-                        if valid_resources:
-                            filtered_category = category.copy()
-                            filtered_category['resources'] = valid_resources
-                            filtered_categories.append(filtered_category)
-                    
-                    if filtered_categories:
-                        filtered_data = parsed_data.copy()
-                        filtered_data['categories'] = filtered_categories
-                        all_lists.append(filtered_data)
-                else:
-                    all_lists.append(parsed_data)
-                    
-                    # Count valid/invalid URLs if stats requested
-                    if args.url_stats:
-                        for category in parsed_data['categories']:
-                            for resource in category['resources']:
-                                total_resources += 1
-                                url = resource.get('url', '')
-                                if is_valid_url(url):
-                                    valid_urls += 1
-                                else:
-                                    invalid_urls += 1
-                
-                list_resources = sum(len(cat['resources']) for cat in parsed_data['categories'])
-                logging.info(f"Found {list_resources} resources in {len(parsed_data['categories'])} categories")
-            except Exception as e:
-                logging.error(f"Error processing {list_name}: {e}")
-
-    os.makedirs(os.path.dirname(args.output), exist_ok=True)
-    with open(args.output, 'w', encoding='utf-8') as f:
-        json.dump(all_lists, f, indent=2)
+    # Each list is written as soon as it is parsed so memory does not grow with the corpus.
+    with report.stage('extract', engine=args.engine, workers=args.workers) as stage:
+        write_time = 0.0
+        with open_list_writer(args.output, indent=None if args.compact else 2) as writer:
+            for parsed_data in iter_extracted_lists(jobs, args.workers, args.filter_urls, args.url_stats,
+                                                    stats, report):
+                write_start = time.perf_counter()
+                writer.write(parsed_data)
+                write_time += time.perf_counter() - write_start
+        stage['write_s'] = round(write_time, 6)
+        stage['lists'] = len(jobs)
+        stage['lists_written'] = writer.count
+        stage['output_bytes'] = os.path.getsize(args.output)
+        stage['cache_hits'] = stats['cache_hits']
+        stage['resources'] = stats['total_resources']
+        stage['invalid_urls'] = stats['invalid_urls']
+    report.close(status='ok')
     
-    logging.info(f"Processed {len(all_lists)} awesome lists; data saved to {args.output}")
+    logging.info(f"Processed {writer.count} awesome lists; data saved to {args.output}")
+    if cache_dir is not None:
+        logging.info(f"Reused cached extraction for {stats['cache_hits']} of {len(jobs)} lists")
     
+    total_resources = stats['total_resources']
+    valid_urls = stats['valid_urls']
+    invalid_urls = stats['invalid_urls']
+
     # Print URL statistics if requested
     if args.url_stats or args.filter_urls:
         print("\nURL Statistics:")
@@ -0,0 +1,388 @@
+#!/usr/bin/env python3
+"""
+Streaming extraction engine for awesome list READMEs.
+
+The default engine in extract_data.py renders the whole README to HTML with
+markdown.markdown and parses that HTML again with BeautifulSoup. This engine
+keeps Python-Markdown's block parser, which decides where headings, lists and
+list items begin and end, but skips the inline pass, the HTML serialization
+and the BeautifulSoup tree. Headings and list items are turned into text nodes
+directly from their markdown source with a single regex scan.
+
+The output is meant to be identical to the BeautifulSoup engine:
+- List items or headings that use inline syntax the scanner does not model
+  (emphasis, escapes, inline HTML, reference links, line breaks) are rendered
+  through Python-Markdown's own inline pipeline, one element at a time.
+- Documents whose structure the engine does not model raise
+  UnsupportedMarkdown, and the caller falls back to the BeautifulSoup engine.
+"""
+import re
+import html
+import logging
+import threading
+from html.parser import HTMLParser
+from xml.etree import ElementTree as etree
+
+from scripts.model import Category, Resource
+
+HEADER_TAGS = ('h1', 'h2', 'h3')
+CATEGORY_TAGS = ('h2', 'h3')
+
+# Raw HTML containing any of these tags changes which headings and lists
+# BeautifulSoup sees, so such documents are left to the BeautifulSoup engine.
+STRUCTURAL_TAGS = frozenset(['h1', 'h2', 'h3', 'ul', 'ol', 'li', 'table', 'tr', 'td', 'th'])
+VOID_TAGS = frozenset([
+    'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link',
+    'meta', 'param', 'source', 'track', 'wbr'
+])
+
+# Inline syntax that is delegated to Python-Markdown's inline processor.
+# Underscores inside a word (snake_case) never start emphasis.
+COMPLEX_INLINE_RE = re.compile(r'[\\*<\x02]|  \n|(?<!\w)_|_(?!\w)')
+# Inline syntax handled by the scanner: code spans, links, images and entities.
+INLINE_TOKEN_RE = re.compile(r'`+|!?\[|&(?:#[0-9]+|#x[0-9a-fA-F]+|[a-zA-Z0-9]+);')
+INLINE_LINK_RE = re.compile(r'!?\[([^\[\]`]*)\]\(([^\s()<>`"\'&\\]+)\)')
+ENTITY_RE = re.compile(r'&(?:#[0-9]+|#x[0-9a-fA-F]+|[a-zA-Z0-9]+);')
+TAG_RE = re.compile(r'`(.*?)`')
+
+# One Markdown instance per thread: parsing resets it and fills its HTML
+# stash, so threads sharing one would overwrite each other's state
+_local = threading.local()
+
+
+class UnsupportedMarkdown(Exception):
+    """Raised when a document needs the BeautifulSoup engine to be parsed faithfully."""
+
+
+class _Delegate(Exception):
+    """Raised by the inline scanner for text it cannot tokenize exactly."""
+
+
+class _StructureChecker(HTMLParser):
+    """
+    Records the tags of a raw HTML block that matter to the header/list walk:
+    h2/h3 anywhere, and h1 or ul as top-level siblings. Also tracks whether
+    the block is balanced, since BeautifulSoup would nest later siblings under
+    an unclosed tag.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.stack = []
+        self.balanced = True
+        self.structural = False
+        self.category_header = False
+        self.top_level_h1 = False
+        self.top_level_list = False
+
+    def handle_starttag(self, tag, attrs):
+        self.handle_startendtag(tag, attrs)
+        if tag not in VOID_TAGS:
+            self.stack.append(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        if tag in STRUCTURAL_TAGS:
+            self.structural = True
+        if tag in CATEGORY_TAGS:
+            self.category_header = True
+        elif not self.stack:
+            self.top_level_h1 |= tag == 'h1'
+            self.top_level_list |= tag == 'ul'
+
+    def handle_endtag(self, tag):
+        if tag in STRUCTURAL_TAGS:
+            self.structural = True
+        if not self.stack or self.stack.pop() != tag:
+            self.balanced = False
+
+
+class _TextCollector(HTMLParser):
+    """
+    Collects the text nodes of a rendered element, its first link and the
+    text of its <code> elements outside that link, the same way
+    BeautifulSoup's html.parser tree builder would see them.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.nodes = []
+        self.href = None
+        self.link_nodes = None
+        self.code = []
+        self._link_depth = 0
+        self._code_nodes = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'a':
+            if self.link_nodes is None:
+                self.href = dict(attrs).get('href') or ''
+                self.link_nodes = []
+                self._link_depth = 1
+            elif self._link_depth:
+                self._link_depth += 1
+        elif tag == 'code' and not self._link_depth and self._code_nodes is None:
+            self._code_nodes = []
+
+    def handle_endtag(self, tag):
+        if tag == 'a' and self._link_depth:
+            self._link_depth -= 1
+        elif tag == 'code' and self._code_nodes is not None:
+            self.code.append(''.join(self._code_nodes).strip())
+            self._code_nodes = None
+
+    def handle_data(self, data):
+        self.nodes.append(data)
+        if self._link_depth:
+            self.link_nodes.append(data)
+        elif self._code_nodes is not None:
+            self._code_nodes.append(data)
+
+
+def _get_markdown():
+    md = getattr(_local, 'md', None)
+    if md is None:
+        import markdown  # type: ignore
+        md = _local.md = markdown.Markdown()
+    return md
+
+
+def _scan_raw_html(raw):
+    checker = _StructureChecker()
+    checker.feed(str(raw))
+    checker.close()
+    return checker
+
+
+def _check_raw_blocks(md):
+    """
+    Checks the raw HTML blocks stashed by the preprocessor and returns the
+    placeholders of those that contain a top-level <h1>, which ends a category
+    just like a markdown h1. Raises UnsupportedMarkdown for blocks that could
+    add categories or lists BeautifulSoup would see.
+    """
+    h1_placeholders = set()
+    for index, raw in enumerate(md.htmlStash.rawHtmlBlocks):
+        checker = _scan_raw_html(raw)
+        if not checker.balanced or checker.stack:
+            raise UnsupportedMarkdown("unbalanced raw HTML block")
+        if checker.category_header or checker.top_level_list:
+            raise UnsupportedMarkdown("raw HTML block with h2/h3 headings or lists")
+        if checker.top_level_h1:
+            h1_placeholders.add(md.htmlStash.get_placeholder(index))
+    return h1_placeholders
+
+
+def _find_code_span(text, start):
+    """Returns (content_start, content_end, end) of an exactly matched code span, else None."""
+    ticks = 0
+    i = start
+    while i < len(text) and text[i] == '`':
+        ticks += 1
+        i += 1
+    content_start = i
+    while i < len(text):
+        if text[i] != '`':
+            i += 1
+            continue
+        run_start = i
+        while i < len(text) and text[i] == '`':
+            i += 1
+        if i - run_start == ticks:
+            return content_start, run_start, i
+    return None
+
+
+def _plain(segment):
+    """Returns a text segment, or raises _Delegate if it holds syntax the scanner does not model."""
+    if COMPLEX_INLINE_RE.search(segment):
+        raise _Delegate()
+    return segment
+
+
+def _inline_nodes(text, nodes, link, code):
+    """
+    Appends the text nodes of a run of inline markdown to nodes, and the
+    content of its code spans to code. The first link found is recorded in
+    link as [href, name] when link is still empty. Code spans and link targets are opaque to the other inline patterns, so
+    only the plain text between them and the link names are checked for
+    syntax that needs Python-Markdown.
+    """
+    current = []
+    pos = 0
+    for m in INLINE_TOKEN_RE.finditer(text):
+        start = m.start()
+        if start < pos:
+            # Inside a code span or link consumed below
+            continue
+        current.append(_plain(text[pos:start]))
+        token = m.group()
+        if token[0] == '&':
+            current.append(html.unescape(token))
+            pos = m.end()
+            continue
+
+        # Code spans, links and images all start a new text node
+        nodes.append(''.join(current))
+        current = []
+        if token[0] == '`':
+            span = _find_code_span(text, start)
+            if span is None:
+                raise _Delegate()
+            content_start, content_end, pos = span
+            content = text[content_start:content_end].strip()
+            nodes.append(content)
+            code.append(content)
+            continue
+
+        link_match = INLINE_LINK_RE.match(text, start)
+        if link_match is None:
+            raise _Delegate()
+        pos = link_match.end()
+        if token[0] == '!':
+            continue
+        name = ENTITY_RE.sub(lambda e: html.unescape(e.group()), _plain(link_match.group(1)))
+        nodes.append(name)
+        if not link:
+            link.extend([link_match.group(2).strip(), name])
+
+    current.append(_plain(text[pos:]))
+    nodes.append(''.join(current))
+
+
+def _element_nodes(el, nodes, link, code):
+    """Appends the text nodes and code spans of an element tree produced by the block parser."""
+    if el.tag == 'pre':
+        raise _Delegate()
+    if el.text:
+        _inline_nodes(el.text, nodes, link, code)
+    for child in el:
+        _element_nodes(child, nodes, link, code)
+        if child.tail:
+            _inline_nodes(child.tail, nodes, link, code)
+
+
+def _rendered_nodes(md, el):
+    """Renders an element through Python-Markdown's inline pipeline and collects its text nodes."""
+    stashed = len(md.htmlStash.rawHtmlBlocks)
+    wrapper = etree.Element('div')
+    wrapper.append(el)
+    for treeprocessor in md.treeprocessors:
+        new_root = treeprocessor.run(wrapper)
+        if new_root is not None:
+            wrapper = new_root
+    # Inline HTML only needs to be free of structural tags: BeautifulSoup
+    # closes anything left open when the enclosing element ends.
+    for raw in md.htmlStash.rawHtmlBlocks[stashed:]:
+        if _scan_raw_html(raw).structural:
+            raise UnsupportedMarkdown("inline HTML with heading, list or table tags")
+    el.tail = None
+    output = md.serializer(el)
+    for postprocessor in md.postprocessors:
+        output = postprocessor.run(output)
+
+    collector = _TextCollector()
+    collector.feed(output)
+    collector.close()
+    link = []
+    if collector.link_nodes is not None:
+        link = [collector.href, ''.join(collector.link_nodes)]
+    return collector.nodes, link, collector.code
+
+
+def element_text(md, el):
+    """
+    Returns the text nodes of an element, its first link as [href, name] or
+    [], and the content of its code spans outside that link. Link names with
+    code spans are always rendered by Python-Markdown, so the scanner never
+    sees a code span inside a link.
+    """
+    nodes = []
+    link = []
+    code = []
+    try:
+        _element_nodes(el, nodes, link, code)
+    except _Delegate:
+        return _rendered_nodes(md, el)
+    return nodes, link, code
+
+
+def resource_tags(code_spans, description):
+    """
+    Returns the tags of a resource, without repeats: the content of the code
+    spans in its list item outside the link. Items without code spans fall
+    back to text between literal backticks in the description, which is how
+    tags appear in raw HTML tables that markdown leaves as written.
+    """
+    tags = [span for span in code_spans if span]
+    if not code_spans and '`' in description:
+        tags = TAG_RE.findall(description)
+    return list(dict.fromkeys(tags))
+
+
+def extract_resources_from_list(md, ul, counts=None):
+    """
+    Extracts resource objects from the direct <li> children of a list
+    element. Items without a link are counted in counts['items_without_link'].
+    """
+    resources = []
+    for li in ul:
+        if li.tag != 'li':
+            continue
+        nodes, link, code = element_text(md, li)
+        if link:
+            url, name = link
+            name = name.strip()
+            full_text = ' '.join(node.strip() for node in nodes if node.strip())
+            description = full_text.replace(name, '', 1).strip(' -')
+            resources.append(Resource(name, url.strip(), description, resource_tags(code, description)))
+        else:
+            if counts is not None:
+                counts['items_without_link'] += 1
+            if logging.root.isEnabledFor(logging.DEBUG):
+                logging.debug("List item without a link: %s", ' '.join(nodes).strip())
+    return resources
+
+
+def extract_categories(content, ignored_categories, counts=None):
+    """
+    Extracts categories from a README the way parse_awesome_list does with
+    BeautifulSoup, for documents organized under top-level h2/h3 headings.
+    Raises UnsupportedMarkdown for any other document. Skipped items are
+    counted in counts as by extract_resources_from_list.
+    """
+    md = _get_markdown()
+    md.reset()
+    if not content.strip():
+        raise UnsupportedMarkdown("empty document")
+
+    lines = content.split('\n')
+    for preprocessor in md.preprocessors:
+        lines = preprocessor.run(lines)
+    root = md.parser.parseDocument(lines).getroot()
+    h1_placeholders = _check_raw_blocks(md)
+
+    blocks = list(root)
+    for block in blocks:
+        for el in block.iter():
+            if el is not block and el.tag in CATEGORY_TAGS:
+                raise UnsupportedMarkdown(f"nested <{el.tag}> heading")
+    if not any(block.tag in CATEGORY_TAGS for block in blocks):
+        raise UnsupportedMarkdown("no h2/h3 headings")
+
+    categories = []
+    category_resources = None
+    for block in blocks:
+        if block.tag == 'p' and block.text in h1_placeholders:
+            category_resources = None
+        elif block.tag in HEADER_TAGS:
+            # Any header ends the current category; h2/h3 may start a new one.
+            category_resources = None
+            if block.tag in CATEGORY_TAGS:
+                nodes, _, _ = element_text(md, block)
+                cat_name = ''.join(nodes).strip()
+                if cat_name.lower() not in ignored_categories:
+                    category_resources = []
+                    categories.append(Category(cat_name, category_resources))
+        elif block.tag == 'ul' and category_resources is not None:
+            category_resources.extend(extract_resources_from_list(md, block, counts))
+    return categories
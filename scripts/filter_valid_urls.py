@@ -1,147 +1,143 @@
 #!/usr/bin/env python3
 import os
+import sys
 import json
 import logging
 import argparse
-from urllib.parse import urlparse
 from pathlib import Path
 
-# Ensure logs directory exists
-os.makedirs('logs', exist_ok=True)
+# Add the repository root to the path to import our modules when run as a script
+if not __package__:
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-# Configure logging
-logging.basicConfig(
-    filename='logs/url_filtering.log',
-    level=logging.INFO,
-    format='%(asctime)s %(levelname)s: %(message)s'
+from scripts.storage import iter_lists, open_list_writer
+# is_valid_url is kept importable from here for existing callers
+from scripts.urls import UrlFilter, is_valid_url, save_duplicate_report
+from scripts.liveness import (
+    LivenessCache,
+    LivenessChecker,
+    iter_live_lists,
+    add_liveness_arguments,
+    liveness_options,
+    LIVENESS_CACHE_NAME
 )
+from scripts.instrumentation import add_instrumentation_arguments, open_run_report
+from scripts.atomic import snapshot
+from scripts.log_setup import configure_logging, add_logging_arguments
 
-def is_valid_url(url):
+def iter_filtered_lists(lists, stats):
     """
-    Check if a URL is valid.
-    A valid URL must have both a scheme (http, https) and a netloc (domain).
+    Filter out resources that don't have valid URLs, one awesome list at a time.
+    Yields the filtered lists and accumulates counts in stats.
     """
-    try:
-        if not url or not isinstance(url, str):
-            return False
-        
-        # Parse the URL
-        result = urlparse(url)
-        
-        # Check if URL has scheme (http, https) and netloc (domain)
-        return all([result.scheme in ('http', 'https'), result.netloc])
-    except Exception as e:
-        logging.error(f"Error validating URL '{url}': {e}")
-        return False
+    return UrlFilter(stats).iter_lists(lists)
+
+def finish_stats(stats):
+    """Adds the removal percentage to filtering statistics."""
+    stats['percentage_removed'] = round(stats['invalid_urls'] / max(stats['total_resources'], 1) * 100, 2)
+    return stats
 
 def filter_invalid_resources(data):
     """
     Filter out resources that don't have valid URLs from the awesome lists data.
     Returns the filtered data and statistics about the filtering.
     """
-    total_resources = 0
-    removed_resources = 0
-    filtered_lists = []
-    
-    # Process each awesome list
-    for awesome_list in data:
-        filtered_categories = []
-        
-        # Process each category in the list
-        for category in awesome_list.get('categories', []):
-            valid_resources = []
-            
-            # Check each resource for a valid URL
-            for resource in category.get('resources', []):
-                total_resources += 1
-                url = resource.get('url', '')
-                
-                if is_valid_url(url):
-                    valid_resources.append(resource)
-                else:
-                    removed_resources += 1
-                    logging.info(f"Removing resource '{resource.get('name', 'Unknown')}' with invalid URL: '{url}'")
-            
-            # Only keep categories that still have resources
-            if valid_resources:
-                filtered_category = category.copy()
-                filtered_category['resources'] = valid_resources
-                filtered_categories.append(filtered_category)
-        
-        # Only keep lists that still have categories
-        if filtered_categories:
-            filtered_list = awesome_list.copy()
-            filtered_list['categories'] = filtered_categories
-            filtered_lists.append(filtered_list)
-    
-    stats = {
-        'total_resources': total_resources,
-        'removed_resources': removed_resources,
-        'percentage_removed': round(removed_resources / max(total_resources, 1) * 100, 2)
-    }
-    
-    return filtered_lists, stats
+    stats = {}
+    filtered_lists = list(iter_filtered_lists(data, stats))
+    return filtered_lists, finish_stats(stats)
 
 def main():
     parser = argparse.ArgumentParser(description='Filter resources with invalid URLs from awesome lists data')
-    parser.add_argument('--input', default='data/awesome-lists.json', help='Input JSON file path')
-    parser.add_argument('--output', default='data/filtered-awesome-lists.json', help='Output filtered JSON file path')
+    parser.add_argument('--input', default='data/awesome-lists.json', help='Input file path (.json or .sqlite)')
+    parser.add_argument('--output', default='data/filtered-awesome-lists.json', help='Output filtered file path (.json or .sqlite)')
     parser.add_argument('--backup', action='store_true', help='Create a backup of the original file before replacing it')
     parser.add_argument('--replace', action='store_true', help='Replace the original file with the filtered version')
+    parser.add_argument('--compact', action='store_true', help='Write JSON without indentation')
+    parser.add_argument('--duplicates', default=None,
+                        help='Write a report of the URLs found more than once to this file')
+    add_liveness_arguments(parser)
+    add_instrumentation_arguments(parser)
+    add_logging_arguments(parser)
     args = parser.parse_args()
     
-    # Ensure logs directory exists
-    os.makedirs('logs', exist_ok=True)
+    configure_logging('url_filtering', args.log_level)
+    report = open_run_report(args, 'filter_valid_urls')
     
     input_path = args.input
     output_path = args.output if not args.replace else args.input
     
-    # Load the awesome lists data
-    try:
-        with open(input_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        logging.info(f"Loaded data from {input_path}")
-    except Exception as e:
-        logging.error(f"Error loading data: {e}")
-        print(f"Error: Failed to load data from {input_path}: {e}")
-        return
-    
-    # Create a backup if requested
+    # Create a backup if requested. The output replaces the input by rename, so
+    # a hard link keeps the original without copying or re-serializing it.
     if args.backup or args.replace:
         backup_path = f"{input_path}.backup"
         try:
-            with open(backup_path, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2)
+            snapshot(input_path, backup_path)
             logging.info(f"Backup created at {backup_path}")
             print(f"Backup created at {backup_path}")
         except Exception as e:
-            logging.error(f"Error creating backup: {e}")
+            logging.error("Error creating backup: %s", e)
             print(f"Warning: Failed to create backup: {e}")
     
-    # Filter the data
-    filtered_data, stats = filter_invalid_resources(data)
-    
-    # Save the filtered data
+    # Stream the awesome lists through the filter one list at a time. The writer
+    # works on a temporary file because with --replace the output is also the input.
+    stats = {}
+    url_filter = UrlFilter(stats)
     try:
-        os.makedirs(os.path.dirname(output_path), exist_ok=True)
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(filtered_data, f, indent=2)
+        liveness = None
+        if args.check_liveness:
+            # A first pass collects the URLs, so the probes can all run at once
+            with report.stage('liveness') as stage:
+                urls = {resource.url for awesome_list in UrlFilter().iter_lists(iter_lists(input_path))
+                        for _, resource in awesome_list.iter_resources()}
+                cache = LivenessCache(args.liveness_cache or
+                                      os.path.join(os.path.dirname(input_path), LIVENESS_CACHE_NAME))
+                checker = LivenessChecker(cache, **liveness_options(args))
+                try:
+                    liveness = checker.check(urls)
+                finally:
+                    cache.save()
+                for key, value in checker.stats.items():
+                    stage[key] = value
+        with report.stage('filter') as stage:
+            stage['input_bytes'] = os.path.getsize(input_path)
+            logging.info(f"Loading data from {input_path}")
+            filtered_lists = url_filter.iter_lists(iter_lists(input_path))
+            if liveness is not None:
+                filtered_lists = iter_live_lists(filtered_lists, liveness, stats)
+            with open_list_writer(output_path, indent=None if args.compact else 2) as writer:
+                for filtered_list in filtered_lists:
+                    writer.write(filtered_list)
+            stage['lists_written'] = writer.count
+            stage['resources'] = stats['total_resources']
+            stage['removed_resources'] = stats['invalid_urls']
+            stage['duplicate_resources'] = stats['duplicate_resources']
+            stage['output_bytes'] = os.path.getsize(output_path)
         logging.info(f"Filtered data saved to {output_path}")
+        if args.duplicates:
+            save_duplicate_report(url_filter.duplicate_report(), args.duplicates)
     except Exception as e:
-        logging.error(f"Error saving filtered data: {e}")
-        print(f"Error: Failed to save filtered data to {output_path}: {e}")
+        logging.error("Error filtering data: %s", e)
+        print(f"Error: Failed to filter data from {input_path} into {output_path}: {e}")
+        report.close(status='failed', error=str(e))
         return
+    stats = finish_stats(stats)
     
     # Print statistics
     print(f"\nURL Filtering Complete:")
     print(f"Total resources processed: {stats['total_resources']}")
-    print(f"Resources removed: {stats['removed_resources']} ({stats['percentage_removed']}%)")
+    print(f"Resources removed: {stats['invalid_urls']} ({stats['percentage_removed']}%)")
+    print(f"Duplicate resources: {stats['duplicate_resources']}")
+    if args.check_liveness:
+        print(f"Resources with dead links removed: {stats['dead_resources']}")
     print(f"Filtered data saved to: {output_path}")
     
     if args.replace:
         print(f"Original file has been replaced with filtered data.")
+    if args.duplicates:
+        print(f"Duplicate report saved to: {args.duplicates}")
     
-    logging.info(f"Filtering complete. Removed {stats['removed_resources']} of {stats['total_resources']} resources.")
+    logging.info(f"Filtering complete. Removed {stats['invalid_urls']} of {stats['total_resources']} resources.")
+    report.close(status='ok')
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Run instrumentation shared by the pipeline scripts.
+
+A RunReport appends one JSON object per line to a run report file. Each
+stage records its wall time, CPU time of the process and of finished child
+processes, bytes read and written, peak RSS and any counters the stage adds.
+Scripts add their own records, such as one per repository or per list. Every
+record carries a run_id, and main.py passes its run_id on to the scripts it
+runs, so one nightly run can be pulled out of a shared report file.
+
+start_profiler dumps a cProfile profile of the rest of the process.
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import atexit
+import cProfile
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+DEFAULT_REPORT_PATH = 'logs/run-report.jsonl'
+
+
+def reset_peak_rss():
+    """Resets the kernel's peak RSS counter for this process. Returns False where unsupported (non-Linux)."""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def peak_rss_bytes():
+    """Peak resident set size since the last reset, or since process start where resetting is unsupported."""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def children_peak_rss_bytes():
+    """Peak RSS of the largest finished child process, if known."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def _io_bytes():
+    """Bytes read and written by this process so far (Linux only), else (None, None)."""
+    try:
+        with open('/proc/self/io') as f:
+            counters = dict(line.split(': ') for line in f.read().splitlines())
+        return int(counters['rchar']), int(counters['wchar'])
+    except (OSError, KeyError, ValueError):
+        return None, None
+
+
+def _children_cpu():
+    if resource is None:
+        return 0.0
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+class _Counters:
+    """Snapshot of the process counters a stage reports as deltas."""
+
+    def __init__(self):
+        self.wall = time.perf_counter()
+        self.cpu = time.process_time()
+        self.children_cpu = _children_cpu()
+        self.read_bytes, self.write_bytes = _io_bytes()
+
+    def since(self, start):
+        fields = {
+            'wall_s': round(self.wall - start.wall, 6),
+            'cpu_s': round(self.cpu - start.cpu, 6),
+            'children_cpu_s': round(self.children_cpu - start.children_cpu, 6)
+        }
+        if self.read_bytes is not None and start.read_bytes is not None:
+            fields['read_bytes'] = self.read_bytes - start.read_bytes
+            fields['write_bytes'] = self.write_bytes - start.write_bytes
+        return fields
+
+
+class Stage:
+    """
+    A timed section of a run, used as a context manager. Counters can be set
+    with stage['name'] = value or accumulated with stage.add('name', amount).
+    """
+
+    def __init__(self, report, name, fields):
+        self.report = report
+        self.name = name
+        self.fields = dict(fields)
+        self.peak_rss = 0
+        self._start = None
+
+    def __setitem__(self, key, value):
+        self.fields[key] = value
+
+    def add(self, key, amount):
+        self.fields[key] = self.fields.get(key, 0) + amount
+
+    def __enter__(self):
+        stack = self.report._stack
+        if stack:
+            # The counter is about to be reset, so keep the peak seen so far
+            stack[-1]._note_peak(peak_rss_bytes())
+        self.report._peak_resets = reset_peak_rss()
+        stack.append(self)
+        self._start = _Counters()
+        return self
+
+    def _note_peak(self, peak):
+        if peak is not None:
+            self.peak_rss = max(self.peak_rss, peak)
+
+    def __exit__(self, exc_type, exc, tb):
+        end = _Counters()
+        self._note_peak(peak_rss_bytes())
+        stack = self.report._stack
+        stack.pop()
+        if stack:
+            stack[-1]._note_peak(self.peak_rss)
+        self.report._note_peak(self.peak_rss)
+        self.report.record(
+            'stage',
+            stage=self.name,
+            status='failed' if exc_type else 'ok',
+            **end.since(self._start),
+            peak_rss_bytes=self.peak_rss or None,
+            peak_rss_scope='stage' if self.report._peak_resets else 'process',
+            children_peak_rss_bytes=children_peak_rss_bytes(),
+            **self.fields
+        )
+        return False
+
+
+def new_run_id():
+    return f"{datetime.now().strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:6]}"
+
+
+class RunReport:
+    """
+    Appends JSON-lines records for one run of a script to path. With path
+    None nothing is written, but stages still time themselves.
+    """
+
+    def __init__(self, path, script, run_id=None):
+        self.path = path
+        self.script = script
+        self.run_id = run_id or new_run_id()
+        self.peak_rss = 0
+        self._stack = []
+        self._peak_resets = False
+        self._start = _Counters()
+        self._file = None
+        if path:
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            # Line buffered appends, so several processes can share one report
+            self._file = open(path, 'a', encoding='utf-8', buffering=1)
+
+    def _note_peak(self, peak):
+        if peak is not None:
+            self.peak_rss = max(self.peak_rss, peak)
+
+    def record(self, record_type, **fields):
+        """Writes one record of the given type."""
+        if self._file is None:
+            return
+        entry = {
+            'run_id': self.run_id,
+            'script': self.script,
+            'type': record_type,
+            'time': datetime.now().isoformat(),
+            **fields
+        }
+        self._file.write(json.dumps(entry) + '\n')
+
+    def stage(self, name, **fields):
+        """Returns a Stage context manager for a named section of the run."""
+        return Stage(self, name, fields)
+
+    def close(self, status='ok', **fields):
+        """Writes the run summary record and closes the report."""
+        self._note_peak(peak_rss_bytes())
+        self.record(
+            'run',
+            status=status,
+            **_Counters().since(self._start),
+            peak_rss_bytes=self.peak_rss or None,
+            children_peak_rss_bytes=children_peak_rss_bytes(),
+            **fields
+        )
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def add_instrumentation_arguments(parser):
+    """Adds the run report and profiling options shared by the pipeline scripts."""
+    parser.add_argument('--report', default=DEFAULT_REPORT_PATH,
+                        help=f'JSON-lines run report to append to (default: {DEFAULT_REPORT_PATH})')
+    parser.add_argument('--no-report', action='store_true', help='Do not write a run report')
+    parser.add_argument('--run-id', default=None, help='Identifier shared by the records of one pipeline run')
+    parser.add_argument('--profile-dir', default=None,
+                        help='Write a cProfile dump of each script run to this directory')
+
+
+def open_run_report(args, script):
+    """Creates the RunReport for parsed arguments and starts profiling when requested."""
+    start_profiler(args.profile_dir, script)
+    return RunReport(None if args.no_report else args.report, script, args.run_id)
+
+
+def start_profiler(profile_dir, name):
+    """Profiles the rest of the process with cProfile and writes <profile_dir>/<name>.prof at exit."""
+    if not profile_dir:
+        return None
+    profiler = cProfile.Profile()
+
+    def dump():
+        profiler.disable()
+        os.makedirs(profile_dir, exist_ok=True)
+        profiler.dump_stats(os.path.join(profile_dir, f"{name}.prof"))
+
+    atexit.register(dump)
+    profiler.enable()
+    return profiler
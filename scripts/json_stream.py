@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Streaming reader and writer for the top-level JSON array in awesome-lists.json.
+
+The writer emits one awesome list at a time, so the whole corpus never has to
+be held in memory. With indent=2 its output is byte-identical to
+json.dump(all_lists, f, indent=2). The reader yields one list at a time from
+an existing file.
+"""
+import json
+
+CHUNK_SIZE = 1 << 16
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = ' \t\n\r'
+
+
+class JsonListWriter:
+    """
+    Writes a JSON array item by item to an open text file.
+    indent=None produces compact output without whitespace.
+    """
+
+    def __init__(self, f, indent=2):
+        self.f = f
+        self.indent = indent
+        self.count = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+
+    def write(self, item):
+        if self.indent is None:
+            text = json.dumps(item, separators=(',', ':'))
+            self.f.write(('[' if self.count == 0 else ',') + text)
+        else:
+            prefix = ' ' * self.indent
+            # JSON strings never contain raw newlines, so re-indenting line by line is safe.
+            text = json.dumps(item, indent=self.indent).replace('\n', '\n' + prefix)
+            self.f.write(('[\n' if self.count == 0 else ',\n') + prefix + text)
+        self.count += 1
+
+    def close(self):
+        if self.count == 0:
+            self.f.write('[]')
+        elif self.indent is None:
+            self.f.write(']')
+        else:
+            self.f.write('\n]')
+
+
+def iter_json_list(f):
+    """
+    Yields the items of a top-level JSON array from an open text file without
+    loading the whole document. At most one item is buffered at a time.
+    """
+    buffer = ''
+    pos = 0
+    eof = False
+
+    def fill():
+        nonlocal buffer, pos, eof
+        # Grow reads with the pending item so a large item is re-parsed only
+        # a logarithmic number of times.
+        chunk = f.read(max(CHUNK_SIZE, len(buffer) - pos))
+        if not chunk:
+            eof = True
+        buffer = buffer[pos:] + chunk
+        pos = 0
+
+    def skip_whitespace():
+        nonlocal pos
+        while True:
+            while pos < len(buffer) and buffer[pos] in _WHITESPACE:
+                pos += 1
+            if pos < len(buffer) or eof:
+                return
+            fill()
+
+    skip_whitespace()
+    if pos >= len(buffer) or buffer[pos] != '[':
+        raise ValueError("Expected a JSON array")
+    pos += 1
+    skip_whitespace()
+    if pos < len(buffer) and buffer[pos] == ']':
+        return
+
+    while True:
+        skip_whitespace()
+        while True:
+            try:
+                item, end = _decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                fill()
+                continue
+            # A number or literal at the end of the buffer may be truncated.
+            if end == len(buffer) and not eof:
+                fill()
+                continue
+            break
+        pos = end
+        yield item
+
+        skip_whitespace()
+        if pos >= len(buffer):
+            raise ValueError("Unterminated JSON array")
+        if buffer[pos] == ']':
+            return
+        if buffer[pos] != ',':
+            raise ValueError(f"Expected ',' or ']' in JSON array, got {buffer[pos]!r}")
+        pos += 1
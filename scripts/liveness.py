@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+"""
+Link liveness checks.
+
+LivenessChecker probes URLs concurrently with asyncio and aiohttp: a HEAD
+request, retried as GET when the server fails or rejects the HEAD. Open
+connections are bounded per host, and request starts to the same host are
+spaced out to a rate limit. Results are kept in a JSON cache file and reused
+until they expire, so a nightly run only probes new URLs and stale results.
+
+A URL is dead only when the server answers 404 or 410, or its host name does
+not exist. Timeouts, server errors, TLS failures and the like are recorded
+as errors and the resource is kept, so a host that is briefly down does not
+lose its resources. When more than MAX_DEAD_SHARE of all URLs come out dead,
+the network rather than the links is assumed broken (no DNS, say), and the
+new results are discarded instead of emptying the data.
+
+aiohttp is optional; without it, liveness checks are unavailable. asyncio
+and aiohttp are only imported when the first checker is created: they take
+longer to import than a short command takes to run.
+"""
+import os
+import json
+import time
+import socket
+import random
+import logging
+from urllib.parse import urlsplit
+
+# Set by _import_aiohttp
+asyncio = None
+aiohttp = None
+
+from scripts.atomic import atomic_write
+
+LIVENESS_CACHE_VERSION = 1
+LIVENESS_CACHE_NAME = '.liveness-cache.json'
+
+ALIVE = 'alive'
+DEAD = 'dead'
+ERROR = 'error'
+# Seconds a result is reused. Dead and failed URLs are probed again sooner,
+# so a wrong verdict does not stick for long.
+RESULT_TTL = {ALIVE: 7 * 86400, DEAD: 86400, ERROR: 86400}
+# Expiry is spread over up to this share of the TTL, so results probed in the
+# same run do not all go stale on the same night
+TTL_JITTER = 0.5
+# Entries expired for longer than this are dropped from the cache file
+CACHE_RETENTION = 30 * 86400
+DEAD_STATUSES = frozenset([404, 410])
+MAX_DEAD_SHARE = 0.2
+
+DEFAULT_CONCURRENCY = 64
+DEFAULT_PER_HOST = 4
+DEFAULT_RATE = 5.0
+DEFAULT_TIMEOUT = 15.0
+USER_AGENT = 'iQuantum-link-checker/1.0'
+PROGRESS_INTERVAL = 1000
+
+
+class LivenessCache:
+    """Probe results by URL, loaded from and saved to a JSON file."""
+
+    def __init__(self, path):
+        self.path = path
+        self.entries = {}
+        if not path or not os.path.exists(path):
+            return
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == LIVENESS_CACHE_VERSION:
+                self.entries = data.get('entries', {})
+        except (OSError, ValueError) as e:
+            logging.warning("Ignoring unreadable liveness cache %s: %s", path, e)
+
+    def get(self, url, now):
+        """Returns the cached result for url, or None if there is none or it expired."""
+        entry = self.entries.get(url)
+        if entry is None or entry['expires'] <= now:
+            return None
+        return entry
+
+    def put(self, url, result):
+        self.entries[url] = result
+
+    def save(self, now=None):
+        """Writes the cache, dropping long expired entries."""
+        if not self.path:
+            return
+        now = time.time() if now is None else now
+        entries = {url: entry for url, entry in self.entries.items() if entry['expires'] > now - CACHE_RETENTION}
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        with atomic_write(self.path) as f:
+            json.dump({'version': LIVENESS_CACHE_VERSION, 'entries': entries}, f, separators=(',', ':'))
+
+
+def _import_aiohttp():
+    """Imports asyncio and aiohttp into this module. False when aiohttp is not installed."""
+    global asyncio, aiohttp
+    if aiohttp is None:
+        try:
+            import aiohttp as aiohttp_module  # type: ignore
+        except ImportError:
+            return False
+        import asyncio as asyncio_module
+        asyncio, aiohttp = asyncio_module, aiohttp_module
+    return True
+
+
+class _HostRateLimiter:
+    """Spaces out request starts to each host to at most rate per second."""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate else 0.0
+        self._next_slot = {}
+
+    async def wait(self, host):
+        if not self.interval:
+            return
+        now = asyncio.get_running_loop().time()
+        slot = max(now, self._next_slot.get(host, now))
+        self._next_slot[host] = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+def _result(status, code=None, error=None, now=None):
+    now = time.time() if now is None else now
+    ttl = RESULT_TTL[status]
+    result = {
+        'status': status,
+        'code': code,
+        'checked': round(now),
+        'expires': round(now + ttl + random.uniform(0, ttl * TTL_JITTER))
+    }
+    if error:
+        result['error'] = error
+    return result
+
+
+def _classify_status(code):
+    if code in DEAD_STATUSES:
+        return DEAD
+    return ALIVE if code < 400 else ERROR
+
+
+def _is_unknown_host(error):
+    os_error = getattr(error, 'os_error', None)
+    return isinstance(os_error, socket.gaierror) and os_error.errno == socket.EAI_NONAME
+
+
+class LivenessChecker:
+    """
+    Probes URLs that have no fresh result in cache and caches the new
+    results. Counters for the last check are kept in stats.
+    """
+
+    def __init__(self, cache, concurrency=DEFAULT_CONCURRENCY, per_host=DEFAULT_PER_HOST, rate=DEFAULT_RATE,
+                 timeout=DEFAULT_TIMEOUT):
+        if not _import_aiohttp():
+            raise RuntimeError("Liveness checks need aiohttp (pip install aiohttp)")
+        self.cache = cache
+        self.concurrency = concurrency
+        self.per_host = per_host
+        self.rate = rate
+        self.timeout = timeout
+        self.stats = {}
+
+    def check(self, urls):
+        """Returns a result dict per URL and stores the new results in the cache."""
+        now = time.time()
+        results = {}
+        stale = []
+        for url in urls:
+            cached = self.cache.get(url, now)
+            if cached is None:
+                stale.append(url)
+            else:
+                results[url] = cached
+        self.stats = {'urls': len(results) + len(stale), 'cached': len(results), 'probed': len(stale)}
+        logging.info(f"Liveness: {len(results)} cached results, probing {len(stale)} URLs")
+
+        if stale:
+            probed = asyncio.run(self._probe_all(stale))
+            dead = sum(result['status'] == DEAD for result in (*results.values(), *probed.values()))
+            if dead > MAX_DEAD_SHARE * self.stats['urls']:
+                logging.error("Liveness: %d of %d URLs look dead; assuming a network problem and "
+                              "discarding this run's probes", dead, self.stats['urls'])
+                self.stats['discarded'] = len(probed)
+            else:
+                for url, result in probed.items():
+                    self.cache.put(url, result)
+                results.update(probed)
+        for status in (ALIVE, DEAD, ERROR):
+            self.stats[status] = sum(result['status'] == status for result in results.values())
+        return results
+
+    async def _probe_all(self, urls):
+        limiter = _HostRateLimiter(self.rate)
+        # Bounds in-flight requests; the connector bounds connections per host
+        semaphore = asyncio.Semaphore(self.concurrency)
+        connector = aiohttp.TCPConnector(limit=self.concurrency, limit_per_host=self.per_host, ttl_dns_cache=300)
+        # Socket-level timeouts, so time spent waiting for a pooled connection does not count
+        timeout = aiohttp.ClientTimeout(total=None, sock_connect=self.timeout, sock_read=self.timeout)
+        results = {}
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout,
+                                         headers={'User-Agent': USER_AGENT}) as session:
+            tasks = [asyncio.ensure_future(self._probe(session, limiter, semaphore, url)) for url in urls]
+            for done, task in enumerate(asyncio.as_completed(tasks), 1):
+                url, result = await task
+                results[url] = result
+                if done % PROGRESS_INTERVAL == 0:
+                    logging.info(f"Liveness: probed {done} of {len(urls)} URLs")
+        return results
+
+    async def _probe(self, session, limiter, semaphore, url):
+        try:
+            return url, await self._probe_url(session, limiter, semaphore, url)
+        except Exception as e:
+            # A URL the client cannot handle at all (an invalid IPv6 host, a label
+            # IDNA rejects, ...) fails its own probe rather than the whole check
+            logging.debug("Liveness: could not probe '%s': %r", url, e)
+            return url, _result(ERROR, error=f"{type(e).__name__}: {e}")
+
+    async def _probe_url(self, session, limiter, semaphore, url):
+        host = urlsplit(url).hostname or ''
+        await limiter.wait(host)
+        async with semaphore:
+            try:
+                code = await self._request(session, 'HEAD', url)
+                if code < 400:
+                    return _result(ALIVE, code)
+            except asyncio.TimeoutError:
+                return _result(ERROR, error='timeout')
+            except aiohttp.ClientError as e:
+                if _is_unknown_host(e):
+                    return _result(DEAD, error='unknown host')
+            # Some servers refuse or mishandle HEAD, so a failure is retried as GET
+            await limiter.wait(host)
+            try:
+                code = await self._request(session, 'GET', url)
+                return _result(_classify_status(code), code)
+            except asyncio.TimeoutError:
+                return _result(ERROR, error='timeout')
+            except aiohttp.ClientError as e:
+                return _result(ERROR, error=str(e) or type(e).__name__)
+
+    async def _request(self, session, method, url):
+        # The body is never read; only the status matters
+        async with session.request(method, url, allow_redirects=True) as response:
+            return response.status
+
+
+def iter_live_lists(lists, results, stats):
+    """
+    Drops resources whose URL is dead according to results, and the
+    categories and lists left empty. Resources without a result are kept.
+    """
+    stats.setdefault('dead_resources', 0)
+    for awesome_list in lists:
+        categories = []
+        dead = 0
+        for category in awesome_list.categories:
+            resources = []
+            for resource in category.resources:
+                result = results.get(resource.url)
+                if result is not None and result['status'] == DEAD:
+                    dead += 1
+                    logging.debug("Removing resource '%s' with dead URL: '%s' (%s)", resource.name or 'Unknown',
+                                  resource.url, result.get('code') or result.get('error'))
+                else:
+                    resources.append(resource)
+            if len(resources) == len(category.resources):
+                if resources:
+                    categories.append(category)
+            elif resources:
+                categories.append(category.with_resources(resources))
+        if dead:
+            stats['dead_resources'] += dead
+            logging.info("Removed %d resources with dead URLs from %s", dead, awesome_list.name)
+        if categories:
+            yield awesome_list.with_categories(categories)
+
+
+def add_liveness_arguments(parser):
+    """Adds the liveness check options shared by the scripts that can run it."""
+    parser.add_argument('--check-liveness', action='store_true',
+                        help='Probe every URL over HTTP and drop resources whose link is dead (needs aiohttp)')
+    parser.add_argument('--liveness-cache', default=None,
+                        help=f'Liveness result cache (default: {LIVENESS_CACHE_NAME} next to the data)')
+    parser.add_argument('--liveness-concurrency', type=int, default=DEFAULT_CONCURRENCY,
+                        help='Maximum number of requests in flight')
+    parser.add_argument('--liveness-per-host', type=int, default=DEFAULT_PER_HOST,
+                        help='Maximum number of connections to one host')
+    parser.add_argument('--liveness-rate', type=float, default=DEFAULT_RATE,
+                        help='Maximum requests per second to one host (0 for no limit)')
+    parser.add_argument('--liveness-timeout', type=float, default=DEFAULT_TIMEOUT,
+                        help='Connect and read timeout per request in seconds')
+
+
+def liveness_options(args):
+    """LivenessChecker keyword arguments from parsed add_liveness_arguments options."""
+    return {
+        'concurrency': args.liveness_concurrency,
+        'per_host': args.liveness_per_host,
+        'rate': args.liveness_rate,
+        'timeout': args.liveness_timeout
+    }
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Shared logging setup for the scripts.
+
+configure_logging(name, level) sends every record through a QueueHandler to
+a QueueListener thread, which writes logs/<name>.log and, when asked, the
+console. The code that logs only pays for putting a record on a queue; file
+and console I/O happen on the listener thread. Messages use lazy %-style
+arguments, so a record below the configured level is never formatted.
+
+Warnings repeated with the same message template are let through
+REPEAT_LIMIT times and counted after that; the counts are logged once when
+logging shuts down. Worker processes log the same way after calling
+init_worker_logging with worker_logging_config() from the parent.
+
+Scripts configure logging in main(), so importing one script from another
+no longer decides where the other's records go. The exit handler that
+flushes the writer is registered by configure_logging too, not on import.
+"""
+import os
+import queue
+import atexit
+import logging
+import threading
+from collections import Counter
+from logging.handlers import QueueHandler, QueueListener
+
+LOG_DIR = 'logs'
+LOG_FORMAT = '%(asctime)s %(levelname)s: %(message)s'
+LOG_LEVELS = ('DEBUG', 'INFO', 'WARNING', 'ERROR')
+DEFAULT_LOG_LEVEL = 'INFO'
+REPEAT_LIMIT = 20
+
+_listener = None
+_repeats = None
+_config = None
+_pid = None
+_exit_registered = False
+
+
+class RepeatFilter(logging.Filter):
+    """Lets through the first limit warnings of each message template and counts the rest."""
+
+    def __init__(self, limit=REPEAT_LIMIT):
+        super().__init__()
+        self.limit = limit
+        self.counts = Counter()
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if record.levelno != logging.WARNING:
+            return True
+        key = (record.name, str(record.msg))
+        with self._lock:
+            self.counts[key] += 1
+            return self.counts[key] <= self.limit
+
+    def suppressed(self):
+        """(message template, suppressed count) for every template over the limit."""
+        return [(msg, count - self.limit) for (_, msg), count in self.counts.items() if count > self.limit]
+
+
+def configure_logging(name, level=DEFAULT_LOG_LEVEL, console=False):
+    """
+    Routes the root logger through a background writer to logs/<name>.log,
+    and to stderr with console. Replaces any earlier configuration.
+    """
+    global _listener, _repeats, _config, _pid, _exit_registered
+    stop_logging()
+    if not _exit_registered:
+        # Registered here rather than on import, so importing a script has no side effects
+        atexit.register(stop_logging)
+        _exit_registered = True
+    os.makedirs(LOG_DIR, exist_ok=True)
+
+    formatter = logging.Formatter(LOG_FORMAT)
+    handlers = [logging.FileHandler(os.path.join(LOG_DIR, f"{name}.log"))]
+    if console:
+        handlers.append(logging.StreamHandler())
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    records = queue.SimpleQueue()
+    queue_handler = QueueHandler(records)
+    _repeats = RepeatFilter()
+    queue_handler.addFilter(_repeats)
+
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+        handler.close()
+    root.addHandler(queue_handler)
+    root.setLevel(level.upper() if isinstance(level, str) else level)
+
+    _listener = QueueListener(records, *handlers)
+    _listener.start()
+    _config = (name, level, console)
+    _pid = os.getpid()
+
+
+def stop_logging():
+    """Logs the suppressed warning counts and waits for the writer to finish. Called at exit."""
+    global _listener
+    # A forked worker inherits the parent's listener, whose thread only runs in the parent
+    if _listener is None or _pid != os.getpid():
+        _listener = None
+        return
+    suppressed = _repeats.suppressed()
+    if suppressed:
+        logging.getLogger().handle(logging.LogRecord(
+            'root', logging.WARNING, __file__, 0, 'Suppressed repeated warnings: %s', (
+                '; '.join(f"{count} more of '{msg}'" for msg, count in suppressed),
+            ), None))
+    _listener.stop()
+    for handler in _listener.handlers:
+        handler.close()
+    _listener = None
+
+
+def worker_logging_config():
+    """The arguments for init_worker_logging that make a worker process log like this one."""
+    return _config
+
+
+def init_worker_logging(config):
+    """Process pool initializer: logs like the parent configured by configure_logging, if it was."""
+    if config is None:
+        return
+    configure_logging(*config)
+    # Pool workers leave through os._exit, which skips atexit handlers
+    from multiprocessing.util import Finalize
+    Finalize(None, stop_logging, exitpriority=10)
+
+
+def add_logging_arguments(parser):
+    parser.add_argument('--log-level', choices=LOG_LEVELS, default=DEFAULT_LOG_LEVEL,
+                        help='Lowest level of messages to log')
@@ -3,8 +3,20 @@
 Main script to update and filter awesome lists data.
 This script orchestrates the complete workflow:
 1. Clone/update awesome lists repositories
-2. Extract data from the repositories with URL filtering
-3. Update metadata
+2. Extract data from the repositories with URL filtering, with
+   --check-liveness drop resources whose link is dead, and with
+   --repo-metadata add stars, last commit and archived status to GitHub
+   resources
+3. Build the prebuilt search index for the frontend
+4. Publish minified, compressed and content-addressed artifacts
+5. Diff against the previous extraction
+6. Update metadata, unless the data did not change
+
+All steps run in this process as the stages of scripts/pipeline.py. With
+--watch the script keeps running and repeats the update whenever a source
+README changes, polling the remotes of the repositories (see scripts/watch.py).
+With --shard K/N only steps 1 and 2 run, for shard K of N of the lists, and
+scripts/merge_shards.py runs the rest on the partial results of all shards.
 """
 
 import os
@@ -14,90 +26,247 @@ import sys
 from pathlib import Path
 import time
 
-# Add the current directory to the path to import our modules
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Add the repository root to the path to import our modules when run as a script
+if not __package__:
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 # Import the update script
 from scripts.update_awesome_lists import (
-    clone_or_update_repo, 
-    update_metadata, 
-    run_command, 
-    AWESOME_REPOS
+    print_sync_summary,
+    load_sources,
+    DEFAULT_JOBS,
+    FETCH_MODES,
+    DEFAULT_FETCH_MODE
 )
-
-# Ensure logs directory exists
-os.makedirs('logs', exist_ok=True)
-
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s %(levelname)s: %(message)s',
-    handlers=[
-        logging.FileHandler('logs/main.log'),
-        logging.StreamHandler()  # Also log to console
-    ]
+from scripts.build_search_index import INDEX_DIR_NAME
+from scripts.pipeline import (
+    run_pipeline,
+    sync,
+    with_liveness_check,
+    with_repo_metadata,
+    DEFAULT_STAGES,
+    SHARD_STAGES
 )
+from scripts.shards import parse_shard
+from scripts.liveness import add_liveness_arguments, liveness_options
+from scripts.repo_metadata import add_repo_metadata_arguments, repo_metadata_options
+from scripts.storage import STORAGE_FORMATS
+from scripts.watch import watch, DEFAULT_INTERVAL
+from scripts.instrumentation import add_instrumentation_arguments, open_run_report, RunReport
+from scripts.log_setup import configure_logging, add_logging_arguments
 
-def main():
-    parser = argparse.ArgumentParser(description='Update and filter awesome lists data')
-    parser.add_argument('--source-dir', default='awesome-lists-sources', help='Directory to store repositories')
-    parser.add_argument('--output-dir', default='data', help='Directory for output files')
-    parser.add_argument('--skip-update', action='store_true', help='Skip repository updates')
-    args = parser.parse_args()
-    
-    # Ensure logs and data directories exist
-    os.makedirs('logs', exist_ok=True)
-    os.makedirs(args.output_dir, exist_ok=True)
+def build_stages(args, sync_sources=True):
+    """Returns the pipeline stages for the parsed options."""
+    stages = SHARD_STAGES if args.shard else DEFAULT_STAGES
+    if not sync_sources:
+        stages = tuple(stage for stage in stages if stage is not sync)
+    if args.check_liveness:
+        stages = with_liveness_check(stages)
+    if args.repo_metadata:
+        stages = with_repo_metadata(stages)
+    return stages
+
+def run_shard(args, stages, report):
+    """Syncs and extracts the lists of one shard. Returns the exit code."""
+    start_time = time.time()
+    index, count = args.shard
+    logging.info(f"Starting shard {index}/{count} (run {report.run_id})")
+    try:
+        output_dir = Path(args.output_dir)
+        with report.stage('pipeline', engine=args.engine, workers=args.workers, shard=f"{index}/{count}") as stage:
+            pipeline = run_pipeline(
+                args.source_dir,
+                output_dir,
+                stages=stages,
+                jobs=args.jobs,
+                timeout=args.timeout,
+                fetch_mode=args.fetch_mode,
+                workers=args.workers,
+                engine=args.engine,
+                cache_dir=output_dir / '.extract-cache',
+                shard=args.shard,
+                shards_dir=args.shards_dir,
+                report=report
+            )
+            stage['lists_written'] = pipeline.lists_written
+            stage['cache_hits'] = pipeline.stats['cache_hits']
+        
+        if pipeline.sync_results is not None:
+            print_sync_summary(pipeline.sync_results)
+        report.close(status='ok')
+        elapsed_time = time.time() - start_time
+        logging.info(f"Shard {index}/{count} completed in {elapsed_time:.2f} seconds")
+        print(f"\nExtracted {pipeline.lists_written} lists of shard {index}/{count} in {elapsed_time:.2f} seconds")
+        print(f"Partial result saved to {pipeline.shards_dir}; run scripts/merge_shards.py once every shard is done")
+        return 0
     
+    except Exception as e:
+        logging.error("Error in shard %s/%s: %s", index, count, e, exc_info=True)
+        print(f"Error: {e}")
+        report.close(status='failed', error=str(e))
+        return 1
+
+def run_update(args, stages, report):
+    """Runs the pipeline once, prints its summary and closes report. Returns the exit code."""
     start_time = time.time()
-    logging.info("Starting awesome lists main process")
+    logging.info(f"Starting awesome lists main process (run {report.run_id})")
     
     try:
         source_dir = Path(args.source_dir)
         output_dir = Path(args.output_dir)
         
-        # Step 1: Clone or update repositories (unless skipped)
-        if not args.skip_update:
+        # The stages run in this process and pass each parsed list straight
+        # on to the writers, so nothing is re-read from disk between steps
+        if sync in stages:
             logging.info("Updating repositories...")
-            os.makedirs(source_dir, exist_ok=True)
-            
-            for repo_url in AWESOME_REPOS:
-                clone_or_update_repo(repo_url, source_dir)
         else:
-            logging.info("Skipping repository updates as requested")
+            logging.info("Skipping repository updates")
         
-        # Step 2: Extract and filter data
-        extract_script = Path("scripts/extract_data.py")
-        if extract_script.exists():
-            logging.info("Running extraction with URL filtering...")
-            output_path = output_dir / "awesome-lists.json"
-            
-            result = run_command(
-                f"python {extract_script} --source-dir {source_dir} --output {output_path} --filter-urls --url-stats"
+        logging.info("Running extraction with URL filtering...")
+        with report.stage('pipeline', engine=args.engine, workers=args.workers) as stage:
+            pipeline = run_pipeline(
+                source_dir,
+                output_dir,
+                stages=stages,
+                jobs=args.jobs,
+                timeout=args.timeout,
+                fetch_mode=args.fetch_mode,
+                workers=args.workers,
+                engine=args.engine,
+                cache_dir=output_dir / '.extract-cache',
+                liveness_cache=args.liveness_cache,
+                liveness_options=liveness_options(args),
+                repo_metadata_cache=args.repo_metadata_cache,
+                repo_metadata_options=repo_metadata_options(args),
+                storage=args.storage,
+                compress_artifacts=args.compress_artifacts,
+                report=report
             )
-            
-            if not result:
-                logging.error("Extraction failed. Check logs for details.")
-                return 1
-            
-            # Step 3: Update metadata
-            update_metadata(output_dir)
-        else:
-            logging.error(f"Extraction script not found: {extract_script}")
-            return 1
+            stats = pipeline.stats
+            stage['lists_written'] = pipeline.lists_written
+            stage['cache_hits'] = stats['cache_hits']
+            stage['resources'] = stats['total_resources']
+            stage['invalid_urls'] = stats['invalid_urls']
+            stage['duplicate_resources'] = stats['duplicate_resources']
+            if pipeline.liveness is not None:
+                stage['dead_resources'] = stats['dead_resources']
+                for key, value in pipeline.liveness.items():
+                    stage[f"liveness_{key}"] = value
+            if pipeline.repo_metadata is not None:
+                stage['repositories_written'] = stats['repositories_written']
+                for key, value in pipeline.repo_metadata.items():
+                    stage[f"repo_metadata_{key}"] = value
+            for kind, entry in pipeline.artifacts['awesome-lists'].items():
+                if isinstance(entry, dict):
+                    stage[f"{kind}_bytes"] = entry['bytes']
+            if pipeline.changes is not None:
+                for key in ('added', 'removed', 'modified'):
+                    stage[key] = pipeline.changes[key]
+        
+        if pipeline.sync_results is not None:
+            print_sync_summary(pipeline.sync_results)
+        
+        total_resources = stats['total_resources']
+        valid_urls = stats['valid_urls']
+        invalid_urls = stats['invalid_urls']
+        print("\nURL Statistics:")
+        print(f"Total resources: {total_resources}")
+        print(f"Valid URLs: {valid_urls} ({valid_urls/max(total_resources, 1)*100:.1f}%)")
+        print(f"Invalid URLs: {invalid_urls} ({invalid_urls/max(total_resources, 1)*100:.1f}%)")
+        print(f"Duplicate resources: {stats['duplicate_resources']}")
+        print(f"URLs in more than one list: {pipeline.duplicates['cross_list']}")
+        if pipeline.liveness is not None:
+            liveness = pipeline.liveness
+            print(f"Link check: {liveness['probed']} probed, {liveness['cached']} cached; "
+                  f"{liveness['dead']} dead, {liveness['error']} unreachable")
+            if liveness.get('discarded'):
+                print(f"Warning: discarded {liveness['discarded']} probe results; too many links looked dead")
+            print(f"Removed {stats['dead_resources']} resources with dead links")
+        if pipeline.repo_metadata is not None:
+            repo_metadata = pipeline.repo_metadata
+            print(f"Repository metadata: {repo_metadata['repositories']} repositories, "
+                  f"{repo_metadata['cached']} cached, {repo_metadata['looked_up']} looked up "
+                  f"in {repo_metadata['requests']} requests; {repo_metadata['missing']} missing, "
+                  f"{repo_metadata['unknown']} left for the next run")
+            print(f"Saved the metadata of {stats['repositories_written']} repositories to {pipeline.repositories_path}")
         
         elapsed_time = time.time() - start_time
+        report.close(status='ok')
         logging.info(f"Main process completed successfully in {elapsed_time:.2f} seconds")
         print(f"\nProcess completed successfully in {elapsed_time:.2f} seconds")
-        print(f"Data saved to {output_dir}/awesome-lists.json")
-        print(f"Metadata updated at {output_dir}/metadata.json")
+        for path in pipeline.storage_paths:
+            print(f"Data saved to {path}")
+        print(f"Search index saved to {output_dir / INDEX_DIR_NAME}")
+        if pipeline.metadata_updated:
+            print(f"Metadata updated at {output_dir}/metadata.json")
+        if report.path:
+            print(f"Run report appended to {report.path} (run {report.run_id})")
         
         return 0
         
     except Exception as e:
-        logging.error(f"Error in main process: {e}", exc_info=True)
+        logging.error("Error in main process: %s", e, exc_info=True)
         print(f"Error: {e}")
+        report.close(status='failed', error=str(e))
         return 1
 
+def main():
+    parser = argparse.ArgumentParser(description='Update and filter awesome lists data')
+    parser.add_argument('--source-dir', default='awesome-lists-sources', help='Directory to store repositories')
+    parser.add_argument('--output-dir', default='data', help='Directory for output files')
+    parser.add_argument('--skip-update', action='store_true', help='Skip repository updates')
+    parser.add_argument('--jobs', type=int, default=DEFAULT_JOBS, help='Number of repositories to sync concurrently')
+    parser.add_argument('--timeout', type=float, default=None, help='Per-repository sync timeout in seconds')
+    parser.add_argument('--fetch-mode', choices=FETCH_MODES, default=DEFAULT_FETCH_MODE,
+                        help='How much of each repository to fetch (full, shallow or readme)')
+    parser.add_argument('--workers', type=int, default=1, help='Number of processes used to parse READMEs')
+    parser.add_argument('--engine', choices=('bs4', 'fast'), default='bs4', help='Markdown extraction engine')
+    parser.add_argument('--storage', nargs='+', choices=STORAGE_FORMATS, default=['json'],
+                        help='Formats to write the corpus in (json, sqlite); the first is diffed against')
+    parser.add_argument('--compress-artifacts', action='store_true',
+                        help='Also publish .gz and .br variants of the data (for deployments serving precompressed files)')
+    parser.add_argument('--watch', action='store_true',
+                        help='Keep running after the update and update again whenever a source README changes')
+    parser.add_argument('--interval', type=float, default=DEFAULT_INTERVAL,
+                        help='Seconds between checks for changes in --watch mode')
+    parser.add_argument('--shard', type=parse_shard, default=None, metavar='K/N',
+                        help='Only sync and extract shard K of N of the lists, for merge_shards.py to combine')
+    parser.add_argument('--shards-dir', default=None,
+                        help='Directory for the partial result of --shard (default: <output-dir>/shards)')
+    add_liveness_arguments(parser)
+    add_repo_metadata_arguments(parser)
+    add_instrumentation_arguments(parser)
+    add_logging_arguments(parser)
+    args = parser.parse_args()
+    if args.shard and (args.watch or args.check_liveness or args.repo_metadata):
+        parser.error('--shard cannot be combined with --watch, --check-liveness or --repo-metadata; '
+                     'merge_shards.py runs the link check and the metadata lookup')
+    
+    configure_logging('main', args.log_level, console=True)
+    os.makedirs(args.output_dir, exist_ok=True)
+    
+    report = open_run_report(args, 'main')
+    if args.skip_update:
+        logging.info("Skipping repository updates as requested")
+    if args.shard:
+        return run_shard(args, build_stages(args, sync_sources=not args.skip_update), report)
+    status = run_update(args, build_stages(args, sync_sources=not args.skip_update), report)
+    if not args.watch:
+        return status
+    
+    # Later updates sync only the repositories whose remote moved, which
+    # watch does itself before calling update, then run the full pipeline;
+    # the extraction cache skips the lists whose README did not change
+    def update():
+        report = RunReport(None if args.no_report else args.report, 'main')
+        return run_update(args, build_stages(args, sync_sources=False), report) == 0
+    
+    try:
+        watch(update, args.source_dir, repos=None if args.skip_update else load_sources(args.output_dir),
+              interval=args.interval, jobs=args.jobs, timeout=args.timeout, fetch_mode=args.fetch_mode)
+    except KeyboardInterrupt:
+        logging.info("Stopped watching")
+    return status
+
 if __name__ == "__main__":
     sys.exit(main())
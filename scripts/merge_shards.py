@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Merge the partial results of a sharded run.
+
+After `main.py --shard K/N` ran for every K from 1 to N, on one host or
+several (with their shards directories copied into one), this script reads
+the partial results back in the order of the source directories and runs
+the remaining steps of the update: URL filtering and, with
+--check-liveness and --repo-metadata, the link check and the repository
+metadata lookup, then the corpus, search index, artifacts, changes and
+metadata.json. The output is the same as that of a single main.py run over
+all the lists. See scripts/shards.py.
+"""
+import os
+import sys
+import time
+import argparse
+import logging
+from pathlib import Path
+
+# Add the repository root to the path to import our modules when run as a script
+if not __package__:
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.pipeline import run_pipeline, with_liveness_check, with_repo_metadata, MERGE_STAGES
+from scripts.liveness import add_liveness_arguments, liveness_options
+from scripts.repo_metadata import add_repo_metadata_arguments, repo_metadata_options
+from scripts.storage import STORAGE_FORMATS
+from scripts.instrumentation import add_instrumentation_arguments, open_run_report
+from scripts.log_setup import configure_logging, add_logging_arguments
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Merge the partial results of a sharded extraction')
+    parser.add_argument('--output-dir', default='data', help='Directory for output files')
+    parser.add_argument('--shards-dir', default=None,
+                        help='Directory holding the shard-K-of-N directories (default: <output-dir>/shards)')
+    parser.add_argument('--storage', nargs='+', choices=STORAGE_FORMATS, default=['json'],
+                        help='Formats to write the corpus in (json, sqlite); the first is diffed against')
+    parser.add_argument('--compress-artifacts', action='store_true',
+                        help='Also publish .gz and .br variants of the data (for deployments serving precompressed files)')
+    add_liveness_arguments(parser)
+    add_repo_metadata_arguments(parser)
+    add_instrumentation_arguments(parser)
+    add_logging_arguments(parser)
+    args = parser.parse_args()
+
+    configure_logging('merge_shards', args.log_level, console=True)
+    report = open_run_report(args, 'merge_shards')
+    stages = with_liveness_check(MERGE_STAGES) if args.check_liveness else MERGE_STAGES
+    if args.repo_metadata:
+        stages = with_repo_metadata(stages)
+    start_time = time.time()
+
+    try:
+        output_dir = Path(args.output_dir)
+        with report.stage('merge') as stage:
+            pipeline = run_pipeline(
+                output_dir=output_dir,
+                stages=stages,
+                liveness_cache=args.liveness_cache,
+                liveness_options=liveness_options(args),
+                repo_metadata_cache=args.repo_metadata_cache,
+                repo_metadata_options=repo_metadata_options(args),
+                storage=args.storage,
+                compress_artifacts=args.compress_artifacts,
+                shards_dir=args.shards_dir,
+                report=report
+            )
+            stats = pipeline.stats
+            stage['shards'] = pipeline.shards
+            stage['lists_written'] = pipeline.lists_written
+            stage['resources'] = stats['total_resources']
+            stage['invalid_urls'] = stats['invalid_urls']
+            stage['duplicate_resources'] = stats['duplicate_resources']
+    except Exception as e:
+        logging.error("Error merging shards: %s", e, exc_info=True)
+        print(f"Error: {e}")
+        report.close(status='failed', error=str(e))
+        return 1
+
+    report.close(status='ok')
+    elapsed_time = time.time() - start_time
+    logging.info(f"Merged {pipeline.shards} shards in {elapsed_time:.2f} seconds")
+    print(f"\nMerged {pipeline.lists_written} lists from {pipeline.shards} shards in {elapsed_time:.2f} seconds")
+    print(f"Total resources: {stats['total_resources']} ({stats['invalid_urls']} with invalid URLs removed)")
+    if pipeline.liveness is not None:
+        print(f"Removed {stats['dead_resources']} resources with dead links")
+    if pipeline.repo_metadata is not None:
+        print(f"Saved the metadata of {stats['repositories_written']} repositories to {pipeline.repositories_path}")
+    for path in pipeline.storage_paths:
+        print(f"Data saved to {path}")
+    if pipeline.metadata_updated:
+        print(f"Metadata updated at {output_dir / 'metadata.json'}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+In-memory model of the awesome lists corpus.
+
+AwesomeList, Category and Resource hold what awesome-lists.json holds, in
+slotted objects instead of one dict per item. Every resource would otherwise
+carry its own dict, with the four keys, and its own tags list. List, category
+and tag names are interned, so a name that comes up in many places is kept in
+memory once. Tags are stored as a tuple, and resources without tags all share
+the empty tuple.
+
+Keys outside the schema are kept in extra and written back after the known
+ones. For the data this repository writes, to_dict() gives exactly the dicts
+from_dict() was given, so serialized output does not change. Missing keys
+come back with their defaults.
+"""
+import sys
+
+LIST_KEYS = ('name', 'categories')
+CATEGORY_KEYS = ('name', 'resources')
+RESOURCE_KEYS = ('name', 'url', 'description', 'tags')
+
+_LIST_KEY_SET = frozenset(LIST_KEYS)
+_CATEGORY_KEY_SET = frozenset(CATEGORY_KEYS)
+_RESOURCE_KEY_SET = frozenset(RESOURCE_KEYS)
+
+
+def intern_string(value):
+    """Returns the interned copy of a str, or value unchanged if it is anything else."""
+    return sys.intern(value) if type(value) is str else value
+
+
+def _extra(data, keys):
+    if data.keys() <= keys:
+        return None
+    return {key: value for key, value in data.items() if key not in keys}
+
+
+class Resource:
+    """One resource of a category: a link with its description and tags."""
+
+    __slots__ = ('name', 'url', 'description', 'tags', 'extra')
+
+    def __init__(self, name, url, description='', tags=(), extra=None):
+        self.name = name
+        self.url = url
+        self.description = description
+        self.tags = tuple(map(intern_string, tags)) if tags else ()
+        self.extra = extra or None
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data.get('name'), data.get('url'), data.get('description'), data.get('tags'),
+                   _extra(data, _RESOURCE_KEY_SET))
+
+    def to_dict(self):
+        data = {'name': self.name, 'url': self.url, 'description': self.description, 'tags': list(self.tags)}
+        if self.extra:
+            data.update(self.extra)
+        return data
+
+    def _fields(self):
+        return self.name, self.url, self.description, self.tags, self.extra
+
+    def __eq__(self, other):
+        if type(other) is not Resource:
+            return NotImplemented
+        return self._fields() == other._fields()
+
+    __hash__ = None
+
+    def __reduce__(self):
+        # Pickles as a constructor call, so names are interned again in the
+        # process that loads them (extraction workers send resources back)
+        return Resource, self._fields()
+
+    def __repr__(self):
+        return f"Resource(name={self.name!r}, url={self.url!r})"
+
+
+class Category:
+    """A named section of an awesome list and its resources."""
+
+    __slots__ = ('name', 'resources', 'extra')
+
+    def __init__(self, name, resources=None, extra=None):
+        self.name = intern_string(name)
+        self.resources = resources if resources is not None else []
+        self.extra = extra or None
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data.get('name'), [Resource.from_dict(resource) for resource in data.get('resources') or ()],
+                   _extra(data, _CATEGORY_KEY_SET))
+
+    def to_dict(self):
+        data = {'name': self.name, 'resources': [resource.to_dict() for resource in self.resources]}
+        if self.extra:
+            data.update(self.extra)
+        return data
+
+    def with_resources(self, resources):
+        """Returns a copy of the category holding resources instead."""
+        return Category(self.name, resources, self.extra)
+
+    def __eq__(self, other):
+        if type(other) is not Category:
+            return NotImplemented
+        return (self.name, self.resources, self.extra) == (other.name, other.resources, other.extra)
+
+    __hash__ = None
+
+    def __reduce__(self):
+        return Category, (self.name, self.resources, self.extra)
+
+    def __repr__(self):
+        return f"Category(name={self.name!r}, resources={len(self.resources)})"
+
+
+class AwesomeList:
+    """One awesome list, as parsed from its README."""
+
+    __slots__ = ('name', 'categories', 'extra')
+
+    def __init__(self, name, categories=None, extra=None):
+        self.name = intern_string(name)
+        self.categories = categories if categories is not None else []
+        self.extra = extra or None
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data.get('name'), [Category.from_dict(category) for category in data.get('categories') or ()],
+                   _extra(data, _LIST_KEY_SET))
+
+    def to_dict(self):
+        data = {'name': self.name, 'categories': [category.to_dict() for category in self.categories]}
+        if self.extra:
+            data.update(self.extra)
+        return data
+
+    def with_categories(self, categories):
+        """Returns a copy of the list holding categories instead."""
+        return AwesomeList(self.name, categories, self.extra)
+
+    def resource_count(self):
+        return sum(len(category.resources) for category in self.categories)
+
+    def iter_resources(self):
+        """Yields (category, resource) for every resource of the list."""
+        for category in self.categories:
+            for resource in category.resources:
+                yield category, resource
+
+    def __eq__(self, other):
+        if type(other) is not AwesomeList:
+            return NotImplemented
+        return (self.name, self.categories, self.extra) == (other.name, other.categories, other.extra)
+
+    __hash__ = None
+
+    def __reduce__(self):
+        return AwesomeList, (self.name, self.categories, self.extra)
+
+    def __repr__(self):
+        return f"AwesomeList(name={self.name!r}, categories={len(self.categories)})"
@@ -0,0 +1,429 @@
+#!/usr/bin/env python3
+"""
+In-process update pipeline.
+
+run_pipeline chains stages that pass parsed awesome lists to each other in
+memory, one list at a time. Each stage is a function taking the Pipeline
+state and the iterator of lists from the stage before it, and returning the
+iterator for the next stage:
+
+- sync syncs the source repositories;
+- extract parses every README (optionally across a process pool);
+- extract_shard and merge_shards replace extract when the work is split
+  into shards (see scripts/shards.py): the first writes the partial result
+  of one shard, the second reads the partial results of all of them back;
+- filter_urls drops resources with invalid URLs and reports duplicate URLs;
+- check_liveness, not run by default, drops resources whose link is dead;
+- enrich_repositories, not run by default, writes the star count, last
+  commit and archived status of the repositories GitHub resources link into
+  to repositories.json, leaving the lists as they are;
+- write, index and publish write the corpus (awesome-lists.json, and
+  awesome-lists.sqlite when asked for), the search index and the published
+  artifacts as the lists pass through;
+- changes diffs the lists against the previously written corpus;
+- metadata updates metadata.json once everything else is done.
+
+Stages run lazily, so a list is extracted, filtered and written by every
+output stage before the next README is parsed, and nothing reads back what
+an earlier stage wrote. Output stages finish in order once all lists have
+passed, so index is finished before publish records its manifest.
+
+Every file is replaced by an atomic rename (see scripts/atomic.py), and the
+run as a whole can be undone: the stages snapshot the files they replace in
+pipeline.rollback, and if any stage fails the previous corpus, manifest and
+metadata are put back. Search index shards and artifacts are content
+addressed, so a new set is written next to the old one; the old set is only
+pruned once the run succeeded, and the new files are removed if it failed.
+"""
+import os
+import sys
+import time
+import logging
+from pathlib import Path
+
+# Add the repository root to the path to import our modules when run as a script
+if not __package__:
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.update_awesome_lists import (
+    sync_repositories,
+    update_metadata,
+    load_metadata,
+    KEEP,
+    load_sources,
+    DEFAULT_JOBS,
+    DEFAULT_FETCH_MODE
+)
+from scripts.extract_data import DEFAULT_ENGINE, find_list_jobs, iter_extracted_lists, iter_extracted_jobs
+from scripts.urls import UrlFilter, save_duplicate_report, DUPLICATES_FILE_NAME
+from scripts.liveness import LivenessCache, LivenessChecker, iter_live_lists, LIVENESS_CACHE_NAME
+from scripts.repo_metadata import (
+    RepoMetadataCache,
+    RepoMetadataFetcher,
+    load_repositories,
+    repository_entries,
+    save_repositories,
+    REPO_METADATA_CACHE_NAME,
+    REPOSITORIES_FILE_NAME
+)
+from scripts.storage import open_list_writer, STORAGE_SUFFIXES
+from scripts.build_search_index import SearchIndexWriter, INDEX_DIR_NAME
+from scripts.publish_artifacts import ArtifactWriter, describe_artifact
+from scripts.compute_changes import ResourceDiff, save_changes
+from scripts.shards import ShardWriter, load_shards, iter_merged_lists, in_shard, repo_key, SHARDS_DIR_NAME
+from scripts.instrumentation import RunReport
+from scripts.atomic import Rollback
+
+
+class Pipeline:
+    """State shared by the stages of one run_pipeline call."""
+
+    def __init__(self, source_dir='awesome-lists-sources', output_dir='data', repos=None,
+                 jobs=DEFAULT_JOBS, timeout=None, fetch_mode=DEFAULT_FETCH_MODE, workers=1,
+                 engine=DEFAULT_ENGINE, cache_dir=None, liveness_cache=None, liveness_options=None,
+                 repo_metadata_cache=None, repo_metadata_options=None, storage=('json',), compress_artifacts=False,
+                 shard=None, shards_dir=None, report=None):
+        self.source_dir = Path(source_dir)
+        self.output_dir = Path(output_dir)
+        # The corpus is written in every storage format; the first is read back
+        # as the previous version by the changes stage
+        self.storage_paths = [self.output_dir / f"awesome-lists{STORAGE_SUFFIXES[name]}" for name in storage]
+        self.output_path = self.storage_paths[0]
+        self.compress_artifacts = compress_artifacts
+        # The source registry written by discover.py, or the built-in list
+        self.repos = repos if repos is not None else load_sources(self.output_dir)
+        self.jobs = jobs
+        self.timeout = timeout
+        self.fetch_mode = fetch_mode
+        self.workers = workers
+        self.engine = engine
+        self.cache_dir = cache_dir
+        self.liveness_cache = liveness_cache or self.output_dir / LIVENESS_CACHE_NAME
+        self.liveness_options = liveness_options or {}
+        self.repo_metadata_cache = repo_metadata_cache or self.output_dir / REPO_METADATA_CACHE_NAME
+        self.repo_metadata_options = repo_metadata_options or {}
+        self.repositories_path = self.output_dir / REPOSITORIES_FILE_NAME
+        self.report = report if report is not None else RunReport(None, 'pipeline')
+        # (K, N) to sync and extract only shard K of N; partial results go to shards_dir
+        self.shard = shard
+        self.shards_dir = Path(shards_dir) if shards_dir else self.output_dir / SHARDS_DIR_NAME
+
+        # Read before any stage touches the output directory
+        self.previous_metadata = load_metadata(self.output_dir)
+        # Files replaced by the stages, restored if the run fails, and
+        # callbacks removing the files the run superseded once it succeeded
+        self.rollback = Rollback()
+        self.prune = []
+
+        # Filled in by the stages
+        self.stats = {}
+        self.sync_results = None
+        self.duplicates = None
+        self.liveness = None
+        self.repo_metadata = None
+        self.lists_written = 0
+        self.shards = None
+        self.manifest = None
+        self.artifacts = None
+        self.changes = None
+        # Whether the changes stage ran; its summary is None when there was nothing to diff against
+        self.diffed = False
+        self.metadata_updated = False
+
+    @property
+    def previous_sha(self):
+        return self.previous_metadata.get('artifacts', {}).get('awesome-lists', {}).get('sha256')
+
+    @property
+    def previous_path(self):
+        """
+        The corpus written by the previous run: the corpus file, or the
+        published artifact when the corpus file is missing.
+        """
+        if self.output_path.exists():
+            return self.output_path
+        artifact = self.previous_metadata.get('artifacts', {}).get('awesome-lists', {}).get('json')
+        if artifact and (self.output_dir / artifact['path']).exists():
+            return self.output_dir / artifact['path']
+        return None
+
+    @property
+    def current_sha(self):
+        return self.artifacts['awesome-lists']['sha256'] if self.artifacts else None
+
+
+def sync(pipeline, lists):
+    """Clones or updates the source repositories, only those of pipeline.shard when set."""
+    repos = [repo_url for repo_url in pipeline.repos if in_shard(repo_key(repo_url), pipeline.shard)]
+    results = sync_repositories(repos, pipeline.source_dir, jobs=pipeline.jobs,
+                                timeout=pipeline.timeout, fetch_mode=pipeline.fetch_mode)
+    pipeline.sync_results = results
+    for result in results:
+        pipeline.report.record('repository', stage='sync', repo=result['repo'], status=result['status'],
+                               wall_s=result['duration'])
+    yield from lists or ()
+
+
+def _list_jobs(pipeline):
+    jobs = find_list_jobs(pipeline.source_dir, pipeline.cache_dir, pipeline.engine)
+    return [job for job in jobs if in_shard(job[0].parent.name, pipeline.shard)]
+
+
+def extract(pipeline, lists):
+    """Parses the README of every awesome-* directory in the source directory."""
+    yield from lists or ()
+    jobs = _list_jobs(pipeline)
+    yield from iter_extracted_lists(jobs, pipeline.workers, stats=pipeline.stats, report=pipeline.report)
+
+
+def extract_shard(pipeline, lists):
+    """
+    Parses the READMEs of the lists in pipeline.shard and writes them,
+    unfiltered, as the partial result of the shard.
+    """
+    yield from lists or ()
+    jobs = _list_jobs(pipeline)
+    writer = ShardWriter(pipeline.shards_dir, pipeline.shard)
+    try:
+        for job, awesome_list in iter_extracted_jobs(jobs, pipeline.workers, stats=pipeline.stats,
+                                                     report=pipeline.report):
+            writer.write(job[0].parent.name, awesome_list)
+            yield awesome_list
+    except BaseException:
+        writer.abort()
+        raise
+    pipeline.rollback.save(writer.lists_path)
+    pipeline.rollback.save(writer.manifest_path)
+    writer.close()
+    pipeline.lists_written = writer.count
+    logging.info(f"Saved {writer.count} of {len(jobs)} awesome lists of shard "
+                 f"{pipeline.shard[0]}/{pipeline.shard[1]} to {writer.path}")
+
+
+def merge_shards(pipeline, lists):
+    """Reads the partial results of every shard in pipeline.shards_dir, in the order of a single run."""
+    yield from lists or ()
+    manifests = load_shards(pipeline.shards_dir)
+    pipeline.shards = len(manifests)
+    pipeline.stats.setdefault('cache_hits', 0)
+    yield from iter_merged_lists(manifests)
+
+
+def filter_urls(pipeline, lists):
+    """
+    Drops resources with invalid URLs, and categories and lists left empty,
+    and writes the report of URLs found more than once.
+    """
+    url_filter = UrlFilter(pipeline.stats)
+    yield from url_filter.iter_lists(lists or ())
+    pipeline.duplicates = url_filter.duplicate_report()
+    os.makedirs(pipeline.output_dir, exist_ok=True)
+    pipeline.rollback.save(pipeline.output_dir / DUPLICATES_FILE_NAME)
+    save_duplicate_report(pipeline.duplicates, pipeline.output_dir / DUPLICATES_FILE_NAME)
+
+
+def check_liveness(pipeline, lists):
+    """
+    Drops resources whose link is dead. Unlike the other stages it holds
+    every list until all URLs are probed, so the corpus is kept in memory.
+    """
+    lists = list(lists or ())
+    urls = {resource.url for awesome_list in lists for _, resource in awesome_list.iter_resources()}
+    cache = LivenessCache(pipeline.liveness_cache)
+    checker = LivenessChecker(cache, **pipeline.liveness_options)
+    try:
+        results = checker.check(urls)
+    finally:
+        cache.save()
+    pipeline.liveness = checker.stats
+    yield from iter_live_lists(lists, results, pipeline.stats)
+
+
+def enrich_repositories(pipeline, lists):
+    """
+    Writes the metadata of the repositories GitHub resources link into to
+    repositories.json. The lists pass through unchanged, so nightly changes
+    in star counts do not show up as modified resources; each repository is
+    looked up once all lists have passed, however many of them link to it.
+    """
+    urls = set()
+    for awesome_list in lists or ():
+        urls.update(resource.url for _, resource in awesome_list.iter_resources())
+        yield awesome_list
+    cache = RepoMetadataCache(pipeline.repo_metadata_cache)
+    fetcher = RepoMetadataFetcher(cache, **pipeline.repo_metadata_options)
+    try:
+        results = fetcher.fetch(urls)
+    finally:
+        cache.save()
+    pipeline.repo_metadata = fetcher.stats
+    entries = repository_entries(urls, results, load_repositories(pipeline.repositories_path))
+    pipeline.rollback.save(pipeline.repositories_path)
+    save_repositories(entries, pipeline.repositories_path)
+    pipeline.stats['repositories_written'] = len(entries)
+    logging.info(f"Saved the metadata of {len(entries)} repositories to {pipeline.repositories_path}")
+
+
+def write(pipeline, lists):
+    """
+    Writes the corpus in every storage format, replacing the previous files
+    once every list is written.
+    """
+    writers = [open_list_writer(path) for path in pipeline.storage_paths]
+    try:
+        for awesome_list in lists or ():
+            for writer in writers:
+                writer.write(awesome_list)
+            yield awesome_list
+    except BaseException:
+        for writer in writers:
+            writer.abort()
+        raise
+    for writer, path in zip(writers, pipeline.storage_paths):
+        pipeline.rollback.save(path)
+        writer.close()
+        logging.info(f"Saved {writer.count} awesome lists to {path}")
+    pipeline.lists_written = writers[0].count
+
+
+def index(pipeline, lists):
+    """Builds the search index."""
+    writer = SearchIndexWriter(pipeline.output_dir / INDEX_DIR_NAME)
+    for awesome_list in lists or ():
+        writer.write(awesome_list)
+        yield awesome_list
+    pipeline.rollback.save(writer.manifest_path)
+    pipeline.manifest = writer.close()
+    for path in writer.created:
+        pipeline.rollback.created(path)
+    pipeline.prune.append(writer.prune)
+
+
+def publish(pipeline, lists):
+    """Publishes the minified, content-addressed artifacts, and compressed ones when asked to."""
+    writer = ArtifactWriter(pipeline.output_dir, compress=pipeline.compress_artifacts)
+    for awesome_list in lists or ():
+        writer.write(awesome_list)
+        yield awesome_list
+    pipeline.artifacts = writer.close()
+    for path in writer.created:
+        pipeline.rollback.created(path)
+    pipeline.prune.append(writer.prune)
+    manifest_path = pipeline.output_dir / INDEX_DIR_NAME / 'manifest.json'
+    if pipeline.manifest is not None:
+        pipeline.artifacts['search-index'] = describe_artifact(manifest_path, pipeline.output_dir)
+
+
+def changes(pipeline, lists):
+    """Diffs the lists against the corpus written by the previous run."""
+    previous_path = pipeline.previous_path
+    diff = ResourceDiff(previous_path) if previous_path is not None else None
+    for awesome_list in lists or ():
+        if diff is not None:
+            diff.add(awesome_list)
+        yield awesome_list
+    if diff is not None:
+        pipeline.changes = save_changes(diff.result(), pipeline.output_dir,
+                                        base=pipeline.previous_sha, target=pipeline.current_sha)
+        if pipeline.changes['path']:
+            pipeline.rollback.created(pipeline.output_dir / pipeline.changes['path'])
+    pipeline.diffed = True
+
+
+def metadata(pipeline, lists):
+    """
+    Updates metadata.json. Leaving it untouched when the published data is
+    byte-identical keeps the daily workflow from committing.
+    """
+    yield from lists or ()
+    if pipeline.artifacts is not None and pipeline.previous_sha == pipeline.current_sha:
+        logging.info("Data unchanged since the previous run; metadata left as is")
+        return
+    pipeline.rollback.save(pipeline.output_dir / 'metadata.json')
+    update_metadata(pipeline.output_dir,
+                    artifacts=pipeline.artifacts if pipeline.artifacts is not None else KEEP,
+                    changes=pipeline.changes if pipeline.diffed else KEEP)
+    pipeline.metadata_updated = True
+
+
+DEFAULT_STAGES = (sync, extract, filter_urls, write, index, publish, changes, metadata)
+SHARD_STAGES = (sync, extract_shard)
+MERGE_STAGES = (merge_shards, filter_urls, write, index, publish, changes, metadata)
+
+
+def with_liveness_check(stages):
+    """stages with check_liveness run right after filter_urls."""
+    position = stages.index(filter_urls) + 1
+    return stages[:position] + (check_liveness,) + stages[position:]
+
+
+def with_repo_metadata(stages):
+    """stages with enrich_repositories run right before write."""
+    position = stages.index(write)
+    return stages[:position] + (enrich_repositories,) + stages[position:]
+
+
+class _StageTimer:
+    """Iterator wrapper accumulating the time spent producing a stage's lists, upstream stages included."""
+
+    def __init__(self, name, iterator):
+        self.name = name
+        self.iterator = iter(iterator)
+        self.wall = 0.0
+        self.cpu = 0.0
+        self.lists = 0
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        start_wall = time.perf_counter()
+        start_cpu = time.process_time()
+        try:
+            item = next(self.iterator)
+        finally:
+            self.wall += time.perf_counter() - start_wall
+            self.cpu += time.process_time() - start_cpu
+        self.lists += 1
+        return item
+
+
+def run_pipeline(source_dir='awesome-lists-sources', output_dir='data', stages=DEFAULT_STAGES, **options):
+    """
+    Runs stages in order, streaming the parsed lists through them, and
+    returns the Pipeline with the results each stage recorded. Options are
+    passed to Pipeline. A stage record with the stage's own wall and CPU time
+    and the number of lists it passed on is written to the run report. If a
+    stage fails, the files replaced so far are restored before the error is
+    raised again.
+    """
+    pipeline = Pipeline(source_dir, output_dir, **options)
+    timers = []
+    lists = None
+    for stage in stages:
+        lists = _StageTimer(stage.__name__, stage(pipeline, lists))
+        timers.append(lists)
+
+    try:
+        for _ in lists or ():
+            pass
+    except BaseException:
+        logging.error("Pipeline failed; restoring the previous output files")
+        pipeline.rollback.restore()
+        raise
+    for prune in pipeline.prune:
+        prune()
+    pipeline.rollback.discard()
+
+    upstream_wall = upstream_cpu = 0.0
+    for timer in timers:
+        pipeline.report.record(
+            'stage',
+            stage=timer.name,
+            status='ok',
+            wall_s=round(timer.wall - upstream_wall, 6),
+            cpu_s=round(timer.cpu - upstream_cpu, 6),
+            lists=timer.lists
+        )
+        upstream_wall, upstream_cpu = timer.wall, timer.cpu
+    return pipeline
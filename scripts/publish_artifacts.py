@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Publish minified, content-addressed copies of the data.
+
+Writes awesome-lists.<hash>.min.json into an artifacts directory. The hash
+is the SHA-256 of the minified JSON, so a client can cache the file
+permanently and only download again when the name in metadata.json changes.
+Artifacts from earlier runs are removed so the daily commits only ever carry
+one file, and the committed history only grows by one blob per data change.
+
+With compress, .gz (and .br when the brotli package is installed) variants
+are written next to it, for deployments that serve precompressed files.
+They are not committed; the daily workflow builds them and uploads them as
+a deployment artifact.
+"""
+import os
+import re
+import sys
+import gzip
+import json
+import shutil
+import hashlib
+import argparse
+import logging
+from pathlib import Path
+
+try:
+    import brotli  # type: ignore # Optional: pip install brotli
+except ImportError:
+    brotli = None
+
+# Add the repository root to the path to import our modules when run as a script
+if not __package__:
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.json_stream import JsonListWriter
+from scripts.storage import iter_lists
+from scripts.atomic import replace_file
+from scripts.log_setup import configure_logging, add_logging_arguments
+
+ARTIFACTS_DIR_NAME = 'artifacts'
+HASH_LENGTH = 16
+ARTIFACT_RE = re.compile(r'^awesome-lists\.[0-9a-f]+\.min\.json(\.gz|\.br)?$')
+CHUNK_SIZE = 1 << 16
+
+
+class _HashingWriter:
+    """Text file wrapper that hashes the UTF-8 bytes written through it."""
+
+    def __init__(self, f):
+        self.f = f
+        self.sha256 = hashlib.sha256()
+
+    def write(self, text):
+        data = text.encode('utf-8')
+        self.sha256.update(data)
+        self.f.write(data)
+
+
+def file_sha256(path):
+    sha256 = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+def describe_artifact(path, base_dir):
+    """Returns the metadata.json entry for a file: its path relative to base_dir, size and SHA-256."""
+    path = Path(path)
+    return {
+        'path': path.relative_to(base_dir).as_posix(),
+        'bytes': path.stat().st_size,
+        'sha256': file_sha256(path)
+    }
+
+
+def _gzip_file(source, target):
+    # mtime=0 keeps the output identical for identical input
+    tmp_path = target.with_name(target.name + '.tmp')
+    with open(source, 'rb') as src, open(tmp_path, 'wb') as raw:
+        with gzip.GzipFile(filename='', mode='wb', compresslevel=9, fileobj=raw, mtime=0) as dst:
+            shutil.copyfileobj(src, dst, CHUNK_SIZE)
+    replace_file(tmp_path, target)
+
+
+def _brotli_file(source, target):
+    compressor = brotli.Compressor(mode=brotli.MODE_TEXT, quality=11)
+    tmp_path = target.with_name(target.name + '.tmp')
+    with open(source, 'rb') as src, open(tmp_path, 'wb') as dst:
+        for chunk in iter(lambda: src.read(CHUNK_SIZE), b''):
+            dst.write(compressor.process(chunk))
+        dst.write(compressor.finish())
+    replace_file(tmp_path, target)
+
+
+class ArtifactWriter:
+    """
+    Publishes the artifacts one awesome list at a time: write() appends the
+    list to the minified JSON, close() names it after its hash, compresses it
+    when asked to and returns the description for metadata.json, and prune()
+    removes the artifacts it replaces. Paths in the description are relative
+    to output_dir. created lists the artifacts that were not there before,
+    which a failed run removes again.
+    """
+
+    def __init__(self, output_dir, compress=False):
+        self.output_dir = Path(output_dir)
+        self.compress = compress
+        self.artifacts_dir = self.output_dir / ARTIFACTS_DIR_NAME
+        self.artifacts_dir.mkdir(parents=True, exist_ok=True)
+        self._tmp_path = self.artifacts_dir / 'awesome-lists.min.json.tmp'
+        self._file = open(self._tmp_path, 'wb')
+        self._hashing = _HashingWriter(self._file)
+        self._writer = JsonListWriter(self._hashing, indent=None)
+        self._current = set()
+        self.created = []
+
+    def write(self, awesome_list):
+        self._writer.write(awesome_list.to_dict())
+
+    def close(self):
+        self._writer.close()
+        self._file.close()
+        output_dir = self.output_dir
+        artifacts_dir = self.artifacts_dir
+
+        digest = self._hashing.sha256.hexdigest()
+        minified_path = artifacts_dir / f"awesome-lists.{digest[:HASH_LENGTH]}.min.json"
+        if not minified_path.exists():
+            self.created.append(minified_path)
+        replace_file(self._tmp_path, minified_path)
+        current = self._current = {minified_path.name}
+
+        description = {
+            'sha256': digest,
+            'json': describe_artifact(minified_path, output_dir)
+        }
+
+        if not self.compress:
+            logging.info(f"Published {minified_path.name}: {description['json']['bytes']} bytes")
+            return {'awesome-lists': description}
+
+        # Compressed variants are only written once per hash: they are renamed
+        # into place when complete, so an existing file is always a full one.
+        gzip_path = minified_path.with_name(minified_path.name + '.gz')
+        if not gzip_path.exists():
+            _gzip_file(minified_path, gzip_path)
+            self.created.append(gzip_path)
+        current.add(gzip_path.name)
+        description['gzip'] = describe_artifact(gzip_path, output_dir)
+
+        if brotli is not None:
+            brotli_path = minified_path.with_name(minified_path.name + '.br')
+            if not brotli_path.exists():
+                _brotli_file(minified_path, brotli_path)
+                self.created.append(brotli_path)
+            current.add(brotli_path.name)
+            description['brotli'] = describe_artifact(brotli_path, output_dir)
+        else:
+            logging.info("brotli is not installed; skipping the .br artifact")
+
+        sizes = ', '.join(f"{kind} {description[kind]['bytes']} bytes"
+                          for kind in ('json', 'gzip', 'brotli') if kind in description)
+        logging.info(f"Published {minified_path.name}: {sizes}")
+        return {'awesome-lists': description}
+
+    def prune(self):
+        """
+        Removes the artifacts of earlier runs. Called only once metadata.json
+        names the new ones, so the metadata a reader holds, or a rolled back
+        one, never points at a removed file.
+        """
+        for stale in self.artifacts_dir.iterdir():
+            if ARTIFACT_RE.match(stale.name) and stale.name not in self._current:
+                stale.unlink()
+
+
+def publish_artifacts(input_path, output_dir, compress=False):
+    """
+    Writes the content-addressed artifacts for input_path into
+    output_dir/artifacts and returns their description for metadata.json.
+    Paths in the description are relative to output_dir.
+    """
+    writer = ArtifactWriter(output_dir, compress=compress)
+    for awesome_list in iter_lists(input_path):
+        writer.write(awesome_list)
+    artifacts = writer.close()
+    writer.prune()
+    return artifacts
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Publish minified and compressed data artifacts')
+    parser.add_argument('--input', default='data/awesome-lists.json', help='Extracted awesome lists (.json or .sqlite)')
+    parser.add_argument('--output-dir', default='data', help='Directory that holds metadata.json')
+    parser.add_argument('--compress', action='store_true',
+                        help='Also write .gz and .br variants (for deployments serving precompressed files)')
+    add_logging_arguments(parser)
+    args = parser.parse_args()
+    configure_logging('publish_artifacts', args.log_level, console=True)
+
+    try:
+        artifacts = publish_artifacts(args.input, args.output_dir, compress=args.compress)
+        print(json.dumps(artifacts, indent=2))
+    except Exception as e:
+        logging.error("Error publishing artifacts: %s", e, exc_info=True)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
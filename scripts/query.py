@@ -0,0 +1,361 @@
+#!/usr/bin/env python3
+"""
+Query the extracted corpus without downloading it.
+
+CorpusIndex reads awesome-lists.json or awesome-lists.sqlite once, one list
+at a time, and keeps:
+- an inverted index from lowercase word tokens to the resources whose name,
+  description or tags contain them, with a sorted vocabulary so the terms
+  of a query also match as prefixes;
+- secondary indexes from list, category, URL host and tag to resources.
+
+search() matches every term of a query, ranks the results by the field
+weights the frontend uses (name 2, tags 1.5, description 1; half for a
+prefix match), filters by list, category, host and tag, and returns one page
+of results with facet counts over all of them. The ranked matches of recent
+queries are kept in an LRU cache, so paging through a result is a slice.
+
+Results carry the same IDs as the records of the frontend and the search
+index. With --serve the index is served as JSON over HTTP:
+
+    GET /search?q=web+framework&list=Awesome+Python&page=2&per_page=20
+    GET /lists
+
+The corpus file is replaced atomically by every run, so the server reloads
+it as soon as its file changes.
+"""
+import os
+import re
+import sys
+import json
+import bisect
+import logging
+import argparse
+import threading
+from array import array
+from collections import Counter
+from functools import lru_cache
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
+
+# Add the repository root to the path to import our modules when run as a script
+if not __package__:
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.storage import iter_lists, url_host
+from scripts.build_search_index import generate_id
+from scripts.log_setup import configure_logging, add_logging_arguments
+
+TOKEN_RE = re.compile(r'\w+')
+# Must match the weights of SEARCH_KEYS in build_search_index.py
+FIELD_WEIGHTS = (('name', 2), ('tags', 1.5), ('description', 1))
+PREFIX_WEIGHT = 0.5
+FILTERS = ('list', 'category', 'host', 'tag')
+DEFAULT_PER_PAGE = 20
+MAX_PER_PAGE = 100
+FACET_LIMIT = 10
+QUERY_CACHE_SIZE = 256
+
+
+def tokenize(text):
+    """Lowercase word tokens of text."""
+    return TOKEN_RE.findall(text.casefold()) if text else []
+
+
+def _file_signature(path):
+    stat = os.stat(path)
+    return stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+
+class CorpusIndex:
+    """In-memory full-text and facet index over a corpus file."""
+
+    def __init__(self, path, cache_size=QUERY_CACHE_SIZE):
+        self.path = os.fspath(path)
+        self.signature = _file_signature(self.path)
+        self.resources = []
+        self.list_names = []
+        self.category_names = []
+        self.host_names = ['']
+        # Per resource: index into list_names, category_names and host_names
+        self._list = array('I')
+        self._category = array('I')
+        self._host = array('I')
+        # One inverted index per field: token -> resource IDs in ascending order
+        self._postings = {field: {} for field, _ in FIELD_WEIGHTS}
+        self._secondary = {name: {} for name in FILTERS}
+        self._load()
+        self._vocabulary = {field: sorted(postings) for field, postings in self._postings.items()}
+        self._match = lru_cache(maxsize=cache_size)(self._rank)
+
+    def _load(self):
+        categories = {}
+        hosts = {}
+        by_list, by_category, by_host, by_tag = (self._secondary[name] for name in FILTERS)
+        for awesome_list in iter_lists(self.path):
+            list_id = len(self.list_names)
+            self.list_names.append(awesome_list.name)
+            list_ids = by_list.setdefault(awesome_list.name, array('I'))
+            for category in awesome_list.categories:
+                # Skips the same incomplete entries as the frontend and flatten_list
+                if not category.name:
+                    continue
+                category_id = categories.setdefault(category.name, len(categories))
+                if category_id == len(self.category_names):
+                    self.category_names.append(category.name)
+                for resource in category.resources:
+                    if not resource.name or not resource.url:
+                        continue
+                    resource_id = len(self.resources)
+                    self.resources.append(resource)
+                    host = url_host(resource.url) or ''
+                    host_id = hosts.setdefault(host, len(self.host_names)) if host else 0
+                    if host_id == len(self.host_names):
+                        self.host_names.append(host)
+                    self._list.append(list_id)
+                    self._category.append(category_id)
+                    self._host.append(host_id)
+
+                    list_ids.append(resource_id)
+                    by_category.setdefault(category.name, array('I')).append(resource_id)
+                    if host:
+                        by_host.setdefault(host, array('I')).append(resource_id)
+                    for tag in set(resource.tags):
+                        by_tag.setdefault(tag, array('I')).append(resource_id)
+                    self._add_tokens('name', resource_id, tokenize(resource.name))
+                    self._add_tokens('description', resource_id, tokenize(resource.description))
+                    self._add_tokens('tags', resource_id, [token for tag in resource.tags for token in tokenize(tag)])
+        logging.info(f"Indexed {len(self.resources)} resources from {len(self.list_names)} lists in {self.path}")
+
+    def _add_tokens(self, field, resource_id, tokens):
+        postings = self._postings[field]
+        for token in set(tokens):
+            ids = postings.get(token)
+            if ids is None:
+                ids = postings[token] = array('I')
+            ids.append(resource_id)
+
+    def _term_matches(self, field, term):
+        """Resource IDs with term as a token of field, and with a token of field starting with it."""
+        postings = self._postings[field]
+        vocabulary = self._vocabulary[field]
+        exact = set(postings.get(term, ()))
+        prefix = set()
+        position = bisect.bisect_left(vocabulary, term)
+        while position < len(vocabulary) and vocabulary[position].startswith(term):
+            if vocabulary[position] != term:
+                prefix.update(postings[vocabulary[position]])
+            position += 1
+        return exact, prefix - exact
+
+    def _rank(self, terms, filters):
+        """Returns the IDs matching every term and filter, best first, their scores and their facet counts."""
+        candidates = None
+        for name, value in filters:
+            ids = self._secondary[name].get(value, ())
+            candidates = set(ids) if candidates is None else candidates.intersection(ids)
+
+        scores = {}
+        for term in terms:
+            term_scores = {}
+            for field, weight in FIELD_WEIGHTS:
+                exact, prefix = self._term_matches(field, term)
+                for resource_id in exact:
+                    term_scores[resource_id] = term_scores.get(resource_id, 0) + weight
+                for resource_id in prefix:
+                    term_scores[resource_id] = term_scores.get(resource_id, 0) + weight * PREFIX_WEIGHT
+            matched = term_scores.keys()
+            candidates = set(matched) if candidates is None else candidates.intersection(matched)
+            for resource_id in candidates:
+                scores[resource_id] = scores.get(resource_id, 0) + term_scores[resource_id]
+
+        if candidates is None:
+            return tuple(range(len(self.resources))), {}, self._facets(range(len(self.resources)))
+        ranked = sorted(candidates)
+        if terms:
+            scores = {resource_id: scores[resource_id] for resource_id in ranked}
+            # Stable, so equal scores stay in corpus order
+            ranked.sort(key=scores.__getitem__, reverse=True)
+        return tuple(ranked), scores, self._facets(ranked)
+
+    def _facets(self, ranked):
+        lists = Counter(map(self._list.__getitem__, ranked))
+        categories = Counter(map(self._category.__getitem__, ranked))
+        hosts = Counter(map(self._host.__getitem__, ranked))
+        tags = Counter(tag for resource in map(self.resources.__getitem__, ranked) for tag in set(resource.tags))
+        hosts.pop(0, None)
+
+        def top(counts, names=None):
+            entries = [(names[key] if names is not None else key, count) for key, count in counts.items()]
+            entries.sort(key=lambda entry: (-entry[1], entry[0]))
+            return [{'value': value, 'count': count} for value, count in entries[:FACET_LIMIT]]
+
+        return {
+            'list': top(lists, self.list_names),
+            'category': top(categories, self.category_names),
+            'host': top(hosts, self.host_names),
+            'tag': top(tags)
+        }
+
+    def record(self, resource_id):
+        """The resource as a record of the frontend's shape."""
+        resource = self.resources[resource_id]
+        return {
+            'id': generate_id(resource.name, resource.url),
+            'name': resource.name,
+            'description': resource.description or '',
+            'url': resource.url,
+            'category': self.category_names[self._category[resource_id]],
+            'list': self.list_names[self._list[resource_id]],
+            'tags': list(resource.tags)
+        }
+
+    def search(self, query='', page=1, per_page=DEFAULT_PER_PAGE, **filters):
+        """
+        Returns one page of the resources matching every term of query and
+        the given list, category, host and tag filters, best match first, with
+        the total count and facet counts over all matches. An empty query
+        matches every resource, in corpus order.
+        """
+        unknown = set(filters) - set(FILTERS)
+        if unknown:
+            raise TypeError(f"Unknown filters: {', '.join(sorted(unknown))}")
+        page = max(1, int(page))
+        per_page = min(max(1, int(per_page)), MAX_PER_PAGE)
+        terms = tuple(dict.fromkeys(tokenize(query)))
+        active = tuple((name, filters[name] if name != 'host' else filters[name].lower())
+                       for name in FILTERS if filters.get(name))
+        ranked, scores, facets = self._match(terms, active)
+
+        start = (page - 1) * per_page
+        results = []
+        for resource_id in ranked[start:start + per_page]:
+            record = self.record(resource_id)
+            if terms:
+                record['score'] = scores[resource_id]
+            results.append(record)
+        return {
+            'query': query,
+            'filters': dict(active),
+            'total': len(ranked),
+            'page': page,
+            'per_page': per_page,
+            'pages': -(-len(ranked) // per_page),
+            'results': results,
+            'facets': facets
+        }
+
+    def lists(self):
+        """Every list with its resource count."""
+        counts = Counter(self._list)
+        return [{'name': name, 'count': counts[list_id]} for list_id, name in enumerate(self.list_names)]
+
+    def cache_info(self):
+        return self._match.cache_info()
+
+
+class _IndexHolder:
+    """Keeps the CorpusIndex for a path, rebuilding it when the file was replaced."""
+
+    def __init__(self, path):
+        self.path = path
+        self.index = CorpusIndex(path)
+        self._lock = threading.Lock()
+
+    def current(self):
+        try:
+            signature = _file_signature(self.path)
+        except OSError:
+            return self.index
+        if signature != self.index.signature:
+            with self._lock:
+                if signature != self.index.signature:
+                    logging.info(f"{self.path} changed; reloading")
+                    self.index = CorpusIndex(self.path)
+        return self.index
+
+
+class QueryHandler(BaseHTTPRequestHandler):
+    """Answers GET /search and GET /lists with JSON."""
+
+    holder = None
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        index = self.holder.current()
+        try:
+            if url.path == '/search':
+                body = index.search(
+                    params.get('q', ''),
+                    page=params.get('page', 1),
+                    per_page=params.get('per_page', DEFAULT_PER_PAGE),
+                    **{name: params[name] for name in FILTERS if name in params}
+                )
+            elif url.path == '/lists':
+                body = {'lists': index.lists()}
+            else:
+                self._send(404, {'error': f"Unknown path: {url.path}"})
+                return
+        except ValueError as e:
+            self._send(400, {'error': str(e)})
+            return
+        self._send(200, body)
+
+    def _send(self, status, body):
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        logging.info("%s %s", self.address_string(), format % args)
+
+
+def serve(path, host='127.0.0.1', port=8000):
+    """Serves the corpus at path over HTTP until interrupted."""
+    handler = type('Handler', (QueryHandler,), {'holder': _IndexHolder(path)})
+    server = ThreadingHTTPServer((host, port), handler)
+    logging.info(f"Serving {path} on http://{host}:{server.server_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Search the extracted awesome lists')
+    parser.add_argument('query', nargs='?', default='', help='Words to search for; prefixes match too')
+    parser.add_argument('--input', default='data/awesome-lists.json', help='Extracted awesome lists (.json or .sqlite)')
+    for name in FILTERS:
+        parser.add_argument(f'--{name}', default=None, help=f'Only resources with this {name}')
+    parser.add_argument('--page', type=int, default=1, help='Page of results to print')
+    parser.add_argument('--per-page', type=int, default=DEFAULT_PER_PAGE, help='Results per page')
+    parser.add_argument('--serve', action='store_true', help='Serve the index over HTTP instead of printing one query')
+    parser.add_argument('--bind', default='127.0.0.1', help='Address to serve on')
+    parser.add_argument('--port', type=int, default=8000, help='Port to serve on')
+    add_logging_arguments(parser)
+    args = parser.parse_args()
+    configure_logging('query', args.log_level, console=True)
+
+    try:
+        if args.serve:
+            serve(args.input, args.bind, args.port)
+            return 0
+        index = CorpusIndex(args.input)
+        result = index.search(args.query, page=args.page, per_page=args.per_page,
+                              **{name: getattr(args, name) for name in FILTERS})
+    except Exception as e:
+        logging.error("Error querying %s: %s", args.input, e, exc_info=True)
+        return 1
+    print(json.dumps(result, indent=2, ensure_ascii=False))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,454 @@
+#!/usr/bin/env python3
+"""
+Repository metadata for resources hosted on GitHub.
+
+The repositories that resources link to (or to a page inside) are looked
+up for their star count, the date of the last commit on their default branch
+and whether they are archived. The results are written to repositories.json
+next to the data, keyed by host and repository:
+
+    "github.com/owner/name": {"stars": 1234, "last_commit": "2024-05-01T12:00:00Z", "archived": false}
+
+Star counts and commit dates change every night, so they are kept out of the
+resources: the corpus, its artifacts and the changes diffed from it only
+change when the lists do. A resource finds its entry through
+repository_key(resource.url).
+
+Resource URLs are grouped by host and reduced to the distinct repositories
+of the whole corpus, so a repository listed by several lists is looked up
+once. GitHubClient asks the GraphQL API for BATCH_SIZE repositories per
+request, one aliased repository() field each, with a few requests in
+flight. A rate limited request waits for the time the API asks for (or
+until the limit resets) and is retried; other failed requests are retried
+with exponential backoff. The wait pauses every worker, not just the one
+that hit the limit.
+
+Results are kept in a JSON cache file until they expire, with the expiry
+spread out so lookups made in one run do not all go stale together; a
+nightly run only looks up new repositories and expired results. A
+repository that no longer exists is cached as missing and left out of
+repositories.json. Repositories that could not be looked up keep the entry
+of the previous run, if any, and are retried by the next run.
+
+The API needs a token, read from GITHUB_TOKEN. --github-api-url points
+the client at another server, such as a local mock, which may not need one.
+"""
+import os
+import re
+import json
+import time
+import random
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from scripts.atomic import atomic_write
+
+REPO_METADATA_CACHE_VERSION = 1
+REPO_METADATA_CACHE_NAME = '.repo-metadata-cache.json'
+REPOSITORIES_VERSION = 1
+REPOSITORIES_FILE_NAME = 'repositories.json'
+
+FOUND = 'found'
+MISSING = 'missing'
+# Seconds a result is reused
+RESULT_TTL = {FOUND: 3 * 86400, MISSING: 7 * 86400}
+# Expiry is spread over up to this share of the TTL
+TTL_JITTER = 0.5
+# Entries expired for longer than this are dropped from the cache file
+CACHE_RETENTION = 30 * 86400
+
+GITHUB_API_URL = 'https://api.github.com/graphql'
+TOKEN_VARIABLE = 'GITHUB_TOKEN'
+DEFAULT_BATCH_SIZE = 50
+DEFAULT_CONCURRENCY = 4
+DEFAULT_TIMEOUT = 30.0
+MAX_ATTEMPTS = 5
+# Backoff after a failed request: BACKOFF_BASE * 2 ** attempt seconds, jittered
+BACKOFF_BASE = 2.0
+# A rate limit resetting later than this ends the lookups of the run
+MAX_RATE_LIMIT_WAIT = 900
+USER_AGENT = 'iQuantum-metadata/1.0'
+
+# First path segments of github.com pages that are not repositories
+_RESERVED_OWNERS = frozenset([
+    'about', 'apps', 'collections', 'contact', 'customer-stories', 'enterprise', 'events', 'explore',
+    'features', 'login', 'marketplace', 'new', 'notifications', 'orgs', 'pricing', 'security', 'settings',
+    'site', 'sponsors', 'topics', 'trending', 'users'
+])
+_GITHUB_URL_RE = re.compile(r'https?://(?:www\.)?github\.com/([\w.-]+)/([\w.-]+)', re.IGNORECASE)
+
+_FIELDS = """fragment fields on Repository {
+  stargazerCount
+  isArchived
+  defaultBranchRef { target { ... on Commit { committedDate } } }
+}"""
+
+
+def repository_of(url):
+    """
+    Returns (host, owner/name) for a URL inside a repository of a supported
+    host, or None.
+    """
+    match = _GITHUB_URL_RE.match(url) if isinstance(url, str) else None
+    if match is None:
+        return None
+    owner, name = match.groups()
+    if name.endswith('.git'):
+        name = name[:-4]
+    if owner.lower() in _RESERVED_OWNERS or not name:
+        return None
+    return 'github.com', f"{owner}/{name}"
+
+
+def _cache_key(host, repo):
+    # Owner and repository names are case-insensitive
+    return f"{host}/{repo.lower()}"
+
+
+def repository_key(url):
+    """The cache key of the repository a URL points into, or None."""
+    repository = repository_of(url)
+    return _cache_key(*repository) if repository is not None else None
+
+
+class RepoMetadataCache:
+    """Lookup results by host and repository, loaded from and saved to a JSON file."""
+
+    def __init__(self, path):
+        self.path = path
+        self.entries = {}
+        if not path or not os.path.exists(path):
+            return
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == REPO_METADATA_CACHE_VERSION:
+                self.entries = data.get('entries', {})
+        except (OSError, ValueError) as e:
+            logging.warning("Ignoring unreadable repository metadata cache %s: %s", path, e)
+
+    def get(self, key, now):
+        """Returns the cached result for key, or None if there is none or it expired."""
+        entry = self.entries.get(key)
+        if entry is None or entry['expires'] <= now:
+            return None
+        return entry
+
+    def put(self, key, result):
+        self.entries[key] = result
+
+    def save(self, now=None):
+        """Writes the cache, dropping long expired entries."""
+        if not self.path:
+            return
+        now = time.time() if now is None else now
+        entries = {key: entry for key, entry in self.entries.items() if entry['expires'] > now - CACHE_RETENTION}
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        with atomic_write(self.path) as f:
+            json.dump({'version': REPO_METADATA_CACHE_VERSION, 'entries': entries}, f, separators=(',', ':'))
+
+
+def _result(status, now, **fields):
+    ttl = RESULT_TTL[status]
+    return {'status': status, **fields, 'expires': now + ttl * (1 - TTL_JITTER * random.random())}
+
+
+class RateLimited(Exception):
+    """The API limit resets later than the client is willing to wait."""
+
+
+class GitHubClient:
+    """Looks up repositories with batched GraphQL queries."""
+
+    def __init__(self, api_url=GITHUB_API_URL, token=None, batch_size=DEFAULT_BATCH_SIZE,
+                 concurrency=DEFAULT_CONCURRENCY, timeout=DEFAULT_TIMEOUT):
+        if token is None:
+            token = os.environ.get(TOKEN_VARIABLE)
+        if not token and api_url == GITHUB_API_URL:
+            raise RuntimeError(f"Repository metadata needs a GitHub token in {TOKEN_VARIABLE}")
+        self.api_url = api_url
+        self.token = token
+        self.batch_size = max(1, batch_size)
+        self.concurrency = max(1, concurrency)
+        self.timeout = timeout
+        self.requests = 0
+        self.retries = 0
+        self._lock = threading.Lock()
+        # Set when a rate limit pauses all workers, or ends the lookups when too far away
+        self._resume_at = 0.0
+        self._gave_up = False
+
+    def lookup(self, repos):
+        """
+        Returns {owner/name: result} for the repositories that were found or
+        are known to be missing. Repositories whose batch failed are left out.
+        """
+        repos = list(repos)
+        batches = [repos[start:start + self.batch_size] for start in range(0, len(repos), self.batch_size)]
+        results = {}
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            for batch_results in executor.map(self._lookup_batch, batches):
+                results.update(batch_results)
+        return results
+
+    def _lookup_batch(self, batch):
+        try:
+            response = self._post(self._query(batch))
+        except RateLimited as e:
+            logging.error("Repository metadata: %s; leaving %d repositories for the next run", e, len(batch))
+            return {}
+        except Exception as e:
+            logging.error("Repository metadata: lookup of %d repositories failed: %s", len(batch), e)
+            return {}
+
+        now = time.time()
+        data = response.get('data') or {}
+        missing = set()
+        for error in response.get('errors') or ():
+            if error.get('type') == 'NOT_FOUND' and error.get('path'):
+                missing.add(error['path'][0])
+            else:
+                logging.warning("Repository metadata: %s", error.get('message') or error)
+        results = {}
+        for position, repo in enumerate(batch):
+            alias = f"r{position}"
+            node = data.get(alias)
+            if node is not None:
+                target = (node.get('defaultBranchRef') or {}).get('target') or {}
+                results[repo] = _result(FOUND, now, stars=node.get('stargazerCount'),
+                                        last_commit=target.get('committedDate'), archived=node.get('isArchived'))
+            elif alias in missing:
+                results[repo] = _result(MISSING, now)
+        return results
+
+    @staticmethod
+    def _query(batch):
+        fields = []
+        for position, repo in enumerate(batch):
+            owner, name = repo.split('/', 1)
+            # JSON string literals are valid GraphQL string literals
+            fields.append(f"r{position}: repository(owner: {json.dumps(owner)}, name: {json.dumps(name)}) "
+                          f"{{ ...fields }}")
+        return 'query {\n' + '\n'.join(fields) + '\n}\n' + _FIELDS
+
+    def _wait(self, seconds):
+        """Pauses every worker for seconds, or gives up when that is too long."""
+        if seconds > MAX_RATE_LIMIT_WAIT:
+            with self._lock:
+                self._gave_up = True
+            raise RateLimited(f"rate limit resets in {seconds:.0f} seconds")
+        logging.warning("Repository metadata: rate limited, waiting %.0f seconds", seconds)
+        with self._lock:
+            self._resume_at = max(self._resume_at, time.time() + seconds)
+
+    def _post(self, query):
+        # Imported here since most runs do not look up repository metadata
+        import urllib.request
+        import urllib.error
+
+        body = json.dumps({'query': query}).encode('utf-8')
+        headers = {'Content-Type': 'application/json', 'User-Agent': USER_AGENT}
+        if self.token:
+            headers['Authorization'] = f"bearer {self.token}"
+
+        for attempt in range(MAX_ATTEMPTS):
+            with self._lock:
+                if self._gave_up:
+                    raise RateLimited('rate limit exhausted earlier in this run')
+                pause = self._resume_at - time.time()
+            if pause > 0:
+                time.sleep(pause)
+            if attempt:
+                with self._lock:
+                    self.retries += 1
+            with self._lock:
+                self.requests += 1
+
+            request = urllib.request.Request(self.api_url, data=body, headers=headers, method='POST')
+            try:
+                with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                    payload = json.load(response)
+                    remaining = response.headers.get('X-RateLimit-Remaining')
+                    reset = response.headers.get('X-RateLimit-Reset')
+            except urllib.error.HTTPError as e:
+                wait = self._rate_limit_wait(e.code, e.headers)
+                if wait is not None:
+                    self._wait(wait)
+                    continue
+                if e.code < 500:
+                    raise
+                logging.warning("Repository metadata: HTTP %d, retrying", e.code)
+            except (urllib.error.URLError, OSError, ValueError) as e:
+                logging.warning("Repository metadata: request failed (%s), retrying", e)
+            else:
+                errors = payload.get('errors') or ()
+                if any(error.get('type') == 'RATE_LIMITED' for error in errors):
+                    wait = _seconds_until(reset) if remaining == '0' and reset else BACKOFF_BASE * 2 ** attempt
+                    self._wait(wait)
+                    continue
+                if remaining == '0' and reset:
+                    # The next request would be refused; wait for the reset before making it,
+                    # or make none when that is too far away. This response is used either way.
+                    try:
+                        self._wait(_seconds_until(reset))
+                    except RateLimited:
+                        pass
+                return payload
+            time.sleep(BACKOFF_BASE * 2 ** attempt * (0.5 + random.random()))
+        raise RuntimeError(f"no response after {MAX_ATTEMPTS} attempts")
+
+    @staticmethod
+    def _rate_limit_wait(code, headers):
+        """Seconds to wait before retrying a refused request, or None if it was not rate limited."""
+        if code not in (403, 429):
+            return None
+        retry_after = headers.get('Retry-After')
+        if retry_after is not None:
+            try:
+                return max(0.0, float(retry_after))
+            except ValueError:
+                pass
+        reset = headers.get('X-RateLimit-Reset')
+        if headers.get('X-RateLimit-Remaining') == '0' and reset:
+            return _seconds_until(reset)
+        # GitHub answers a secondary rate limit with 403 and no reset time
+        return 60.0 if code == 403 else None
+
+
+def _seconds_until(reset):
+    try:
+        return max(0.0, float(reset) - time.time()) + 1
+    except ValueError:
+        return 60.0
+
+
+# Clients by host
+CLIENTS = {'github.com': GitHubClient}
+
+
+class RepoMetadataFetcher:
+    """
+    Looks up the repositories that have no fresh result in cache and caches
+    the new results. Counters for the last lookup are kept in stats.
+    """
+
+    def __init__(self, cache, api_url=GITHUB_API_URL, token=None, batch_size=DEFAULT_BATCH_SIZE,
+                 concurrency=DEFAULT_CONCURRENCY, timeout=DEFAULT_TIMEOUT):
+        self.cache = cache
+        self.clients = {host: client_class(api_url, token, batch_size, concurrency, timeout)
+                        for host, client_class in CLIENTS.items()}
+        self.stats = {}
+
+    def fetch(self, urls):
+        """Returns {repository_key(url): result} for the repositories the URLs point into."""
+        now = time.time()
+        # Host -> {owner/name as first seen, by cache key}
+        by_host = {}
+        for url in urls:
+            repository = repository_of(url)
+            if repository is not None:
+                host, repo = repository
+                by_host.setdefault(host, {}).setdefault(_cache_key(host, repo), repo)
+
+        results = {}
+        self.stats = {'repositories': sum(map(len, by_host.values())), 'cached': 0, 'looked_up': 0}
+        for host, repos in sorted(by_host.items()):
+            stale = []
+            for key, repo in repos.items():
+                cached = self.cache.get(key, now)
+                if cached is None:
+                    stale.append(repo)
+                else:
+                    results[key] = cached
+            self.stats['cached'] += len(repos) - len(stale)
+            logging.info(f"Repository metadata: {len(repos) - len(stale)} cached results for {host}, "
+                         f"looking up {len(stale)} repositories")
+            if not stale:
+                continue
+            client = self.clients[host]
+            for repo, result in client.lookup(stale).items():
+                key = _cache_key(host, repo)
+                self.cache.put(key, result)
+                results[key] = result
+            self.stats['looked_up'] += len(stale)
+
+        self.stats['requests'] = sum(client.requests for client in self.clients.values())
+        self.stats['retries'] = sum(client.retries for client in self.clients.values())
+
+        for status in (FOUND, MISSING):
+            self.stats[status] = sum(result['status'] == status for result in results.values())
+        self.stats['unknown'] = self.stats['repositories'] - len(results)
+        return results
+
+
+def repository_metadata(result):
+    """The metadata recorded in repositories.json for a found repository's result."""
+    return {'stars': result['stars'], 'last_commit': result['last_commit'], 'archived': result['archived']}
+
+
+def load_repositories(path):
+    """The entries of a repositories.json file, or {} if there is none or it cannot be read."""
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('version') == REPOSITORIES_VERSION:
+            return data.get('repositories', {})
+    except (OSError, ValueError) as e:
+        logging.warning("Ignoring unreadable repository metadata %s: %s", path, e)
+    return {}
+
+
+def repository_entries(urls, results, previous):
+    """
+    {repository key: metadata} for the repositories the URLs point into:
+    from results when they were found, from previous when they could not be
+    looked up. Missing repositories and those no URL points into are left out.
+    """
+    entries = {}
+    for key in {repository_key(url) for url in urls} - {None}:
+        result = results.get(key)
+        if result is None:
+            if key in previous:
+                entries[key] = previous[key]
+        elif result['status'] == FOUND:
+            entries[key] = repository_metadata(result)
+    return entries
+
+
+def save_repositories(entries, path):
+    """Writes repositories.json, one repository per line in key order, so its diffs stay readable."""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with atomic_write(path) as f:
+        f.write(f'{{"version": {REPOSITORIES_VERSION}, "repositories": {{')
+        for position, key in enumerate(sorted(entries)):
+            f.write(',' if position else '')
+            f.write(f"\n{json.dumps(key)}: {json.dumps(entries[key], separators=(',', ':'))}")
+        f.write('\n}}\n')
+
+
+def add_repo_metadata_arguments(parser):
+    """Adds the repository metadata options shared by the scripts that can look it up."""
+    parser.add_argument('--repo-metadata', action='store_true',
+                        help=f'Add stars, last commit date and archived status to GitHub resources '
+                             f'(needs a token in {TOKEN_VARIABLE})')
+    parser.add_argument('--repo-metadata-cache', default=None,
+                        help=f'Repository metadata cache (default: {REPO_METADATA_CACHE_NAME} next to the data)')
+    parser.add_argument('--github-api-url', default=GITHUB_API_URL, help='GitHub GraphQL endpoint')
+    parser.add_argument('--github-batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                        help='Repositories per GraphQL request')
+    parser.add_argument('--github-concurrency', type=int, default=DEFAULT_CONCURRENCY,
+                        help='Maximum number of GraphQL requests in flight')
+    parser.add_argument('--github-timeout', type=float, default=DEFAULT_TIMEOUT, help='Timeout per request in seconds')
+
+
+def repo_metadata_options(args):
+    """RepoMetadataFetcher keyword arguments from parsed add_repo_metadata_arguments options."""
+    return {
+        'api_url': args.github_api_url,
+        'batch_size': args.github_batch_size,
+        'concurrency': args.github_concurrency,
+        'timeout': args.github_timeout
+    }
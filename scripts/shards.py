@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Sharded sync and extraction.
+
+A catalog of many lists can be spread over several machines, CI runners or
+processes: `main.py --shard K/N` syncs and extracts only the lists of shard
+K of N, and merge_shards.py combines the partial results of all N shards
+into the corpus a single run would have written.
+
+Lists are assigned to shards by a stable hash of their source directory name
+(the last component of the repository URL without .git, see repo_directory), so every host computes the same
+assignment without coordination, and adding a list does not move the others.
+
+Each shard writes <output dir>/shards/shard-K-of-N/ with the lists it
+extracted, before URL filtering, and a manifest naming the source directory
+of each of them. URL filtering and duplicate detection look at the whole
+corpus, so they run after the merge. The merge interleaves the shards back
+into the order of the source directories, the order of a single run.
+"""
+import json
+import heapq
+import hashlib
+import argparse
+from pathlib import Path
+
+from scripts.storage import JsonFileWriter, iter_lists
+from scripts.update_awesome_lists import repo_directory
+from scripts.atomic import atomic_write
+
+SHARDS_VERSION = 1
+SHARDS_DIR_NAME = 'shards'
+SHARD_LISTS_NAME = 'awesome-lists.json'
+SHARD_MANIFEST_NAME = 'manifest.json'
+
+
+def parse_shard(text):
+    """Parses K/N into (K, N), with shards numbered from 1. Usable as an argparse type."""
+    try:
+        index, count = (int(part) for part in text.split('/'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected K/N, got '{text}'")
+    if not 1 <= index <= count:
+        raise argparse.ArgumentTypeError(f"shard {index} is not one of 1 to {count}")
+    return index, count
+
+
+def shard_of(key, count):
+    """The shard, from 1 to count, that key belongs to. Unlike hash(), stable across processes and hosts."""
+    digest = hashlib.sha256(key.encode('utf-8')).digest()
+    return int.from_bytes(digest[:8], 'big') % count + 1
+
+
+def in_shard(key, shard):
+    """Whether key belongs to shard, an (index, count) pair; everything does when shard is None."""
+    return shard is None or shard_of(key, shard[1]) == shard[0]
+
+
+def repo_key(repo_url):
+    """
+    The shard key of a repository: the directory it is synced to, which is
+    also the key the extraction of its README is assigned by.
+    """
+    return repo_directory(repo_url)
+
+
+def shard_dir(shards_dir, shard):
+    return Path(shards_dir) / f"shard-{shard[0]}-of-{shard[1]}"
+
+
+class ShardWriter:
+    """
+    Writes the partial result of one shard: the lists, keyed by source
+    directory, and on close the manifest recording them.
+    """
+
+    def __init__(self, shards_dir, shard):
+        self.shard = shard
+        self.path = shard_dir(shards_dir, shard)
+        self.lists_path = self.path / SHARD_LISTS_NAME
+        self.manifest_path = self.path / SHARD_MANIFEST_NAME
+        self._writer = JsonFileWriter(self.lists_path, indent=None)
+        self._lists = []
+
+    @property
+    def count(self):
+        return self._writer.count
+
+    def write(self, source, awesome_list):
+        self._writer.write(awesome_list)
+        self._lists.append({'source': source, 'name': awesome_list.name,
+                            'resources': awesome_list.resource_count()})
+
+    def close(self):
+        self._writer.close()
+        manifest = {
+            'version': SHARDS_VERSION,
+            'shard': self.shard[0],
+            'shards': self.shard[1],
+            'lists': self._lists
+        }
+        with atomic_write(self.manifest_path) as f:
+            json.dump(manifest, f, indent=2)
+        return manifest
+
+    def abort(self):
+        self._writer.abort()
+
+
+def load_shards(shards_dir):
+    """
+    Reads the manifest of every shard in shards_dir and returns them ordered
+    by shard. Raises ValueError unless they are the shards 1 to N of one
+    split with no source directory in more than one of them.
+    """
+    manifests = []
+    for path in sorted(Path(shards_dir).glob(f"shard-*/{SHARD_MANIFEST_NAME}")):
+        with open(path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        if manifest.get('version') != SHARDS_VERSION:
+            raise ValueError(f"Unsupported shard manifest version in {path}")
+        manifest['path'] = path.parent
+        manifests.append(manifest)
+    if not manifests:
+        raise ValueError(f"No shards found in {shards_dir}")
+
+    counts = {manifest['shards'] for manifest in manifests}
+    if len(counts) > 1:
+        raise ValueError(f"{shards_dir} holds shards of different splits ({', '.join(map(str, sorted(counts)))} "
+                         f"shards); remove the stale ones")
+    count = counts.pop()
+    manifests.sort(key=lambda manifest: manifest['shard'])
+    found = [manifest['shard'] for manifest in manifests]
+    missing = sorted(set(range(1, count + 1)) - set(found))
+    if missing:
+        raise ValueError(f"Missing shards {', '.join(f'{index}/{count}' for index in missing)} in {shards_dir}")
+    if len(found) != count:
+        raise ValueError(f"Shards found more than once in {shards_dir}")
+
+    owners = {}
+    for manifest in manifests:
+        for entry in manifest['lists']:
+            owner = owners.setdefault(entry['source'], manifest['shard'])
+            if owner != manifest['shard']:
+                raise ValueError(f"{entry['source']} is in shard {owner} and shard {manifest['shard']}")
+    return manifests
+
+
+def _iter_shard(manifest):
+    """Yields (source, list) for the lists of one shard, checking them against its manifest."""
+    lists_path = manifest['path'] / SHARD_LISTS_NAME
+    entries = manifest['lists']
+    read = 0
+    for entry, awesome_list in zip(entries, iter_lists(lists_path)):
+        if awesome_list.name != entry['name']:
+            raise ValueError(f"{lists_path} does not match its manifest: "
+                             f"found {awesome_list.name} where {entry['name']} was recorded")
+        read += 1
+        yield entry['source'], awesome_list
+    if read != len(entries):
+        raise ValueError(f"{lists_path} holds {read} of the {len(entries)} lists in its manifest")
+
+
+def iter_merged_lists(manifests):
+    """
+    Yields the lists of every shard in the order of their source directories.
+    Each shard is in that order already, so this is a streaming merge that
+    holds one list per shard in memory.
+    """
+    merged = heapq.merge(*(_iter_shard(manifest) for manifest in manifests), key=lambda item: item[0])
+    for _, awesome_list in merged:
+        yield awesome_list
@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""
+Storage backends for the awesome lists corpus.
+
+Two formats hold the same lists:
+
+- json: awesome-lists.json, the nested array the web interface reads;
+- sqlite: awesome-lists.sqlite, one row per list, category and resource,
+  with list, category, tag and host names stored once and indexed, so a
+  question like "all resources in category X" is an index lookup rather than
+  a parse of the whole corpus.
+
+open_list_writer and iter_lists pick the backend from the file suffix, so the
+pipeline and the scripts write and read both formats the same way. Writers
+work on a temporary file and replace the target on close, so readers never
+see a half-written corpus. SqliteStore answers queries on a database without
+loading it.
+"""
+import os
+import sys
+import json
+import sqlite3
+from urllib.parse import urlsplit
+
+# Add the repository root to the path to import our modules when run as a script
+if not __package__:
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.json_stream import JsonListWriter, iter_json_list
+from scripts.model import AwesomeList, Category, Resource
+from scripts.atomic import replace_file
+
+STORAGE_FORMATS = ('json', 'sqlite')
+STORAGE_SUFFIXES = {'json': '.json', 'sqlite': '.sqlite'}
+SQLITE_SCHEMA_VERSION = 1
+
+_SCHEMA = """
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE lists (id INTEGER PRIMARY KEY, name TEXT NOT NULL, extra TEXT);
+CREATE TABLE categories (
+    id INTEGER PRIMARY KEY,
+    list_id INTEGER NOT NULL REFERENCES lists(id),
+    name TEXT NOT NULL,
+    extra TEXT
+);
+CREATE TABLE hosts (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE);
+CREATE TABLE tags (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE);
+CREATE TABLE resources (
+    id INTEGER PRIMARY KEY,
+    category_id INTEGER NOT NULL REFERENCES categories(id),
+    name TEXT,
+    url TEXT,
+    description TEXT,
+    host_id INTEGER REFERENCES hosts(id),
+    extra TEXT
+);
+CREATE TABLE resource_tags (
+    resource_id INTEGER NOT NULL REFERENCES resources(id),
+    position INTEGER NOT NULL,
+    tag_id INTEGER NOT NULL REFERENCES tags(id),
+    PRIMARY KEY (resource_id, position)
+) WITHOUT ROWID;
+"""
+
+# Created once the data is in, which is faster than maintaining them per row
+_INDEXES = """
+CREATE INDEX lists_name ON lists(name);
+CREATE INDEX categories_list ON categories(list_id, name);
+CREATE INDEX categories_name ON categories(name);
+CREATE INDEX resources_category ON resources(category_id);
+CREATE INDEX resources_host ON resources(host_id);
+CREATE INDEX resource_tags_tag ON resource_tags(tag_id);
+"""
+
+
+def storage_format(path):
+    """Returns the storage format for a path from its suffix; anything but .sqlite is JSON."""
+    return 'sqlite' if os.fspath(path).endswith(STORAGE_SUFFIXES['sqlite']) else 'json'
+
+
+def url_host(url):
+    """The lowercase host name of url, or None."""
+    try:
+        return urlsplit(url).hostname
+    except (ValueError, AttributeError):
+        return None
+
+
+# Keys outside the model's schema are kept in the extra JSON column
+def _dump_extra(item):
+    return json.dumps(item.extra) if item.extra else None
+
+
+def _load_extra(extra):
+    return json.loads(extra) if extra else None
+
+
+class _ReplacingWriter:
+    """
+    Base for writers that build a temporary file and move it into place on
+    close, flushed to disk first, so the previous file stays intact until
+    the new one is complete.
+    """
+
+    def __init__(self, path):
+        self.path = os.fspath(path)
+        self.tmp_path = f"{self.path}.tmp"
+        self.count = 0
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+class JsonFileWriter(_ReplacingWriter):
+    """Writes awesome lists to a JSON file with JsonListWriter."""
+
+    def __init__(self, path, indent=2):
+        super().__init__(path)
+        self._file = open(self.tmp_path, 'w', encoding='utf-8')
+        self._writer = JsonListWriter(self._file, indent=indent)
+
+    def write(self, awesome_list):
+        self._writer.write(awesome_list.to_dict())
+        self.count += 1
+
+    def close(self):
+        self._writer.close()
+        self._file.close()
+        replace_file(self.tmp_path, self.path)
+
+    def abort(self):
+        self._file.close()
+        os.remove(self.tmp_path)
+
+
+class SqliteListWriter(_ReplacingWriter):
+    """Writes awesome lists to an SQLite database."""
+
+    def __init__(self, path):
+        super().__init__(path)
+        if os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+        self._db = sqlite3.connect(self.tmp_path)
+        # The file is replaced as a whole on close, and flushed to disk just
+        # before, so neither a journal nor per-transaction syncs are needed
+        self._db.execute('PRAGMA journal_mode = OFF')
+        self._db.execute('PRAGMA synchronous = OFF')
+        self._db.executescript(_SCHEMA)
+        self._db.execute('INSERT INTO meta VALUES (?, ?)', ('version', str(SQLITE_SCHEMA_VERSION)))
+        self._hosts = {}
+        self._tags = {}
+
+    def _intern(self, table, names, name):
+        row_id = names.get(name)
+        if row_id is None:
+            row_id = names[name] = len(names) + 1
+            self._db.execute(f'INSERT INTO {table} (id, name) VALUES (?, ?)', (row_id, name))
+        return row_id
+
+    def write(self, awesome_list):
+        db = self._db
+        list_id = db.execute('INSERT INTO lists (name, extra) VALUES (?, ?)',
+                             (awesome_list.name, _dump_extra(awesome_list))).lastrowid
+        for category in awesome_list.categories:
+            category_id = db.execute('INSERT INTO categories (list_id, name, extra) VALUES (?, ?, ?)',
+                                     (list_id, category.name, _dump_extra(category))).lastrowid
+            for resource in category.resources:
+                host = url_host(resource.url)
+                host_id = self._intern('hosts', self._hosts, host) if host else None
+                resource_id = db.execute(
+                    'INSERT INTO resources (category_id, name, url, description, host_id, extra) '
+                    'VALUES (?, ?, ?, ?, ?, ?)',
+                    (category_id, resource.name, resource.url, resource.description, host_id, _dump_extra(resource))
+                ).lastrowid
+                if resource.tags:
+                    db.executemany('INSERT INTO resource_tags VALUES (?, ?, ?)', [
+                        (resource_id, position, self._intern('tags', self._tags, tag))
+                        for position, tag in enumerate(resource.tags)
+                    ])
+        self.count += 1
+
+    def close(self):
+        self._db.executescript(_INDEXES)
+        self._db.commit()
+        self._db.execute('ANALYZE')
+        self._db.close()
+        replace_file(self.tmp_path, self.path)
+
+    def abort(self):
+        self._db.close()
+        os.remove(self.tmp_path)
+
+
+def open_list_writer(path, indent=2):
+    """Returns a writer for path in the format its suffix selects. indent only applies to JSON."""
+    if storage_format(path) == 'sqlite':
+        return SqliteListWriter(path)
+    return JsonFileWriter(path, indent)
+
+
+class SqliteStore:
+    """Read access to a corpus written by SqliteListWriter."""
+
+    def __init__(self, path):
+        if not os.path.exists(path):
+            raise FileNotFoundError(path)
+        self.db = sqlite3.connect(f"file:{os.fspath(path)}?mode=ro", uri=True)
+        version = self.db.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        if version is None or int(version[0]) != SQLITE_SCHEMA_VERSION:
+            raise ValueError(f"Unsupported awesome lists database version in {path}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        self.db.close()
+
+    def _tags(self, resource_ids):
+        tags = {}
+        for start in range(0, len(resource_ids), 500):
+            chunk = resource_ids[start:start + 500]
+            rows = self.db.execute(
+                'SELECT resource_id, tags.name FROM resource_tags JOIN tags ON tags.id = tag_id '
+                f'WHERE resource_id IN ({",".join("?" * len(chunk))}) ORDER BY resource_id, position', chunk)
+            for resource_id, tag in rows:
+                tags.setdefault(resource_id, []).append(tag)
+        return tags
+
+    def _resources(self, where, params):
+        rows = self.db.execute(
+            'SELECT resources.id, lists.name, categories.name, resources.name, url, description, resources.extra '
+            'FROM resources JOIN categories ON categories.id = category_id JOIN lists ON lists.id = list_id '
+            f'LEFT JOIN hosts ON hosts.id = host_id WHERE {where} ORDER BY resources.id', params).fetchall()
+        tags = self._tags([row[0] for row in rows])
+        return [
+            {'list': list_name, 'category': category_name,
+             'resource': Resource(name, url, description, tags.get(resource_id), _load_extra(extra))}
+            for resource_id, list_name, category_name, name, url, description, extra in rows
+        ]
+
+    def list_names(self):
+        return [name for name, in self.db.execute('SELECT name FROM lists ORDER BY id')]
+
+    def category_names(self, list_name=None):
+        if list_name is None:
+            rows = self.db.execute('SELECT DISTINCT name FROM categories ORDER BY name')
+        else:
+            rows = self.db.execute('SELECT categories.name FROM categories JOIN lists ON lists.id = list_id '
+                                   'WHERE lists.name = ? ORDER BY categories.id', (list_name,))
+        return [name for name, in rows]
+
+    def resources_in_category(self, category, list_name=None):
+        """Resources of every category with this name, or only of list_name's, with their list and category."""
+        if list_name is None:
+            return self._resources('categories.name = ?', (category,))
+        return self._resources('categories.name = ? AND lists.name = ?', (category, list_name))
+
+    def resources_with_tag(self, tag):
+        return self._resources('resources.id IN (SELECT resource_id FROM resource_tags JOIN tags '
+                               'ON tags.id = tag_id WHERE tags.name = ?)', (tag,))
+
+    def resources_on_host(self, host):
+        return self._resources('hosts.name = ?', (host.lower(),))
+
+    def count_resources(self):
+        return self.db.execute('SELECT COUNT(*) FROM resources').fetchone()[0]
+
+    def iter_lists(self):
+        """Yields every awesome list as an AwesomeList."""
+        db = self.db
+        for list_id, list_name, list_extra in db.execute('SELECT id, name, extra FROM lists ORDER BY id').fetchall():
+            rows = db.execute(
+                'SELECT categories.id, categories.name, categories.extra, resources.id, resources.name, url, '
+                'description, resources.extra FROM categories LEFT JOIN resources ON category_id = categories.id '
+                'WHERE list_id = ? ORDER BY categories.id, resources.id', (list_id,)).fetchall()
+            tags = self._tags([row[3] for row in rows if row[3] is not None])
+            categories = []
+            current_id = None
+            for category_id, category_name, category_extra, resource_id, name, url, description, extra in rows:
+                if category_id != current_id:
+                    current_id = category_id
+                    resources = []
+                    categories.append(Category(category_name, resources, _load_extra(category_extra)))
+                if resource_id is not None:
+                    resources.append(Resource(name, url, description, tags.get(resource_id), _load_extra(extra)))
+            yield AwesomeList(list_name, categories, _load_extra(list_extra))
+
+
+def iter_lists(path):
+    """Yields the awesome lists stored at path as AwesomeList objects, one at a time, in either format."""
+    if storage_format(path) == 'sqlite':
+        with SqliteStore(path) as store:
+            yield from store.iter_lists()
+        return
+    with open(path, 'r', encoding='utf-8') as f:
+        for data in iter_json_list(f):
+            yield AwesomeList.from_dict(data)
@@ -1,22 +1,24 @@
 #!/usr/bin/env python3
 import os
+import sys
+import shutil
 import subprocess
 import logging
 import argparse
 import json
 from pathlib import Path
 import time
+from urllib.parse import urlparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 
-# Ensure logs directory exists
-os.makedirs('logs', exist_ok=True)
+# Add the repository root to the path to import our modules when run as a script
+if not __package__:
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-# Configure logging
-logging.basicConfig(
-    filename='logs/update_awesome_lists.log',
-    level=logging.INFO,
-    format='%(asctime)s %(levelname)s: %(message)s'
-)
+from scripts.instrumentation import add_instrumentation_arguments, open_run_report
+from scripts.atomic import atomic_write
+from scripts.log_setup import configure_logging, add_logging_arguments
 
 # List of awesome repositories to clone/update
 AWESOME_REPOS = [
@@ -45,55 +47,331 @@ AWESOME_REPOS = [
     "https://github.com/matteocrippa/awesome-swift"
 ]
 
-def run_command(command, cwd=None):
-    """Run a shell command and log the output"""
+# Default number of repositories synced concurrently
+DEFAULT_JOBS = 8
+
+# Supported fetch strategies:
+#   full    - complete clone with history (original behaviour)
+#   shallow - depth-1 clone of the default branch
+#   readme  - depth-1, blobless clone with a sparse checkout of README.md only,
+#             falling back to downloading just the README blob
+FETCH_MODES = ('full', 'shallow', 'readme')
+DEFAULT_FETCH_MODE = 'full'
+
+# Source registry written by discover.py: the repositories to sync instead of AWESOME_REPOS
+SOURCES_FILE_NAME = 'sources.json'
+SOURCES_VERSION = 1
+
+# Written next to a README fetched without git: the commit it was fetched from
+README_HEAD_FILE_NAME = '.readme-head'
+
+# update_metadata argument for an entry this run did not produce
+KEEP = object()
+
+def repo_directory(repo_url):
+    """
+    The directory a repository is synced to: the last component of its URL
+    without a trailing slash or .git suffix, the name `git clone` picks.
+    """
+    name = repo_url.rstrip('/').split('/')[-1]
+    if name.endswith('.git'):
+        name = name[:-4]
+    return name
+
+def run_command(command, cwd=None, timeout=None):
+    """
+    Run a command, given as a list of arguments so no shell parses the
+    repository URLs and paths in it, and log the output
+    """
     try:
-        logging.info(f"Running command: {command}")
+        logging.info(f"Running command: {' '.join(command)}")
         result = subprocess.run(
             command,
-            shell=True,
             check=True,
             text=True,
             capture_output=True,
-            cwd=cwd
+            cwd=cwd,
+            timeout=timeout
         )
         logging.info(f"Command output: {result.stdout}")
         return True
     except subprocess.CalledProcessError as e:
-        logging.error(f"Command failed: {e}")
-        logging.error(f"Error output: {e.stderr}")
+        logging.error("Command failed: %s", e)
+        logging.error("Error output: %s", e.stderr)
+        return False
+    except subprocess.TimeoutExpired as e:
+        logging.error("Command timed out after %s seconds: %s", timeout, e.cmd)
+        return False
+    except OSError as e:
+        logging.error("Could not run %s: %s", command[0], e)
         return False
 
-def clone_or_update_repo(repo_url, target_dir):
+def _archive_readme(repo_url, readme_path, timeout=None):
+    """Fetch README.md through `git archive --remote` and unpack it from the tar stream"""
+    # Imported here since only the blob fallback for non-GitHub remotes needs it
+    import io
+    import tarfile
+    command = ['git', 'archive', f"--remote={repo_url}", 'HEAD', 'README.md']
+    try:
+        logging.info(f"Running command: {' '.join(command)}")
+        result = subprocess.run(command, check=True, capture_output=True, timeout=timeout,
+                                env={**os.environ, 'GIT_TERMINAL_PROMPT': '0'})
+        with tarfile.open(fileobj=io.BytesIO(result.stdout)) as archive:
+            content = archive.extractfile('README.md').read()
+    except subprocess.CalledProcessError as e:
+        logging.error("Command failed: %s", e)
+        logging.error("Error output: %s", e.stderr.decode('utf-8', 'replace'))
+        return False
+    except subprocess.TimeoutExpired as e:
+        logging.error("Command timed out after %s seconds: %s", timeout, e.cmd)
+        return False
+    except (OSError, tarfile.TarError, KeyError, AttributeError) as e:
+        logging.error("Could not read README.md from the archive of %s: %s", repo_url, e)
+        return False
+    with open(readme_path, 'wb') as f:
+        f.write(content)
+    return True
+
+def fetch_readme_blob(repo_url, repo_path, timeout=None):
+    """
+    Fetch only README.md of a repository without cloning it.
+    GitHub repositories are downloaded from raw.githubusercontent.com; other
+    remotes are asked for the single file through `git archive --remote`.
+    There is no checkout to ask which commit the README came from, so the
+    remote HEAD is resolved first and recorded next to it for local_head().
+    Resolving it before the download means a push in between makes the next
+    check sync again rather than miss the change.
+    """
+    os.makedirs(repo_path, exist_ok=True)
+    readme_path = os.path.join(repo_path, 'README.md')
+    parsed = urlparse(repo_url)
+    head = remote_head(repo_url, timeout=timeout)
+
+    if parsed.netloc.lower() == 'github.com':
+        owner_repo = parsed.path.strip('/')
+        if owner_repo.endswith('.git'):
+            owner_repo = owner_repo[:-4]
+        # The exact commit when it is known, so the README matches the recorded HEAD
+        raw_url = f"https://raw.githubusercontent.com/{owner_repo}/{head or 'HEAD'}/README.md"
+        # Imported here since most runs clone or fetch and never download a blob
+        import urllib.request
+        try:
+            logging.info(f"Downloading README blob: {raw_url}")
+            with urllib.request.urlopen(raw_url, timeout=timeout) as response:
+                content = response.read()
+            with open(readme_path, 'wb') as f:
+                f.write(content)
+            ok = True
+        except Exception as e:
+            logging.error("Error downloading README from %s: %s", raw_url, e)
+            ok = False
+    else:
+        # upload-archive only serves refs, not commits, so this is HEAD as of now
+        ok = _archive_readme(repo_url, readme_path, timeout=timeout)
+
+    if ok:
+        _record_readme_head(repo_path, head)
+    return ok
+
+def _record_readme_head(repo_path, head):
+    head_path = os.path.join(repo_path, README_HEAD_FILE_NAME)
+    if head is None:
+        # Unknown, so the next check syncs the repository again
+        if os.path.exists(head_path):
+            os.remove(head_path)
+        return
+    with atomic_write(head_path) as f:
+        f.write(head + '\n')
+
+def _clone_readme_only(repo_url, repo_name, target_dir, timeout=None):
+    """Clone a repository at depth 1 without blobs and check out README.md only"""
+    repo_path = os.path.join(target_dir, repo_name)
+    cloned = (
+        run_command(['git', 'clone', '--depth', '1', '--filter=blob:none', '--no-checkout', repo_url, repo_name],
+                    cwd=target_dir, timeout=timeout)
+        and run_command(['git', 'sparse-checkout', 'set', '--no-cone', '/README.md'], cwd=repo_path, timeout=timeout)
+        and run_command(['git', 'checkout'], cwd=repo_path, timeout=timeout)
+    )
+    if cloned:
+        return True
+
+    logging.warning("Sparse clone failed for %s, falling back to README blob download", repo_url)
+    if os.path.exists(os.path.join(repo_path, '.git')):
+        shutil.rmtree(repo_path, ignore_errors=True)
+    return fetch_readme_blob(repo_url, repo_path, timeout=timeout)
+
+def clone_or_update_repo(repo_url, target_dir, timeout=None, fetch_mode=DEFAULT_FETCH_MODE):
     """Clone a repository if it doesn't exist, or pull updates if it does"""
-    repo_name = repo_url.split('/')[-1]
+    if fetch_mode not in FETCH_MODES:
+        raise ValueError(f"Unknown fetch mode: {fetch_mode}")
+
+    repo_name = repo_directory(repo_url)
     repo_path = os.path.join(target_dir, repo_name)
     
+    if fetch_mode == 'full':
+        if os.path.exists(repo_path):
+            logging.info(f"Updating repository: {repo_name}")
+            return run_command(['git', 'pull'], cwd=repo_path, timeout=timeout)
+        else:
+            logging.info(f"Cloning repository: {repo_url}")
+            return run_command(['git', 'clone', repo_url, repo_name], cwd=target_dir, timeout=timeout)
+
+    if os.path.exists(os.path.join(repo_path, '.git')):
+        # Shallow and sparse checkouts are refreshed by fetching only the new tip
+        logging.info(f"Updating repository ({fetch_mode}): {repo_name}")
+        return (run_command(['git', 'fetch', '--depth', '1', 'origin'], cwd=repo_path, timeout=timeout)
+                and run_command(['git', 'reset', '--hard', 'FETCH_HEAD'], cwd=repo_path, timeout=timeout))
+
+    if fetch_mode == 'shallow':
+        logging.info(f"Cloning repository (shallow): {repo_url}")
+        return run_command(['git', 'clone', '--depth', '1', repo_url, repo_name], cwd=target_dir, timeout=timeout)
+
     if os.path.exists(repo_path):
-        logging.info(f"Updating repository: {repo_name}")
-        return run_command("git pull", cwd=repo_path)
-    else:
-        logging.info(f"Cloning repository: {repo_url}")
-        return run_command(f"git clone {repo_url}", cwd=target_dir)
+        # A README-only directory left behind by the blob fallback
+        logging.info(f"Updating README blob: {repo_name}")
+        return fetch_readme_blob(repo_url, repo_path, timeout=timeout)
 
-def update_metadata(output_dir):
-    """Update metadata file with timestamp information"""
-    metadata_path = os.path.join(output_dir, "metadata.json")
-    
-    metadata = {
-        "last_updated": datetime.now().isoformat(),
-        "update_count": 1
+    logging.info(f"Cloning repository (readme): {repo_url}")
+    return _clone_readme_only(repo_url, repo_name, target_dir, timeout=timeout)
+
+def remote_head(repo_url, timeout=None):
+    """
+    Returns the commit the remote HEAD of a repository points to, or None if
+    the remote cannot be reached. Costs one `git ls-remote` round trip and no
+    object transfer.
+    """
+    try:
+        result = subprocess.run(
+            ['git', 'ls-remote', repo_url, 'HEAD'],
+            check=True,
+            text=True,
+            capture_output=True,
+            timeout=timeout,
+            # Fail instead of prompting for credentials on a missing repository
+            env={**os.environ, 'GIT_TERMINAL_PROMPT': '0'}
+        )
+    except (OSError, subprocess.CalledProcessError, subprocess.TimeoutExpired) as e:
+        logging.error("Could not query the remote HEAD of %s: %s", repo_url, e)
+        return None
+    fields = result.stdout.split()
+    return fields[0] if fields else None
+
+def local_head(repo_path):
+    """
+    Returns the commit checked out in repo_path, or for a README fetched
+    without git the commit it was fetched from, or None if neither is known
+    """
+    if not os.path.exists(os.path.join(repo_path, '.git')):
+        try:
+            with open(os.path.join(repo_path, README_HEAD_FILE_NAME), 'r', encoding='utf-8') as f:
+                return f.read().strip() or None
+        except OSError:
+            return None
+    try:
+        result = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=repo_path, check=True, text=True,
+                                capture_output=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return result.stdout.strip() or None
+
+def _sync_one(repo_url, target_dir, timeout, fetch_mode):
+    """Sync a single repository and return its result record"""
+    start_time = time.time()
+    try:
+        ok = clone_or_update_repo(repo_url, target_dir, timeout=timeout, fetch_mode=fetch_mode)
+    except Exception as e:
+        logging.error("Error syncing %s: %s", repo_url, e)
+        ok = False
+    return {
+        'repo': repo_url,
+        'status': 'ok' if ok else 'failed',
+        'duration': round(time.time() - start_time, 2)
     }
+
+def sync_repositories(repo_urls, target_dir, jobs=DEFAULT_JOBS, timeout=None, fetch_mode=DEFAULT_FETCH_MODE):
+    """
+    Clone or update repositories using a bounded pool of worker threads.
+    Each repository gets its own timeout so one slow remote cannot stall the rest.
+    Returns one result record per repository, in the order of repo_urls.
+    """
+    os.makedirs(target_dir, exist_ok=True)
+    jobs = max(1, jobs)
+    results = {}
+
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        futures = {
+            executor.submit(_sync_one, repo_url, target_dir, timeout, fetch_mode): repo_url
+            for repo_url in repo_urls
+        }
+        for future in as_completed(futures):
+            result = future.result()
+            results[futures[future]] = result
+            logging.info(f"Synced {result['repo']}: {result['status']} in {result['duration']:.2f}s")
+
+    return [results[repo_url] for repo_url in repo_urls]
+
+def print_sync_summary(results):
+    """Print a per-repository summary of a sync run"""
+    failed = [r for r in results if r['status'] != 'ok']
+    print("\nRepository Sync Summary:")
+    for result in results:
+        print(f"  {result['status']:<6} {result['duration']:>7.2f}s  {result['repo']}")
+    print(f"Synced {len(results) - len(failed)} of {len(results)} repositories ({len(failed)} failed)")
+    if failed:
+        logging.warning("Failed to sync %s repositories: %s", len(failed), ', '.join(r['repo'] for r in failed))
+
+def load_sources(output_dir):
+    """
+    Returns the repositories to sync: those of the source registry in
+    output_dir when discover.py wrote one, AWESOME_REPOS otherwise.
+    """
+    sources_path = os.path.join(output_dir, SOURCES_FILE_NAME)
+    if not os.path.exists(sources_path):
+        return AWESOME_REPOS
+    try:
+        with open(sources_path, 'r', encoding='utf-8') as f:
+            sources = json.load(f)
+        if sources.get('version') != SOURCES_VERSION:
+            raise ValueError(f"unsupported version {sources.get('version')}")
+        return [repo['url'] for repo in sources['repos']]
+    except (OSError, ValueError, KeyError) as e:
+        logging.error("Error reading source registry %s, syncing the built-in list: %s", sources_path, e)
+        return AWESOME_REPOS
+
+def load_metadata(output_dir):
+    """Load the existing metadata file, or return an empty dict"""
+    metadata_path = os.path.join(output_dir, "metadata.json")
+    if not os.path.exists(metadata_path):
+        return {}
+    try:
+        with open(metadata_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception as e:
+        logging.error("Error reading metadata: %s", e)
+        return {}
+
+def update_metadata(output_dir, artifacts=KEEP, changes=KEEP):
+    """
+    Update metadata file with timestamp information, the content-addressed
+    artifacts published by publish_artifacts and the change summary from
+    compute_changes. An entry left as KEEP is kept from the existing file, so
+    a run that does not publish or diff does not drop it; an entry given as
+    None is removed, so a run that had nothing to diff against leaves no
+    summary of an earlier diff behind.
+    """
+    metadata_path = os.path.join(output_dir, "metadata.json")
     
-    if os.path.exists(metadata_path):
-        try:
-            with open(metadata_path, 'r', encoding='utf-8') as f:
-                existing_metadata = json.load(f)
-                metadata["update_count"] = existing_metadata.get("update_count", 0) + 1
-        except Exception as e:
-            logging.error(f"Error reading metadata: {e}")
+    metadata = load_metadata(output_dir)
+    metadata["last_updated"] = datetime.now().isoformat()
+    metadata["update_count"] = metadata.get("update_count", 0) + 1
+    for key, value in (("artifacts", artifacts), ("changes", changes)):
+        if value is None:
+            metadata.pop(key, None)
+        elif value is not KEEP:
+            metadata[key] = value
     
-    with open(metadata_path, 'w', encoding='utf-8') as f:
+    # Replaced in one rename, so a reader never sees a half-written file
+    with atomic_write(metadata_path) as f:
         json.dump(metadata, f, indent=2)
     
     logging.info(f"Updated metadata: {metadata}")
@@ -102,13 +380,21 @@ def main():
     parser = argparse.ArgumentParser(description='Update awesome lists data')
     parser.add_argument('--source-dir', default='awesome-lists-sources', help='Directory to store repositories')
     parser.add_argument('--output-dir', default='data', help='Directory for output files')
+    parser.add_argument('--jobs', type=int, default=DEFAULT_JOBS, help='Number of repositories to sync concurrently')
+    parser.add_argument('--timeout', type=float, default=None, help='Per-repository sync timeout in seconds')
+    parser.add_argument('--fetch-mode', choices=FETCH_MODES, default=DEFAULT_FETCH_MODE,
+                        help='How much of each repository to fetch (full, shallow or readme)')
+    parser.add_argument('--workers', type=int, default=1, help='Number of processes used to parse READMEs')
+    parser.add_argument('--engine', choices=('bs4', 'fast'), default='bs4', help='Markdown extraction engine')
+    add_instrumentation_arguments(parser)
+    add_logging_arguments(parser)
     args = parser.parse_args()
     
-    # Ensure logs directory exists
-    os.makedirs('logs', exist_ok=True)
+    configure_logging('update_awesome_lists', args.log_level)
     
+    report = open_run_report(args, 'update_awesome_lists')
     start_time = time.time()
-    logging.info("Starting awesome lists update process")
+    logging.info(f"Starting awesome lists update process (run {report.run_id})")
     
     # Create directories if they don't exist
     source_dir = Path(args.source_dir)
@@ -118,22 +404,34 @@ def main():
     os.makedirs(output_dir, exist_ok=True)
     
     # Clone or update repositories
-    for repo_url in AWESOME_REPOS:
-        clone_or_update_repo(repo_url, source_dir)
+    with report.stage('sync', fetch_mode=args.fetch_mode, jobs=args.jobs) as stage:
+        results = sync_repositories(load_sources(output_dir), source_dir, jobs=args.jobs, timeout=args.timeout,
+                                    fetch_mode=args.fetch_mode)
+        stage['repositories'] = len(results)
+        stage['failed'] = sum(result['status'] != 'ok' for result in results)
+    for result in results:
+        report.record('repository', stage='sync', repo=result['repo'], status=result['status'],
+                      wall_s=result['duration'])
+    print_sync_summary(results)
     
-    # Run the extraction script with URL filtering
-    extract_script = Path("scripts/extract_data.py")
-    if extract_script.exists():
-        output_path = output_dir / "awesome-lists.json"
-        # Add the --filter-urls flag to automatically filter out resources with invalid URLs
-        run_command(f"python {extract_script} --source-dir {source_dir} --output {output_path} --filter-urls --url-stats")
-    else:
-        logging.error(f"Extraction script not found: {extract_script}")
+    # Extract the lists and filter out resources with invalid URLs in this process
+    # Imported here: the pipeline imports this module
+    from scripts.pipeline import run_pipeline, extract, filter_urls, write
+    with report.stage('extract', engine=args.engine, workers=args.workers) as stage:
+        pipeline = run_pipeline(source_dir, output_dir, stages=(extract, filter_urls, write), repos=[],
+                                workers=args.workers, engine=args.engine, cache_dir=output_dir / '.extract-cache',
+                                report=report)
+        stage['lists'] = pipeline.lists_written
+        stage['resources'] = pipeline.stats['total_resources']
+        stage['invalid_urls'] = pipeline.stats['invalid_urls']
+    print(f"Extracted {pipeline.lists_written} lists with {pipeline.stats['total_resources']} resources "
+          f"({pipeline.stats['invalid_urls']} with invalid URLs removed) to {pipeline.output_path}")
     
     # Update metadata
     update_metadata(output_dir)
     
     elapsed_time = time.time() - start_time
+    report.close(status='ok')
     logging.info(f"Update process completed in {elapsed_time:.2f} seconds")
 
 if __name__ == "__main__":
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+URL validation, canonicalization and duplicate detection shared by the
+extraction and filtering scripts.
+
+check_url parses a URL once and returns its canonical form, or None when it
+is not an absolute http(s) URL. Results are memoized, so a URL listed in
+several awesome lists is only parsed the first time. The canonical form
+lowercases the scheme and host, drops the default port, a trailing slash and
+tracking parameters (utm_*, fbclid, ...). It is only used to spot
+duplicates; resources keep the URL as written.
+
+UrlFilter validates the resources of each list and records duplicates in the
+same loop, and can summarize them in a duplicate report.
+"""
+import re
+import json
+import logging
+from functools import lru_cache
+from urllib.parse import urlsplit
+
+from scripts.atomic import atomic_write
+
+DUPLICATES_VERSION = 1
+DUPLICATES_FILE_NAME = 'duplicates.json'
+
+# Large enough for every URL of the current corpus
+URL_CACHE_SIZE = 1 << 17
+
+TRACKING_PARAM_PREFIXES = ('utm_',)
+TRACKING_PARAMS = frozenset([
+    'fbclid', 'gclid', 'dclid', 'msclkid', 'yclid', 'igshid', 'mc_cid', 'mc_eid', '_hsenc', '_hsmi'
+])
+DEFAULT_PORTS = {'http': ':80', 'https': ':443'}
+
+# The common case: a lowercase http(s) scheme and an ASCII netloc without
+# brackets or whitespace, which urlsplit would split the same way. Anything
+# else goes through urlsplit.
+_SIMPLE_URL_RE = re.compile(r"(https?)://([\w.~%!$&'()*+,;=:@-]+)(/[^?#\s]*)?(?:\?([^#\s]*))?(?:#(\S*))?", re.ASCII)
+
+
+def _is_tracking_param(pair):
+    key = pair.partition('=')[0].lower()
+    return key in TRACKING_PARAMS or key.startswith(TRACKING_PARAM_PREFIXES)
+
+
+def _canonical(scheme, netloc, path, query, fragment):
+    netloc = netloc.lower()
+    if netloc.endswith(DEFAULT_PORTS[scheme]):
+        netloc = netloc[:-len(DEFAULT_PORTS[scheme])]
+    canonical = f"{scheme}://{netloc}{path.rstrip('/')}"
+    if query:
+        query = '&'.join(pair for pair in query.split('&') if pair and not _is_tracking_param(pair))
+        if query:
+            canonical += f"?{query}"
+    if fragment:
+        canonical += f"#{fragment}"
+    return canonical
+
+
+@lru_cache(maxsize=URL_CACHE_SIZE)
+def check_url(url):
+    """Returns the canonical form of url, or None if it has no http(s) scheme or no netloc (domain)."""
+    match = _SIMPLE_URL_RE.fullmatch(url)
+    if match:
+        scheme, netloc, path, query, fragment = match.groups()
+        return _canonical(scheme, netloc, path or '', query, fragment)
+    try:
+        parts = urlsplit(url)
+    except ValueError:
+        return None
+    if parts.scheme not in DEFAULT_PORTS or not parts.netloc:
+        return None
+    return _canonical(parts.scheme, parts.netloc, parts.path, parts.query, parts.fragment)
+
+
+def is_valid_url(url):
+    """
+    Check if a URL is valid.
+    A valid URL must have both a scheme (http, https) and a netloc (domain).
+    """
+    return isinstance(url, str) and check_url(url) is not None
+
+
+def _occurrence(list_name, category_name, resource):
+    return {'list': list_name, 'category': category_name, 'name': resource.name, 'url': resource.url}
+
+
+class UrlFilter:
+    """
+    Drops resources with invalid URLs, and the categories and lists left
+    empty, while recording resources whose canonical URL was already seen in
+    this or an earlier list. Categories and lists are only copied when a
+    resource was dropped from them. Counters are accumulated in stats.
+    """
+
+    def __init__(self, stats=None):
+        self.stats = stats if stats is not None else {}
+        for key in ('total_resources', 'valid_urls', 'invalid_urls', 'duplicate_resources'):
+            self.stats.setdefault(key, 0)
+        # Canonical URL -> (list, category, resource) of its first occurrence
+        self._first = {}
+        # Canonical URL -> occurrences, for URLs seen more than once
+        self._duplicates = {}
+
+    def filter_list(self, awesome_list):
+        """Returns awesome_list without invalid resources, or None if nothing is left."""
+        stats = self.stats
+        first = self._first
+        list_name = awesome_list.name
+        categories = awesome_list.categories
+        kept_categories = []
+        changed = False
+        duplicates = 0
+        removed = 0
+
+        for category in categories:
+            resources = category.resources
+            category_name = category.name
+            kept = []
+            for resource in resources:
+                url = resource.url
+                canonical = check_url(url) if isinstance(url, str) else None
+                if canonical is None:
+                    logging.debug("Removing resource '%s' with invalid URL: '%s'", resource.name or 'Unknown', url)
+                    continue
+                kept.append(resource)
+                previous = first.get(canonical)
+                if previous is None:
+                    first[canonical] = (list_name, category_name, resource)
+                    continue
+                duplicates += 1
+                occurrences = self._duplicates.get(canonical)
+                if occurrences is None:
+                    occurrences = self._duplicates[canonical] = [_occurrence(*previous)]
+                occurrences.append(_occurrence(list_name, category_name, resource))
+
+            stats['total_resources'] += len(resources)
+            stats['valid_urls'] += len(kept)
+            stats['invalid_urls'] += len(resources) - len(kept)
+            removed += len(resources) - len(kept)
+            # Only keep categories that still have resources
+            if kept and len(kept) == len(resources):
+                kept_categories.append(category)
+                continue
+            changed = True
+            if kept:
+                kept_categories.append(category.with_resources(kept))
+
+        stats['duplicate_resources'] += duplicates
+        if removed:
+            logging.info("Removed %d resources with invalid URLs from %s", removed, list_name)
+        # Only keep lists that still have categories
+        if not kept_categories:
+            return None
+        if not changed:
+            return awesome_list
+        return awesome_list.with_categories(kept_categories)
+
+    def iter_lists(self, lists):
+        """Yields the filtered lists, skipping the ones left empty."""
+        for awesome_list in lists:
+            filtered_list = self.filter_list(awesome_list)
+            if filtered_list is not None:
+                yield filtered_list
+
+    def duplicate_report(self):
+        """
+        Returns the URLs found more than once, most repeated first, with every
+        occurrence as written. cross_list counts the URLs found in more than
+        one awesome list.
+        """
+        urls = []
+        cross_list = 0
+        for canonical, occurrences in self._duplicates.items():
+            lists = len({occurrence['list'] for occurrence in occurrences})
+            cross_list += lists > 1
+            urls.append({'url': canonical, 'lists': lists, 'occurrences': occurrences})
+        urls.sort(key=lambda entry: (-len(entry['occurrences']), entry['url']))
+        return {
+            'version': DUPLICATES_VERSION,
+            'duplicate_urls': len(urls),
+            'duplicate_resources': self.stats['duplicate_resources'],
+            'cross_list': cross_list,
+            'urls': urls
+        }
+
+
+def save_duplicate_report(report, path):
+    """Writes a duplicate report returned by UrlFilter.duplicate_report to path."""
+    with atomic_write(path) as f:
+        json.dump(report, f, indent=2)
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Watch mode: keep the data fresh between the daily runs.
+
+watch() checks for changes every interval seconds and calls an update
+function when a README changed:
+
+- RemoteWatcher asks every remote for its HEAD with `git ls-remote`, one
+  round trip without object transfer, and only the repositories whose HEAD
+  moved are synced;
+- SourceWatcher then compares the awesome-*/README.md files of the source
+  tree with the previous check. Files are hashed only when their size or
+  modification time changed, so a quiet poll reads no README.
+
+The update reruns the full pipeline over every list, since the corpus,
+search index and artifacts are written whole. The extraction cache is keyed
+on the README hash, so only the lists that changed are parsed again. The corpus, search
+index manifest and metadata are each replaced in one rename, so a reader
+sees either the previous or the new version of a file.
+"""
+import os
+import sys
+import time
+import logging
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+# Add the repository root to the path to import our modules when run as a script
+if not __package__:
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.update_awesome_lists import (
+    sync_repositories,
+    remote_head,
+    local_head,
+    repo_directory,
+    DEFAULT_JOBS,
+    DEFAULT_FETCH_MODE
+)
+from scripts.extract_data import readme_digest
+
+DEFAULT_INTERVAL = 300
+
+
+class SourceWatcher:
+    """Finds the awesome-* READMEs of a source tree that were added, removed or changed since the last check."""
+
+    def __init__(self, source_dir):
+        self.source_dir = Path(source_dir)
+        # Directory name -> (size, mtime_ns, sha256) of its README
+        self._seen = {}
+
+    def changed(self):
+        """Returns the names of the directories whose README changed. The first call returns all of them."""
+        current = {}
+        changed = []
+        for readme_path in sorted(self.source_dir.glob('awesome-*/README.md')):
+            name = readme_path.parent.name
+            try:
+                stat = readme_path.stat()
+            except OSError:
+                continue
+            previous = self._seen.get(name)
+            if previous is not None and previous[:2] == (stat.st_size, stat.st_mtime_ns):
+                current[name] = previous
+                continue
+            digest = readme_digest(readme_path)
+            current[name] = (stat.st_size, stat.st_mtime_ns, digest)
+            if previous is None or previous[2] != digest:
+                changed.append(name)
+        changed.extend(sorted(self._seen.keys() - current.keys()))
+        self._seen = current
+        return changed
+
+    def forget(self, names):
+        """Makes the next check report names again, for example after a failed update."""
+        for name in names:
+            self._seen.pop(name, None)
+
+
+class RemoteWatcher:
+    """Finds the repositories whose remote HEAD moved since they were last synced."""
+
+    def __init__(self, repos, source_dir, jobs=DEFAULT_JOBS, timeout=None):
+        self.repos = list(repos)
+        self.source_dir = Path(source_dir)
+        self.jobs = max(1, jobs)
+        self.timeout = timeout
+        # Repository URL -> remote HEAD it was last synced to
+        self.heads = {}
+
+    def _known_head(self, repo_url):
+        if repo_url not in self.heads:
+            self.heads[repo_url] = local_head(self.source_dir / repo_directory(repo_url))
+        return self.heads[repo_url]
+
+    def changed(self):
+        """
+        Returns {repository URL: remote HEAD} for the repositories whose HEAD
+        differs from the commit they were last synced to (initially the one
+        checked out, or the one a README fetched without git came from; see
+        local_head). Remotes that cannot be reached are checked again next time.
+        """
+        with ThreadPoolExecutor(max_workers=self.jobs) as executor:
+            heads = list(executor.map(lambda repo_url: remote_head(repo_url, self.timeout), self.repos))
+        return {
+            repo_url: head for repo_url, head in zip(self.repos, heads)
+            if head is not None and head != self._known_head(repo_url)
+        }
+
+    def synced(self, results, heads):
+        """Records the HEADs of the repositories sync_repositories updated successfully."""
+        for result in results:
+            if result['status'] == 'ok':
+                self.heads[result['repo']] = heads[result['repo']]
+
+
+def watch(update, source_dir, repos=None, interval=DEFAULT_INTERVAL, jobs=DEFAULT_JOBS, timeout=None,
+          fetch_mode=DEFAULT_FETCH_MODE, polls=None):
+    """
+    Calls update() whenever READMEs in source_dir change, checking every
+    interval seconds; the changed directories are logged. With repos,
+    their remotes are polled first and the ones that moved are synced into
+    source_dir. update returns whether it succeeded; the READMEs of a failed
+    update are reported again on the next check. The sources as they are
+    when watch starts are taken as already processed. Runs until interrupted,
+    or for polls checks when given.
+    """
+    sources = SourceWatcher(source_dir)
+    remotes = RemoteWatcher(repos, source_dir, jobs, timeout) if repos else None
+    sources.changed()
+    logging.info(f"Watching {source_dir} every {interval} seconds"
+                 + (f" and polling {len(repos)} remotes" if repos else ""))
+
+    poll = 0
+    while polls is None or poll < polls:
+        time.sleep(interval)
+        poll += 1
+        if remotes is not None:
+            moved = remotes.changed()
+            if moved:
+                logging.info(f"Remote HEAD moved for {len(moved)} repositories: {', '.join(moved)}")
+                results = sync_repositories(list(moved), source_dir, jobs=jobs, timeout=timeout,
+                                            fetch_mode=fetch_mode)
+                remotes.synced(results, moved)
+
+        changed = sources.changed()
+        if not changed:
+            continue
+        logging.info(f"README changed in {', '.join(changed)}; updating")
+        if not update():
+            sources.forget(changed)
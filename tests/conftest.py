@@ -0,0 +1,62 @@
+"""
+Shared fixtures: local git remotes standing in for the GitHub repositories.
+"""
+import os
+import subprocess
+from pathlib import Path
+
+import pytest
+
+GIT_ENV = {
+    'GIT_AUTHOR_NAME': 'test', 'GIT_AUTHOR_EMAIL': 'test@example.com',
+    'GIT_COMMITTER_NAME': 'test', 'GIT_COMMITTER_EMAIL': 'test@example.com',
+    'GIT_TERMINAL_PROMPT': '0'
+}
+
+
+def git(*args, cwd=None):
+    result = subprocess.run(['git', *args], cwd=cwd, check=True, text=True, capture_output=True,
+                            env={**os.environ, **GIT_ENV})
+    return result.stdout.strip()
+
+
+class Remotes:
+    """Bare repositories under root, each with a README.md, reachable as file:// URLs."""
+
+    def __init__(self, root):
+        self.root = Path(root)
+        self.work = self.root / '.work'
+
+    def create(self, name, readme, files=None):
+        """Creates the bare repository name with one commit and returns its URL."""
+        work = self.work / name
+        git('init', '-q', '-b', 'main', str(work))
+        git('init', '-q', '--bare', '-b', 'main', str(self.root / name))
+        git('remote', 'add', 'origin', str(self.root / name), cwd=work)
+        self.push(name, readme, files)
+        return self.url(name)
+
+    def push(self, name, readme, files=None):
+        """Commits a new README.md (and files) to the repository name and returns the new HEAD."""
+        work = self.work / name
+        (work / 'README.md').write_text(readme, encoding='utf-8')
+        for path, content in (files or {}).items():
+            (work / path).write_text(content, encoding='utf-8')
+        git('add', '-A', cwd=work)
+        git('commit', '-q', '--allow-empty', '-m', 'update', cwd=work)
+        git('push', '-q', 'origin', 'main', cwd=work)
+        return git('rev-parse', 'HEAD', cwd=work)
+
+    def url(self, name):
+        return (self.root / name).as_uri()
+
+
+@pytest.fixture
+def remotes(tmp_path):
+    return Remotes(tmp_path / 'remotes')
+
+
+def readme(title, links):
+    """A minimal awesome list README with one category holding links, given as (name, url) pairs."""
+    items = '\n'.join(f"- [{name}]({url}) - About {name}." for name, url in links)
+    return f"# {title}\n\n## Resources\n\n{items}\n"
@@ -0,0 +1,85 @@
+import pytest
+
+from scripts.discover import Crawler, DiscoveryCache
+from tests.conftest import readme
+
+
+@pytest.fixture
+def github(remotes, monkeypatch):
+    """Serves https://github.com/<owner>/<name> from the local remotes through url.insteadOf."""
+    monkeypatch.setenv('GIT_CONFIG_COUNT', '1')
+    monkeypatch.setenv('GIT_CONFIG_KEY_0', f"url.{remotes.root.as_uri()}/.insteadOf")
+    monkeypatch.setenv('GIT_CONFIG_VALUE_0', 'https://github.com/')
+    return remotes
+
+
+def create(github, path, *links):
+    """Creates github.com/<path> as an awesome list linking to links; returns its GitHub URL."""
+    title = path.split('/')[-1]
+    github.create(path, readme(title, [(f'link-{n}', url) for n, url in enumerate(links)]
+                                      + [('site', f'https://{title}.example/')]))
+    return f'https://github.com/{path}'
+
+
+def crawl(tmp_path, seeds, **options):
+    cache = DiscoveryCache(tmp_path / 'discovery-cache.json')
+    crawler = Crawler(cache, jobs=4, timeout=30, **options)
+    registry = crawler.run(seeds)
+    cache.save()
+    return registry, crawler.stats
+
+
+def entries(registry):
+    return [(entry['url'], entry['depth'], entry['found_in']) for entry in registry]
+
+
+def test_links_are_followed_to_max_depth_once_each(github, tmp_path):
+    d = create(github, 'owner/awesome-d')
+    b = create(github, 'owner/awesome-b', d)
+    # Spellings of the same repository, and a link back to the seed
+    c = create(github, 'owner/awesome-c', 'https://github.com/owner/awesome-a', 'https://github.com/Owner/awesome-b.git')
+    a = create(github, 'owner/awesome-a', b, b + '/', c, 'https://github.com/owner/not-a-list')
+
+    registry, stats = crawl(tmp_path, [a], max_depth=1)
+    assert entries(registry) == [(a, 0, None), (b, 1, a), (c, 1, a)]
+    assert (stats['fetched'], stats['checked']) == (1, 2)
+
+    registry, stats = crawl(tmp_path, [a], max_depth=2)
+    assert entries(registry) == [(a, 0, None), (b, 1, a), (c, 1, a), (d, 2, b)]
+    # The last depth is only checked to exist
+    assert 'resources' not in registry[-1]
+    assert registry[0]['resources'] == 5
+
+
+def test_a_taken_directory_name_is_skipped(github, tmp_path):
+    mine = create(github, 'owner/awesome-b')
+    theirs = create(github, 'other/awesome-b')
+    a = create(github, 'owner/awesome-a', mine, theirs)
+    registry, stats = crawl(tmp_path, [a])
+    assert entries(registry) == [(a, 0, None), (mine, 1, a)]
+    assert stats['name_clashes'] == 1
+
+
+def test_unreachable_links_are_dropped_but_seeds_kept(github, tmp_path):
+    missing = 'https://github.com/owner/awesome-missing'
+    a = create(github, 'owner/awesome-a', missing)
+    registry, stats = crawl(tmp_path, [a, 'https://github.com/owner/awesome-gone'])
+    assert entries(registry) == [(a, 0, None), ('https://github.com/owner/awesome-gone', 0, None)]
+    assert stats['unreachable'] == 2
+
+
+def test_cached_visits_are_reused_until_the_remote_moves(github, tmp_path):
+    b = create(github, 'owner/awesome-b')
+    a = create(github, 'owner/awesome-a', b)
+    first, stats = crawl(tmp_path, [a, b], max_depth=1)
+    assert stats['fetched'] == 2
+
+    second, stats = crawl(tmp_path, [a, b], max_depth=1)
+    assert (stats['cached'], stats['fetched']) == (2, 0)
+    assert entries(second) == entries(first)
+
+    e = create(github, 'owner/awesome-e')
+    github.push('owner/awesome-a', readme('awesome-a', [('b', b), ('e', e)]))
+    third, stats = crawl(tmp_path, [a, b], max_depth=1)
+    assert (stats['cached'], stats['fetched']) == (1, 1)
+    assert entries(third) == [(a, 0, None), (b, 0, None), (e, 1, a)]
@@ -0,0 +1,95 @@
+import re
+import json
+import time
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip('markdown')
+pytest.importorskip('bs4')
+from bs4 import BeautifulSoup
+
+from benchmarks.synthetic import synthetic_readme
+from scripts.extract_data import parse_awesome_list, extract_resources_from_ul, ENGINES
+
+FIXTURES = Path(__file__).parent / 'fixtures' / 'readmes'
+EXPECTED_TAGS = json.loads((FIXTURES / 'expected-tags.json').read_text(encoding='utf-8'))
+
+
+def parsed_tags(engine):
+    """Returns {list: {url: [tags]}} for every fixture README parsed with an engine."""
+    tags = {}
+    for list_name in EXPECTED_TAGS:
+        awesome_list = parse_awesome_list(FIXTURES / f'{list_name}.md', list_name, engine)
+        tags[list_name] = {resource.url: list(resource.tags) for _, resource in awesome_list.iter_resources()}
+    return tags
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_tag_recall(engine):
+    tags = parsed_tags(engine)
+    expected = [(list_name, url, tag) for list_name, resources in EXPECTED_TAGS.items()
+                for url, resource_tags in resources.items() for tag in resource_tags]
+    found = [entry for entry in expected if entry[2] in tags[entry[0]].get(entry[1], ())]
+    missed = sorted(set(expected) - set(found))
+    assert len(found) / len(expected) == 1.0, f"tag recall {len(found)}/{len(expected)}, missed {missed}"
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_tags_match_expected(engine):
+    # Also catches extra tags (link names, ignored sections) and repeats
+    assert parsed_tags(engine) == EXPECTED_TAGS
+
+
+def test_single_pass_text_matches_get_text():
+    import markdown  # type: ignore
+    html = markdown.markdown((FIXTURES / 'awesome-sections.md').read_text(encoding='utf-8'))
+    soup = BeautifulSoup(html, 'html.parser')
+    for ul in soup.find_all('ul'):
+        for li, resource in zip(ul.find_all('li', recursive=False), extract_resources_from_ul(ul)):
+            a_tag = li.find('a')
+            name = a_tag.get_text().strip()
+            assert resource.name == name
+            assert resource.url == a_tag.get('href', '').strip()
+            assert resource.description == li.get_text(separator=' ', strip=True).replace(name, '', 1).strip(' -')
+
+
+
+def _get_text_resources(ul):
+    """The extraction extract_resources_from_ul replaced: find, two get_text calls and a regex per item."""
+    resources = []
+    for li in ul.find_all('li', recursive=False):
+        a_tag = li.find('a')
+        if a_tag:
+            name = a_tag.get_text().strip()
+            description = li.get_text(separator=' ', strip=True).replace(name, '', 1).strip(' -')
+            resources.append((name, a_tag.get('href', '').strip(), description,
+                              re.findall(r'`(.*?)`', description)))
+    return resources
+
+
+def _best_time(function, repeat=5):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def test_single_pass_extractor_is_faster_and_finds_more_tags():
+    import markdown  # type: ignore
+    html = markdown.markdown(synthetic_readme('headings', resources=3000, categories=30))
+    lists = BeautifulSoup(html, 'html.parser').find_all('ul')
+
+    new = [resource for ul in lists for resource in extract_resources_from_ul(ul)]
+    old = [resource for ul in lists for resource in _get_text_resources(ul)]
+    assert [(r.name, r.url, r.description) for r in new] == [resource[:3] for resource in old]
+    # The synthetic descriptions hold code spans, which the regex over rendered text cannot see
+    assert sum(bool(r.tags) for r in new) > 10 * max(1, sum(bool(resource[3]) for resource in old))
+
+    new_time = _best_time(lambda: [extract_resources_from_ul(ul) for ul in lists])
+    old_time = _best_time(lambda: [_get_text_resources(ul) for ul in lists])
+    # About 3x faster when measured; a generous margin keeps the check stable on slow runners
+    assert new_time < old_time / 1.5, f"single pass {new_time:.3f}s, get_text {old_time:.3f}s"
@@ -0,0 +1,63 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+pytest.importorskip('markdown')
+
+from benchmarks.synthetic import SHAPES, synthetic_readme, write_corpus
+from scripts.extract_data import IGNORED_CATEGORIES, parse_awesome_list, parse_html_categories
+from scripts.fast_parser import extract_categories
+
+# Inline syntax the fast engine either scans itself or hands to Python-Markdown one element at a time
+TRICKY = {
+    'escapes': "## Escaped \\*stars\\*\n\n- [a\\_b](https://a.example/) - Uses \\`ticks\\` and \\[brackets\\].\n",
+    'double_backticks': "## Code\n\n- [a](https://a.example/) - Handles ``code with ` tick`` spans. `Go`\n",
+    'code_in_link_names': ("## Code\n\n- [`tool`](https://a.example/) - Tool with `Rust` tag.\n"
+                           "- [the `lib` crate](https://b.example/) - Library.\n"),
+    'nested_items': ("## Nested\n\n- [parent](https://p.example/) - Parent.\n"
+                     "    - [child](https://c.example/) - Child `Python`.\n"
+                     "    - [sibling](https://s.example/) - Sibling.\n"
+                     "- [next](https://n.example/) - Next.\n"),
+    'inline_html': "## Html\n\n- [a](https://a.example/) - Has <code>inline</code> html and <b>bold</b>.\n",
+    'raw_html_block': '<p align="center"><img src="logo.png"></p>\n\n## Section\n\n- [a](https://a.example/) - Text.\n',
+    'emphasis': "## *Emphasised* heading\n\n- [a](https://a.example/) - **Bold**, _italic_ and snake_case_name.\n",
+    'entities': ("## Q&amp;A &copy;\n\n"
+                 "- [a &amp; b](https://a.example/?x=1&y=2) - Fish &amp; chips &lt;3 & more.\n"),
+    'reference_links': ("## Refs\n\n- [a][ref] - Reference link.\n"
+                        "- [b](https://b.example/ \"title\") - Titled link.\n\n[ref]: https://a.example/\n"),
+    'line_breaks': ("## Breaks\n\n- [a](https://a.example/) - First line  \n  continued.\n"
+                    "- [b](https://b.example/) -\n  wrapped description `JS`\n"),
+    'ignored_and_skipped': ("## Contents\n\n- [Tools](#tools)\n\n## Tools\n\n- plain item without a link\n"
+                            "- [a](https://a.example/)\n- [b](https://b.example/) -- dashes\n\n"
+                            "## License\n\n- [CC0](https://c.example/)\n"),
+}
+
+
+@pytest.mark.parametrize('name', TRICKY)
+def test_fast_engine_matches_bs4_on_tricky_markdown(name):
+    content = '# Awesome Tricky\n\n' + TRICKY[name]
+    expected = parse_html_categories(content)
+    assert expected
+    # None of these documents may fall back to the bs4 engine
+    assert extract_categories(content, IGNORED_CATEGORIES) == expected
+
+
+def test_engines_agree_on_a_synthetic_corpus(tmp_path):
+    # Tables and headerless lists fall back to bs4; the outcome must not depend on the engine either way
+    for readme_path in write_corpus(tmp_path, SHAPES, lists=2, resources=300, categories=12):
+        name = readme_path.parent.name
+        expected = parse_awesome_list(readme_path, name, engine='bs4')
+        assert expected.categories
+        assert parse_awesome_list(readme_path, name, engine='fast') == expected
+
+
+def test_concurrent_parses_match_serial_ones():
+    # Raw HTML blocks go through the Markdown instance's stash, which threads must not share
+    documents = [f'<p align="center">List {n}</p>\n\n' + synthetic_readme('headings', resources=60 + n,
+                                                                            categories=6, seed=n)
+                 for n in range(24)]
+    expected = [extract_categories(document, IGNORED_CATEGORIES) for document in documents]
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        for _ in range(5):
+            assert list(executor.map(lambda document: extract_categories(document, IGNORED_CATEGORIES),
+                                     documents)) == expected
@@ -0,0 +1,139 @@
+import time
+import asyncio
+import threading
+from collections import Counter
+
+import pytest
+
+aiohttp = pytest.importorskip('aiohttp')
+from aiohttp import web
+
+from scripts.liveness import LivenessCache, LivenessChecker, ALIVE, DEAD, ERROR
+
+
+class StubServer:
+    """An aiohttp server on a thread of its own, since LivenessChecker runs its own event loop."""
+
+    def __init__(self):
+        self.requests = Counter()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._loop = asyncio.new_event_loop()
+        self._started = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    async def _handle(self, request):
+        path = request.path
+        self.requests[(request.method, path)] += 1
+        if path.startswith('/slow/'):
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            try:
+                await asyncio.sleep(0.1)
+            finally:
+                self.in_flight -= 1
+            return web.Response(text='ok')
+        if path.startswith('/gone/'):
+            return web.Response(status=404)
+        if path == '/no-head' and request.method == 'HEAD':
+            return web.Response(status=405)
+        if path == '/broken':
+            return web.Response(status=500)
+        return web.Response(text='ok')
+
+    def _run(self):
+        asyncio.set_event_loop(self._loop)
+        app = web.Application()
+        app.router.add_route('*', '/{tail:.*}', self._handle)
+        self._runner = web.AppRunner(app)
+        self._loop.run_until_complete(self._runner.setup())
+        site = web.TCPSite(self._runner, '127.0.0.1', 0)
+        self._loop.run_until_complete(site.start())
+        self.port = site._server.sockets[0].getsockname()[1]
+        self._started.set()
+        self._loop.run_forever()
+
+    def start(self):
+        self._thread.start()
+        self._started.wait(5)
+        return self
+
+    def stop(self):
+        asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result(5)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(5)
+
+    def url(self, path):
+        return f"http://127.0.0.1:{self.port}{path}"
+
+
+@pytest.fixture
+def server():
+    stub = StubServer().start()
+    yield stub
+    stub.stop()
+
+
+def checker(cache, **options):
+    return LivenessChecker(cache, **{'rate': 0, 'timeout': 5, **options})
+
+
+def test_head_is_retried_as_get(server):
+    results = checker(LivenessCache(None)).check([server.url('/no-head'), server.url('/broken')])
+    assert results[server.url('/no-head')]['status'] == ALIVE
+    assert server.requests[('HEAD', '/no-head')] == 1
+    assert server.requests[('GET', '/no-head')] == 1
+    # A server error is not a dead link
+    assert results[server.url('/broken')]['status'] == ERROR
+    assert results[server.url('/broken')]['code'] == 500
+
+
+def test_connections_per_host_are_limited(server):
+    urls = [server.url(f'/slow/{n}') for n in range(12)]
+    results = checker(LivenessCache(None), concurrency=12, per_host=3).check(urls)
+    assert all(result['status'] == ALIVE for result in results.values())
+    assert server.max_in_flight == 3
+
+
+def test_results_are_reused_until_they_expire(server, tmp_path):
+    cache_path = tmp_path / 'liveness.json'
+    urls = [server.url('/ok'), server.url('/gone/1')] + [server.url(f'/page/{n}') for n in range(8)]
+    cache = LivenessCache(cache_path)
+    first = checker(cache)
+    results = first.check(urls)
+    cache.save()
+    assert results[server.url('/gone/1')]['status'] == DEAD
+    assert first.stats['probed'] == len(urls)
+
+    # A fresh result is served from the cache file without a request
+    requests = sum(server.requests.values())
+    second = checker(LivenessCache(cache_path))
+    assert second.check(urls) == results
+    assert (second.stats['cached'], second.stats['probed']) == (len(urls), 0)
+    assert sum(server.requests.values()) == requests
+
+    # An expired one is probed again
+    cache = LivenessCache(cache_path)
+    cache.entries[server.url('/ok')]['expires'] = time.time() - 1
+    third = checker(cache)
+    third.check(urls)
+    assert third.stats['probed'] == 1
+    assert server.requests[('HEAD', '/ok')] == 2
+
+
+def test_probes_are_discarded_when_too_many_urls_look_dead(server):
+    cache = LivenessCache(None)
+    urls = [server.url(f'/gone/{n}') for n in range(5)] + [server.url(f'/page/{n}') for n in range(5)]
+    check = checker(cache)
+    results = check.check(urls)
+    assert check.stats['discarded'] == len(urls)
+    assert results == {}
+    assert cache.entries == {}
+
+
+def test_malformed_urls_fail_alone(server):
+    urls = ['http://[::1/x', 'http://a..b/', server.url('/ok')]
+    results = checker(LivenessCache(None)).check(urls)
+    assert results['http://[::1/x']['status'] == ERROR
+    assert results['http://a..b/']['status'] == ERROR
+    assert results[server.url('/ok')]['status'] == ALIVE
@@ -0,0 +1,30 @@
+import logging
+
+from scripts.build_search_index import flatten_list
+from scripts.log_setup import RepeatFilter
+from scripts.model import AwesomeList, Category
+
+
+class _Records(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+def test_warnings_about_different_lists_are_grouped():
+    repeats = RepeatFilter(limit=2)
+    handler = _Records()
+    handler.addFilter(repeats)
+    root = logging.getLogger()
+    root.addHandler(handler)
+    try:
+        for n in range(5):
+            flatten_list(AwesomeList(f'Awesome {n}', [Category('', [])]))
+    finally:
+        root.removeHandler(handler)
+    assert [record.getMessage() for record in handler.records] == [
+        'Category missing required fields in Awesome 0', 'Category missing required fields in Awesome 1']
+    assert repeats.suppressed() == [('Category missing required fields in %s', 3)]
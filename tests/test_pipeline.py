@@ -0,0 +1,44 @@
+import pytest
+
+from scripts.pipeline import run_pipeline, DEFAULT_STAGES, sync, publish, metadata
+from tests.conftest import readme
+
+STAGES = tuple(stage for stage in DEFAULT_STAGES if stage is not sync)
+
+
+def write_readme(source_dir, name, links):
+    (source_dir / name).mkdir(parents=True, exist_ok=True)
+    (source_dir / name / 'README.md').write_text(readme(name, links), encoding='utf-8')
+
+
+def snapshot(directory):
+    return {str(path.relative_to(directory)): path.read_bytes()
+            for path in sorted(directory.rglob('*')) if path.is_file()}
+
+
+def fail_after(stage):
+    """STAGES with a stage inserted after stage that raises once every list has passed it."""
+
+    def broken(pipeline, lists):
+        yield from lists
+        raise RuntimeError('late stage failed')
+
+    position = STAGES.index(stage) + 1
+    return STAGES[:position] + (broken,) + STAGES[position:]
+
+
+@pytest.mark.parametrize('stage', [publish, metadata])
+def test_a_failed_run_leaves_the_data_dir_as_it_was(tmp_path, stage):
+    source_dir = tmp_path / 'sources'
+    output_dir = tmp_path / 'data'
+    # Both lists link to shared.example, so the first run writes a duplicates report
+    write_readme(source_dir, 'awesome-one', [('one', 'https://one.example/'), ('shared', 'https://shared.example/')])
+    write_readme(source_dir, 'awesome-two', [('two', 'https://two.example/'), ('shared', 'https://shared.example/')])
+    run_pipeline(source_dir, output_dir, stages=STAGES, repos=[])
+    before = snapshot(output_dir)
+    assert {'awesome-lists.json', 'metadata.json', 'duplicates.json'} <= set(before)
+
+    write_readme(source_dir, 'awesome-one', [('one', 'https://one.example/new'), ('three', 'https://three.example/')])
+    with pytest.raises(RuntimeError, match='late stage failed'):
+        run_pipeline(source_dir, output_dir, stages=fail_after(stage), repos=[])
+    assert snapshot(output_dir) == before
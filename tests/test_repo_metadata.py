@@ -0,0 +1,198 @@
+import re
+import json
+import time
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import pytest
+
+from scripts import repo_metadata
+from scripts.repo_metadata import (
+    RepoMetadataCache,
+    RepoMetadataFetcher,
+    load_repositories,
+    FOUND,
+    MISSING
+)
+from scripts.pipeline import run_pipeline, with_repo_metadata, DEFAULT_STAGES, sync
+from tests.conftest import readme
+
+_FIELD_RE = re.compile(r'(r\d+): repository\(owner: ("(?:[^"\\]|\\.)*"), name: ("(?:[^"\\]|\\.)*")\)')
+
+
+class GraphQLStub:
+    """
+    A GraphQL endpoint answering repository() fields. Queued responses are
+    served first: (status, headers) for an HTTP error, or 'RATE_LIMITED'
+    for a rate limit reported in the GraphQL errors.
+    """
+
+    def __init__(self):
+        self.queries = []
+        self.queued = []
+        self.missing = set()
+        self.stars = {}
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+                stub.queries.append([f"{json.loads(owner)}/{json.loads(name)}"
+                                     for _, owner, name in _FIELD_RE.findall(body['query'])])
+                status, headers, payload = stub.answer(body['query'])
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                if payload is not None:
+                    self.wfile.write(json.dumps(payload).encode('utf-8'))
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/graphql"
+        threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True).start()
+
+    def answer(self, query):
+        if self.queued:
+            response = self.queued.pop(0)
+            if response == 'RATE_LIMITED':
+                return 200, {}, {'errors': [{'type': 'RATE_LIMITED', 'message': 'API rate limit exceeded'}]}
+            return response[0], response[1], None
+        data, errors = {}, []
+        for alias, owner, name in _FIELD_RE.findall(query):
+            repo = f"{json.loads(owner)}/{json.loads(name)}"
+            if repo in self.missing:
+                data[alias] = None
+                errors.append({'type': 'NOT_FOUND', 'path': [alias], 'message': f"Could not resolve {repo}"})
+            else:
+                data[alias] = {'stargazerCount': self.stars.get(repo, 1), 'isArchived': False,
+                               'defaultBranchRef': {'target': {'committedDate': '2026-01-02T03:04:05Z'}}}
+        return 200, {'Content-Type': 'application/json'}, {'data': data, **({'errors': errors} if errors else {})}
+
+    @property
+    def looked_up(self):
+        return [repo for query in self.queries for repo in query]
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def api():
+    stub = GraphQLStub()
+    yield stub
+    stub.close()
+
+
+@pytest.fixture(autouse=True)
+def fast_backoff(monkeypatch):
+    monkeypatch.setattr(repo_metadata, 'BACKOFF_BASE', 0.01)
+
+
+def fetcher(api, cache=None, **options):
+    return RepoMetadataFetcher(cache or RepoMetadataCache(None), api_url=api.url, **options)
+
+
+def github_urls(*repos):
+    return [f"https://github.com/{repo}" for repo in repos]
+
+
+def test_repositories_are_looked_up_once_in_batches(api):
+    urls = github_urls(*(f'owner/repo-{n}' for n in range(7)))
+    # Other spellings and pages of the same repositories, and URLs that are no repository
+    urls += ['https://github.com/OWNER/repo-0.git', 'https://github.com/owner/repo-1/tree/main/docs',
+             'https://github.com/topics/python', 'https://example.com/owner/repo-2']
+    lookup = fetcher(api, batch_size=3, concurrency=2)
+    results = lookup.fetch(urls)
+    assert sorted(len(query) for query in api.queries) == [1, 3, 3]
+    assert sorted(repo.lower() for repo in api.looked_up) == [f'owner/repo-{n}' for n in range(7)]
+    assert sorted(results) == [f'github.com/owner/repo-{n}' for n in range(7)]
+    assert all(result['status'] == FOUND and result['stars'] == 1 for result in results.values())
+    assert (lookup.stats['repositories'], lookup.stats['requests'], lookup.stats['unknown']) == (7, 3, 0)
+
+
+def test_not_found_repositories_are_cached_as_missing(api):
+    api.missing.add('owner/gone')
+    cache = RepoMetadataCache(None)
+    lookup = fetcher(api, cache)
+    results = lookup.fetch(github_urls('owner/gone', 'owner/here'))
+    assert results['github.com/owner/gone']['status'] == MISSING
+    assert results['github.com/owner/here']['status'] == FOUND
+    assert cache.get('github.com/owner/gone', time.time())['status'] == MISSING
+    assert (lookup.stats['missing'], lookup.stats['found']) == (1, 1)
+
+
+@pytest.mark.parametrize('status', [403, 429])
+def test_refused_requests_wait_for_retry_after(api, status):
+    api.queued.append((status, {'Retry-After': '1'}))
+    lookup = fetcher(api)
+    start = time.time()
+    results = lookup.fetch(github_urls('owner/repo'))
+    assert time.time() - start >= 1
+    assert results['github.com/owner/repo']['status'] == FOUND
+    assert (lookup.stats['requests'], lookup.stats['retries']) == (2, 1)
+
+
+def test_graphql_rate_limit_errors_are_retried(api):
+    api.queued.extend(['RATE_LIMITED', (502, {})])
+    lookup = fetcher(api)
+    results = lookup.fetch(github_urls('owner/repo'))
+    assert results['github.com/owner/repo']['status'] == FOUND
+    assert (lookup.stats['requests'], lookup.stats['retries']) == (3, 2)
+
+
+def test_a_distant_rate_limit_reset_leaves_repositories_for_the_next_run(api):
+    api.queued.append((429, {'Retry-After': str(repo_metadata.MAX_RATE_LIMIT_WAIT + 60)}))
+    cache = RepoMetadataCache(None)
+    lookup = fetcher(api, cache)
+    assert lookup.fetch(github_urls('owner/repo')) == {}
+    assert lookup.stats['unknown'] == 1
+    assert cache.entries == {}
+
+
+def test_results_are_reused_until_they_expire(api, tmp_path):
+    path = tmp_path / 'repo-metadata-cache.json'
+    urls = github_urls('owner/one', 'owner/two')
+    cache = RepoMetadataCache(path)
+    fetcher(api, cache).fetch(urls)
+    cache.save()
+    assert len(api.queries) == 1
+
+    lookup = fetcher(api, RepoMetadataCache(path))
+    assert set(lookup.fetch(urls)) == {'github.com/owner/one', 'github.com/owner/two'}
+    assert (lookup.stats['cached'], lookup.stats['requests']) == (2, 0)
+
+    cache = RepoMetadataCache(path)
+    cache.entries['github.com/owner/two']['expires'] = time.time() - 1
+    fetcher(api, cache).fetch(urls)
+    assert api.queries[-1] == ['owner/two']
+
+
+def test_star_changes_update_repositories_json_but_not_the_corpus(api, tmp_path):
+    source_dir = tmp_path / 'sources'
+    (source_dir / 'awesome-test').mkdir(parents=True)
+    (source_dir / 'awesome-test' / 'README.md').write_text(readme('Awesome Test', [
+        ('one', 'https://github.com/owner/one'), ('site', 'https://site.example/')]), encoding='utf-8')
+    output_dir = tmp_path / 'data'
+    stages = with_repo_metadata(tuple(stage for stage in DEFAULT_STAGES if stage is not sync))
+
+    def run():
+        # No metadata cache, so every run asks the API again
+        return run_pipeline(source_dir, output_dir, stages=stages, repos=[], repo_metadata_cache=tmp_path / 'none',
+                            repo_metadata_options={'api_url': api.url})
+
+    api.stars['owner/one'] = 10
+    first = run()
+    assert load_repositories(output_dir / 'repositories.json') == {
+        'github.com/owner/one': {'stars': 10, 'last_commit': '2026-01-02T03:04:05Z', 'archived': False}}
+    (tmp_path / 'none').unlink()
+
+    api.stars['owner/one'] = 11
+    second = run()
+    assert load_repositories(output_dir / 'repositories.json')['github.com/owner/one']['stars'] == 11
+    assert second.changes['modified'] == 0
+    assert second.current_sha == first.current_sha
+    assert not second.metadata_updated
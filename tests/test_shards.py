@@ -0,0 +1,71 @@
+import os
+import sys
+import json
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from scripts.shards import repo_key, shard_of
+from scripts.update_awesome_lists import SOURCES_FILE_NAME, SOURCES_VERSION
+from tests.conftest import readme
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+SHARDS = 3
+# Some remotes end in .git, which git clone leaves out of the directory name
+NAMES = ['awesome-alpha', 'awesome-beta.git', 'awesome-gamma', 'awesome-delta.git', 'awesome-epsilon',
+         'awesome-zeta', 'awesome-eta.git', 'awesome-theta']
+
+
+def run_update(cwd, *args):
+    process = subprocess.run([sys.executable, '-m', 'scripts', *args, '--no-report'], cwd=cwd,
+                             env=dict(os.environ, PYTHONPATH=str(REPO_ROOT), GIT_TERMINAL_PROMPT='0'),
+                             capture_output=True, text=True)
+    assert process.returncode == 0, process.stdout + process.stderr
+
+
+def write_sources(output_dir, urls):
+    output_dir.mkdir(parents=True, exist_ok=True)
+    (output_dir / SOURCES_FILE_NAME).write_text(json.dumps({
+        'version': SOURCES_VERSION, 'seeds': urls, 'max_depth': 0,
+        'repos': [{'url': url, 'depth': 0, 'found_in': None} for url in urls]
+    }), encoding='utf-8')
+
+
+def test_repo_key_matches_the_clone_directory():
+    assert repo_key('https://github.com/owner/awesome-x.git') == 'awesome-x'
+    assert repo_key('https://github.com/owner/awesome-x/') == 'awesome-x'
+    assert shard_of(repo_key('https://github.com/owner/awesome-x.git'), 4) == shard_of('awesome-x', 4)
+
+
+@pytest.mark.parametrize('fetch_mode', ['full', 'shallow'])
+def test_sharded_runs_merge_to_the_unsharded_result(remotes, tmp_path, fetch_mode):
+    urls = []
+    for index, name in enumerate(NAMES):
+        title = name[:-4] if name.endswith('.git') else name
+        links = [(f'{title}-{n}', f'https://{title}.example/{n}') for n in range(3)]
+        # A link every list shares, so duplicate detection sees the whole corpus
+        links.append(('shared', 'https://shared.example/'))
+        urls.append(remotes.create(name, readme(title, links)))
+    assert len({shard_of(repo_key(url), SHARDS) for url in urls}) == SHARDS
+
+    single = tmp_path / 'single'
+    write_sources(single, urls)
+    run_update(tmp_path, 'update', '--source-dir', str(tmp_path / 'sources-single'), '--output-dir', str(single),
+               '--fetch-mode', fetch_mode)
+
+    sharded = tmp_path / 'sharded'
+    write_sources(sharded, urls)
+    for index in range(1, SHARDS + 1):
+        # Each shard syncs into a directory of its own, as on a separate host
+        run_update(tmp_path, 'update', '--source-dir', str(tmp_path / f'sources-{index}'),
+                   '--output-dir', str(sharded), '--fetch-mode', fetch_mode, '--shard', f'{index}/{SHARDS}')
+        synced = sorted(path.name for path in (tmp_path / f'sources-{index}').iterdir())
+        assert synced == sorted(repo_key(url) for url in urls if shard_of(repo_key(url), SHARDS) == index)
+    run_update(tmp_path, 'merge', '--output-dir', str(sharded))
+
+    corpus = (single / 'awesome-lists.json').read_bytes()
+    assert len(json.loads(corpus)) == len(NAMES)
+    assert (sharded / 'awesome-lists.json').read_bytes() == corpus
+    single_artifacts = sorted(path.name for path in (single / 'artifacts').iterdir())
+    assert sorted(path.name for path in (sharded / 'artifacts').iterdir()) == single_artifacts
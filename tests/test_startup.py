@@ -0,0 +1,39 @@
+import os
+import sys
+import subprocess
+
+import pytest
+
+from benchmarks.startup_benchmark import time_import, check, DEFAULT_BUDGET_MS, REPO_ROOT
+from scripts import log_setup
+from scripts.__main__ import COMMANDS
+
+# Prints whether importing a command registered stop_logging to run at exit
+_EXIT_PROBE = (
+    "import atexit; registered = []; atexit.register = lambda f, *a, **k: registered.append(f) or f; "
+    "import {module}; from scripts.log_setup import stop_logging; print(stop_logging in registered)"
+)
+
+
+@pytest.mark.parametrize('command', ['python -m scripts'] + list(COMMANDS))
+def test_command_import_is_fast_and_side_effect_free(command):
+    module = COMMANDS[command][0] if command in COMMANDS else 'scripts.__main__'
+    result = time_import(module, repeat=3)
+    assert check(result, DEFAULT_BUDGET_MS) == []
+
+
+def test_exit_handler_is_registered_by_configure_logging_only(monkeypatch, tmp_path):
+    process = subprocess.run([sys.executable, '-c', _EXIT_PROBE.format(module='scripts.main')],
+                             env=dict(os.environ, PYTHONPATH=REPO_ROOT), capture_output=True, text=True, check=True)
+    assert process.stdout.split() == ['False']
+
+    registered = []
+    monkeypatch.setattr(log_setup.atexit, 'register', registered.append)
+    monkeypatch.setattr(log_setup, '_exit_registered', False)
+    monkeypatch.chdir(tmp_path)
+    try:
+        log_setup.configure_logging('startup')
+        log_setup.configure_logging('startup')
+    finally:
+        log_setup.stop_logging()
+    assert registered == [log_setup.stop_logging]
@@ -0,0 +1,119 @@
+import os
+import sys
+import json
+import socket
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from scripts.update_awesome_lists import (
+    sync_repositories,
+    fetch_readme_blob,
+    update_metadata,
+    load_metadata,
+    FETCH_MODES,
+    SOURCES_FILE_NAME,
+    SOURCES_VERSION
+)
+from tests.conftest import git, readme
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+
+@pytest.fixture
+def list_remote(remotes):
+    return remotes.create('awesome-test', readme('Awesome Test', [('one', 'https://one.example')]),
+                          files={'other.txt': 'not needed'})
+
+
+@pytest.mark.parametrize('fetch_mode', FETCH_MODES)
+def test_fetch_modes_clone_and_update(remotes, list_remote, tmp_path, fetch_mode):
+    target = tmp_path / 'sources'
+    results = sync_repositories([list_remote], target, fetch_mode=fetch_mode)
+    assert [result['status'] for result in results] == ['ok']
+    checkout = target / 'awesome-test'
+    assert 'one.example' in (checkout / 'README.md').read_text()
+
+    remotes.push('awesome-test', readme('Awesome Test', [('two', 'https://two.example')]))
+    results = sync_repositories([list_remote], target, fetch_mode=fetch_mode)
+    assert [result['status'] for result in results] == ['ok']
+    assert 'two.example' in (checkout / 'README.md').read_text()
+
+    history = int(git('rev-list', '--count', 'HEAD', cwd=checkout))
+    if fetch_mode == 'full':
+        assert history == 2
+        assert (checkout / 'other.txt').exists()
+    elif fetch_mode == 'shallow':
+        assert history == 1
+        assert (checkout / 'other.txt').exists()
+    else:
+        assert history == 1
+        assert not (checkout / 'other.txt').exists()
+
+
+def test_failed_and_ok_accounting(remotes, list_remote, tmp_path):
+    missing = remotes.url('awesome-missing')
+    results = sync_repositories([missing, list_remote], tmp_path / 'sources', jobs=2, fetch_mode='shallow')
+    # One record per repository, in the order given
+    assert [(result['repo'], result['status']) for result in results] == [(missing, 'failed'), (list_remote, 'ok')]
+    assert all(result['duration'] >= 0 for result in results)
+
+
+def test_timeout_fails_only_the_slow_repository(list_remote, tmp_path):
+    # A git daemon that accepts the connection and never answers
+    with socket.socket() as server:
+        server.bind(('127.0.0.1', 0))
+        server.listen()
+        stalled = f"git://127.0.0.1:{server.getsockname()[1]}/awesome-stalled"
+        results = sync_repositories([stalled, list_remote], tmp_path / 'sources', jobs=2, timeout=2,
+                                    fetch_mode='shallow')
+    assert [result['status'] for result in results] == ['failed', 'ok']
+    assert results[0]['duration'] < 10
+
+
+def test_update_metadata_keeps_entries_not_given(tmp_path):
+    artifacts = {'awesome-lists': {'sha256': 'abc'}}
+    changes = {'added': 1, 'removed': 0, 'modified': 0, 'path': 'changes-abc.json'}
+    update_metadata(tmp_path, artifacts, changes)
+    update_metadata(tmp_path)
+    metadata = load_metadata(tmp_path)
+    assert metadata['update_count'] == 2
+    assert metadata['artifacts'] == artifacts
+    assert metadata['changes'] == changes
+
+
+def test_paths_and_urls_reach_git_unparsed(list_remote, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    # A shell would run the command substitution in this directory name
+    checkout = tmp_path / 'sources $(touch pwned)' / 'awesome-test'
+    assert fetch_readme_blob(list_remote, checkout)
+    assert 'one.example' in (checkout / 'README.md').read_text()
+    assert not (tmp_path / 'pwned').exists()
+    assert not (checkout / 'other.txt').exists()
+
+
+def test_sync_command_extracts_in_process(list_remote, tmp_path):
+    output_dir = tmp_path / 'data'
+    output_dir.mkdir()
+    (output_dir / SOURCES_FILE_NAME).write_text(json.dumps({
+        'version': SOURCES_VERSION, 'seeds': [list_remote], 'max_depth': 0,
+        'repos': [{'url': list_remote, 'depth': 0, 'found_in': None}]
+    }), encoding='utf-8')
+    process = subprocess.run([sys.executable, '-m', 'scripts', 'sync', '--source-dir', str(tmp_path / 'sources'),
+                              '--output-dir', str(output_dir), '--fetch-mode', 'shallow', '--no-report'],
+                             cwd=tmp_path, env=dict(os.environ, PYTHONPATH=str(REPO_ROOT)),
+                             capture_output=True, text=True)
+    assert process.returncode == 0, process.stdout + process.stderr
+    corpus = json.loads((output_dir / 'awesome-lists.json').read_text(encoding='utf-8'))
+    assert [awesome_list['name'] for awesome_list in corpus] == ['Awesome Test']
+    assert load_metadata(output_dir)['update_count'] == 1
+
+
+def test_update_metadata_drops_entries_given_as_none(tmp_path):
+    update_metadata(tmp_path, {'awesome-lists': {'sha256': 'abc'}}, {'added': 1, 'path': 'changes-abc.json'})
+    # A run with nothing to diff against
+    update_metadata(tmp_path, changes=None)
+    metadata = load_metadata(tmp_path)
+    assert 'changes' not in metadata
+    assert metadata['artifacts'] == {'awesome-lists': {'sha256': 'abc'}}
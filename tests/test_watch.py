@@ -0,0 +1,26 @@
+from scripts.update_awesome_lists import fetch_readme_blob, sync_repositories, local_head
+from scripts.watch import RemoteWatcher
+from tests.conftest import readme
+
+
+def test_readme_blob_checkout_is_not_resynced_until_the_remote_moves(remotes, tmp_path):
+    url = remotes.create('awesome-blob', readme('Awesome Blob', [('one', 'https://one.example')]))
+    source_dir = tmp_path / 'sources'
+    checkout = source_dir / 'awesome-blob'
+    # A README fetched without git, as the readme fetch mode falls back to
+    assert fetch_readme_blob(url, checkout)
+    assert not (checkout / '.git').exists()
+    assert local_head(checkout) is not None
+
+    assert RemoteWatcher([url], source_dir).changed() == {}
+
+    head = remotes.push('awesome-blob', readme('Awesome Blob', [('two', 'https://two.example')]))
+    watcher = RemoteWatcher([url], source_dir)
+    assert watcher.changed() == {url: head}
+
+    results = sync_repositories([url], source_dir, fetch_mode='readme')
+    watcher.synced(results, {url: head})
+    assert 'two.example' in (checkout / 'README.md').read_text()
+    assert watcher.changed() == {}
+    # A watcher started later reads the recorded HEAD instead of syncing again
+    assert RemoteWatcher([url], source_dir).changed() == {}